@@ -0,0 +1,172 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import websockets.exceptions
+from aiohttp import WSMsgType, web
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Response as WSGIResponse
+
+import handshake
+from sessionstate import WORKER_ID
+
+# One event loop serves the audio websocket and the HTTP API (python asyncserver.py),
+# instead of handshake.py's Flask thread + websockets server
+HTTP_PORT = int(os.getenv("HTTP_PORT", "5001"))
+WS_PORT = int(os.getenv("WS_PORT", "8001"))
+# Flask views (LLM + TTS calls) run on this many threads; the loop itself never blocks on them
+HTTP_WORKERS = int(os.getenv("HTTP_WORKERS", "16"))
+
+http_executor = ThreadPoolExecutor(max_workers=HTTP_WORKERS, thread_name_prefix="http")
+server_stats = {"http_requests": 0, "http_in_flight": 0, "websockets": 0, "websockets_total": 0}
+
+# Hop-by-hop or recomputed by aiohttp
+SKIP_HEADERS = {"content-length", "transfer-encoding", "connection"}
+
+
+class _RequestInfo:
+    def __init__(self, path):
+        self.path = path
+
+
+class WebSocketAdapter:
+    """
+    Presents an aiohttp WebSocketResponse through the parts of the websockets
+    connection API that handshake.handler uses, so one handler serves both modes.
+    """
+
+    def __init__(self, ws, request):
+        self.ws = ws
+        self.request = _RequestInfo(request.path_qs)
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        async for message in self.ws:
+            if message.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                yield message.data
+            elif message.type == WSMsgType.ERROR:
+                raise websockets.exceptions.ConnectionClosedError(None, None)
+
+    async def send(self, data):
+        if self.ws.closed:
+            raise websockets.exceptions.ConnectionClosedOK(None, None)
+        try:
+            if isinstance(data, str):
+                await self.ws.send_str(data)
+            else:
+                await self.ws.send_bytes(data)
+        except ConnectionResetError:
+            raise websockets.exceptions.ConnectionClosedError(None, None)
+
+    async def close(self, code=1000, reason=""):
+        await self.ws.close(code=code, message=reason.encode("utf-8"))
+
+
+def _run_wsgi(flask_app, method, path, query_string, headers, body):
+    """Dispatch one request through the Flask app (on an executor thread)."""
+    environ = EnvironBuilder(path=path, query_string=query_string, method=method,
+                             headers=headers, data=body).get_environ()
+    return WSGIResponse.from_app(flask_app.wsgi_app, environ)
+
+
+def build_app(flask_app=handshake.app, ws_handler=handshake.handler, executor=http_executor):
+    """aiohttp application: websocket upgrades go to ws_handler, everything else to flask_app."""
+
+    async def websocket_endpoint(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        server_stats["websockets"] += 1
+        server_stats["websockets_total"] += 1
+        try:
+            await ws_handler(WebSocketAdapter(ws, request))
+        finally:
+            server_stats["websockets"] -= 1
+            if not ws.closed:
+                await ws.close()
+        return ws
+
+    async def wsgi_endpoint(request):
+        loop = asyncio.get_running_loop()
+        body = await request.read()
+        server_stats["http_requests"] += 1
+        server_stats["http_in_flight"] += 1
+        # Flask keeps request state in context vars; every step of this response runs in one context
+        # (one thread at a time), so streamed views keep their request context between chunks
+        context = contextvars.copy_context()
+        response = None
+        try:
+            response = await loop.run_in_executor(
+                executor, context.run, _run_wsgi, flask_app, request.method, request.path,
+                request.query_string, list(request.headers.items()), body,
+            )
+            headers = [(k, v) for k, v in response.headers.items() if k.lower() not in SKIP_HEADERS]
+            if response.is_sequence:
+                # already materialized (JSON, multipart parts): no more blocking work
+                return web.Response(body=response.get_data(), status=response.status_code, headers=headers)
+
+            # streamed body (NDJSON): each chunk may synthesize speech, so pull it on the executor
+            stream = web.StreamResponse(status=response.status_code, headers=headers)
+            await stream.prepare(request)
+            chunks = response.iter_encoded()
+            while True:
+                chunk = await loop.run_in_executor(executor, context.run, next, chunks, None)
+                if chunk is None:
+                    break
+                await stream.write(chunk)
+            await stream.write_eof()
+            return stream
+        finally:
+            server_stats["http_in_flight"] -= 1
+            if response is not None:
+                await loop.run_in_executor(executor, context.run, response.close)
+
+    async def dispatch(request):
+        if request.headers.get("Upgrade", "").lower() == "websocket":
+            return await websocket_endpoint(request)
+        return await wsgi_endpoint(request)
+
+    async def stats_endpoint(request):
+        return web.json_response({
+            "worker": WORKER_ID,
+            **server_stats,
+            "threads": threading.active_count(),
+            "http_workers": executor._max_workers,
+            "http_queued": executor._work_queue.qsize(),
+        })
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_get("/server/stats", stats_endpoint)
+    app.router.add_route("*", "/{tail:.*}", dispatch)
+    return app
+
+
+async def main():
+    extract_process = None
+    if not WORKER_ID:  # under router.py, the router runs the one extractresume.py
+        print("⚙️ Starting extractresume.py...")
+        extract_process = await asyncio.create_subprocess_exec("python", "extractresume.py")
+
+    if handshake.STT_BRIDGE == "async":
+        await handshake.async_session_manager.start_pool()  # warm STT connections, if STT_POOL_SIZE > 0
+
+    runner = web.AppRunner(build_app())
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", HTTP_PORT).start()
+    if WS_PORT != HTTP_PORT:
+        await web.TCPSite(runner, "localhost", WS_PORT).start()
+    print(f"✅ Unified server at http://localhost:{HTTP_PORT} and ws://localhost:{WS_PORT} "
+          f"({HTTP_WORKERS} HTTP workers)")
+    try:
+        await asyncio.Future()
+    finally:
+        await runner.cleanup()
+        if extract_process is not None:
+            extract_process.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
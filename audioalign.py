@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Alignment decodes every synthesized MP3 (pydub/ffmpeg), so it is opt-in with VISEME_ALIGNMENT=1;
+# otherwise phonemes are spread evenly over the duration read from the frame headers
+ALIGNMENT_ENABLED = os.getenv("VISEME_ALIGNMENT", "0") == "1"
+
+HOP_SECONDS = 0.01          # envelope resolution
+THRESHOLD_DB = -35.0        # voiced if within this many dB of the loudest frame
+MIN_SILENCE_SECONDS = 0.12  # shorter gaps are treated as part of the word
+MIN_VOICED_SECONDS = 0.04   # shorter blips are dropped
+
+
+def audio_segment_samples(audio):
+    """
+    Convert a pydub AudioSegment to mono float32 samples in [-1, 1].
+    """
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels).mean(axis=1)
+    return samples / float(1 << (8 * audio.sample_width - 1))
+
+
+def energy_envelope(samples: np.ndarray, sample_rate: int, hop_seconds=HOP_SECONDS):
+    """
+    RMS energy per hop, in dB relative to full scale.
+    """
+    hop = max(int(sample_rate * hop_seconds), 1)
+    n_frames = len(samples) // hop
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n_frames * hop].reshape(n_frames, hop)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return (20.0 * np.log10(rms + 1e-9)).astype(np.float32)
+
+
+def voiced_segments(envelope_db: np.ndarray, hop_seconds=HOP_SECONDS, threshold_db=THRESHOLD_DB,
+                    min_silence_seconds=MIN_SILENCE_SECONDS, min_voiced_seconds=MIN_VOICED_SECONDS):
+    """
+    Detect voiced regions from an energy envelope.
+    Returns an array of shape (segments, 2) with start/end times in seconds.
+    """
+    if len(envelope_db) == 0:
+        return np.zeros((0, 2))
+
+    voiced = envelope_db > (envelope_db.max() + threshold_db)
+
+    # onsets/offsets are the rising/falling edges of the voiced mask
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    onsets = np.flatnonzero(edges == 1)
+    offsets = np.flatnonzero(edges == -1)
+    if len(onsets) == 0:
+        return np.zeros((0, 2))
+
+    # merge segments separated by short gaps
+    gaps = (onsets[1:] - offsets[:-1]) * hop_seconds
+    keep = np.concatenate(([True], gaps >= min_silence_seconds))
+    starts = onsets[keep]
+    ends = offsets[np.concatenate((keep[1:], [True]))]
+
+    # drop blips
+    lengths = (ends - starts) * hop_seconds
+    segments = np.stack((starts, ends), axis=1)[lengths >= min_voiced_seconds] * hop_seconds
+    return segments
+
+
+def align_phoneme_times(n_phonemes: int, segments: np.ndarray, duration: float):
+    """
+    Spread phoneme start times evenly over the voiced time only, so pauses in
+    the audio become pauses in the viseme track.
+    Falls back to a uniform spread over duration when nothing is voiced.
+    """
+    if n_phonemes == 0:
+        return np.zeros(0)
+    if len(segments) == 0:
+        return np.arange(n_phonemes) * (duration / n_phonemes)
+
+    seg_lengths = segments[:, 1] - segments[:, 0]
+    cumulative = np.concatenate(([0.0], np.cumsum(seg_lengths)))
+    voiced_positions = np.arange(n_phonemes) * (cumulative[-1] / n_phonemes)
+    seg_index = np.searchsorted(cumulative, voiced_positions, side="right") - 1
+    return segments[seg_index, 0] + (voiced_positions - cumulative[seg_index])
+
+
+def align_to_audio(audio, n_phonemes: int):
+    """
+    Phoneme start times for a decoded pydub AudioSegment.
+    """
+    samples = audio_segment_samples(audio)
+    envelope = energy_envelope(samples, audio.frame_rate)
+    segments = voiced_segments(envelope)
+    return align_phoneme_times(n_phonemes, segments, audio.duration_seconds)
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Inbound audio is re-chunked to CHUNK_MIN_MS..CHUNK_MAX_MS before it goes upstream
+CHUNK_MIN_MS = int(os.getenv("AUDIO_CHUNK_MIN_MS", "50"))
+CHUNK_MAX_MS = int(os.getenv("AUDIO_CHUNK_MAX_MS", "100"))
+BUFFER_MAX_MS = int(os.getenv("AUDIO_BUFFER_MAX_MS", "2000"))  # per session
+MERGE_MAX_MS = 1000  # largest chunk AssemblyAI accepts; used by the "merge" policy to catch up
+
+# What happens when the upstream falls behind and the buffer is full:
+#   block - stop reading the browser socket until there is room (TCP backpressure to the client)
+#   drop  - discard the oldest buffered audio
+#   merge - send bigger chunks (up to MERGE_MAX_MS) to catch up, dropping only past twice the limit
+POLICY_BLOCK = "block"
+POLICY_DROP = "drop"
+POLICY_MERGE = "merge"
+BUFFER_POLICY = os.getenv("AUDIO_BUFFER_POLICY", POLICY_BLOCK)
+
+LAG_SMOOTHING = 0.1
+
+
+class CoalescingAudioBuffer:
+    """
+    Per-session queue between the browser websocket and the STT upstream.
+    Many small PCM messages are merged into 50-100ms chunks and sent by one
+    task, so upstream sends scale with audio time rather than message count.
+    Text messages (ForceEndpoint, Terminate) are sent in order after the
+    audio queued before them.
+    """
+
+    def __init__(self, send, sample_rate=16000, sample_width=2, policy=BUFFER_POLICY,
+                 chunk_min_ms=CHUNK_MIN_MS, chunk_max_ms=CHUNK_MAX_MS, max_ms=BUFFER_MAX_MS, target=None):
+        if policy not in (POLICY_BLOCK, POLICY_DROP, POLICY_MERGE):
+            raise ValueError(f"Unknown audio buffer policy: {policy}")
+        self.send = send  # async send(data, is_binary)
+        self.target = target  # what send() feeds, for callers that swap upstreams
+        self.policy = policy
+        self.bytes_per_ms = sample_rate * sample_width / 1000
+        self.sample_width = sample_width
+        self.chunk_min = self._bytes(chunk_min_ms)
+        self.chunk_max = self._bytes(chunk_max_ms)
+        self.merge_max = self._bytes(MERGE_MAX_MS)
+        self.max_bytes = self._bytes(max_ms)
+        self.flush_seconds = chunk_max_ms / 1000
+
+        self._items = deque()  # (payload, arrival time); payload is bytes (audio) or str (control)
+        self._depth = 0        # buffered audio bytes
+        self._changed = asyncio.Condition()
+        self._closed = False
+        self._task = None
+
+        self.messages_in = 0
+        self.bytes_in = 0
+        self.chunks_out = 0
+        self.bytes_out = 0
+        self.bytes_dropped = 0
+        self.blocked_seconds = 0.0
+        self.max_depth = 0
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def _bytes(self, ms):
+        return int(ms * self.bytes_per_ms) // self.sample_width * self.sample_width
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    # --- Producer side ---
+    async def put(self, pcm):
+        if not pcm:
+            return True
+        pcm = bytes(pcm)
+        self.messages_in += 1
+        self.bytes_in += len(pcm)
+        # A message bigger than the whole buffer could never fit (the block policy would wait forever):
+        # queue it in buffer-sized pieces, each waiting for its own room
+        step = max(self.max_bytes, self.sample_width)
+        for start in range(0, len(pcm), step):
+            if not await self._put(pcm[start:start + step]):
+                return False
+        return True
+
+    async def _put(self, pcm):
+        async with self._changed:
+            if self.policy == POLICY_BLOCK and self._depth + len(pcm) > self.max_bytes:
+                started = time.monotonic()
+                await self._changed.wait_for(lambda: self._closed or self._depth + len(pcm) <= self.max_bytes)
+                self.blocked_seconds += time.monotonic() - started
+            if self._closed:
+                return False
+            self._items.append((pcm, time.monotonic()))
+            self._depth += len(pcm)
+            limit = self.max_bytes * 2 if self.policy == POLICY_MERGE else self.max_bytes
+            while self._depth > limit:
+                self._drop_oldest()
+            self.max_depth = max(self.max_depth, self._depth)
+            self._changed.notify_all()
+            return True
+
+    async def put_control(self, message):
+        async with self._changed:
+            if self._closed:
+                return False
+            self._items.append((message, time.monotonic()))
+            self._changed.notify_all()
+            return True
+
+    def _drop_oldest(self):
+        for i, (payload, _) in enumerate(self._items):
+            if isinstance(payload, bytes):
+                del self._items[i]
+                self._depth -= len(payload)
+                self.bytes_dropped += len(payload)
+                return
+
+    # --- Consumer side ---
+    def _take(self):
+        """Pop the next control message or audio chunk (None if audio should wait)."""
+        payload, arrived = self._items[0]
+        if isinstance(payload, str):
+            self._items.popleft()
+            return payload, arrived
+
+        # Flush early if a control message is queued behind the audio, or the audio is old enough
+        has_control = any(isinstance(p, str) for p, _ in self._items)
+        if self._depth < self.chunk_min and not has_control and not self._closed \
+                and time.monotonic() - arrived < self.flush_seconds:
+            return None
+
+        limit = self.chunk_max
+        if self.policy == POLICY_MERGE and self._depth > self.max_bytes:
+            limit = self.merge_max
+        parts, size = [], 0
+        while self._items and isinstance(self._items[0][0], bytes) and size < limit:
+            payload, t = self._items.popleft()
+            room = limit - size
+            if len(payload) > room:
+                self._items.appendleft((payload[room:], t))
+                payload = payload[:room]
+            parts.append(payload)
+            size += len(payload)
+        self._depth -= size
+        return b"".join(parts), arrived
+
+    async def _run(self):
+        while True:
+            async with self._changed:
+                item = None
+                while item is None:
+                    if self._items:
+                        item = self._take()
+                    if item is not None:
+                        break
+                    if self._closed and not self._items:
+                        return
+                    timeout = None
+                    if self._items:
+                        timeout = max(self.flush_seconds - (time.monotonic() - self._items[0][1]), 0.001)
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                self._changed.notify_all()  # room for blocked producers
+
+            payload, arrived = item
+            lag_ms = (time.monotonic() - arrived) * 1000
+            self.lag_ms += LAG_SMOOTHING * (lag_ms - self.lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if isinstance(payload, bytes):
+                self.chunks_out += 1
+                self.bytes_out += len(payload)
+                await self.send(payload, True)
+            else:
+                await self.send(payload, False)
+
+    async def close(self, timeout=2.0):
+        """Send what is buffered, then stop the sender task."""
+        async with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "depth_ms": round(self._depth / self.bytes_per_ms, 1),
+            "max_depth_ms": round(self.max_depth / self.bytes_per_ms, 1),
+            "lag_ms": round(self.lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "messages_in": self.messages_in,
+            "chunks_out": self.chunks_out,
+            "coalescing_ratio": round(self.messages_in / self.chunks_out, 2) if self.chunks_out else 0.0,
+            "dropped_ms": round(self.bytes_dropped / self.bytes_per_ms, 1),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+        }
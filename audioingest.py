@@ -0,0 +1,138 @@
+import math
+import time
+
+import numpy as np
+
+# Browser audio encodings accepted on the handshake websocket (?encoding=...&sample_rate=...&channels=...)
+ENCODING_PCM16 = "pcm_s16le"   # what AssemblyAI expects; passed through untouched at 16 kHz mono
+ENCODING_FLOAT32 = "pcm_f32le"  # Web Audio's native format, usually at 48 kHz
+ENCODING_OPUS = "opus"          # raw Opus packets, one per message (WebCodecs AudioEncoder)
+ENCODINGS = (ENCODING_PCM16, ENCODING_FLOAT32, ENCODING_OPUS)
+
+TARGET_RATE = 16000
+TAPS_PER_PHASE = 160   # filter length per polyphase branch, in input samples (~3ms at 48 kHz)
+CUTOFF = 0.9           # passband edge as a fraction of the output Nyquist frequency
+KAISER_BETA = 8.0      # ~80 dB stopband
+OPUS_MAX_FRAME = 5760  # 120ms at 48 kHz, the longest Opus packet
+
+
+def design_lowpass(up, down, taps_per_phase=TAPS_PER_PHASE, cutoff=CUTOFF, beta=KAISER_BETA):
+    """
+    Kaiser-windowed sinc anti-aliasing filter for resampling by up/down,
+    returned as polyphase branches of shape (up, taps_per_phase).
+    """
+    n_taps = up * taps_per_phase
+    fc = cutoff * 0.5 / max(up, down)  # cycles per sample at the upsampled rate
+    m = np.arange(n_taps) - (n_taps - 1) / 2
+    h = 2 * fc * np.sinc(2 * fc * m) * np.kaiser(n_taps, beta)
+    h *= up / h.sum()  # unity DC gain after zero-stuffing
+    # branch p holds taps p, p + up, p + 2*up, ...
+    return h.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (in_rate -> out_rate). Keeps the filter
+    history between calls so frame boundaries are seamless; each call computes
+    all of its output samples at once as a batched dot product.
+    """
+
+    def __init__(self, in_rate, out_rate=TARGET_RATE, taps_per_phase=TAPS_PER_PHASE):
+        g = math.gcd(in_rate, out_rate)
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.taps = taps_per_phase
+        # reversed so a window of past..present input lines up with the taps
+        self.branches = design_lowpass(self.up, self.down, taps_per_phase)[:, ::-1].copy()
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._consumed = 0  # input samples seen so far
+        self._produced = 0  # output samples emitted so far
+
+    def process(self, samples: np.ndarray):
+        if self.up == self.down == 1 or len(samples) == 0:
+            return samples.astype(np.float32, copy=False)
+        buf = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+        last = self._consumed + len(samples) - 1  # global index of the newest input sample
+        n_end = ((last + 1) * self.up - 1) // self.down + 1
+        n = np.arange(self._produced, n_end)
+
+        position = n * self.down
+        newest = position // self.up - self._consumed + (self.taps - 1)  # index into buf
+        phases = position % self.up
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)[newest - (self.taps - 1)]
+        out = np.einsum("ij,ij->i", windows, self.branches[phases])
+
+        self._history = buf[len(buf) - (self.taps - 1):]
+        self._consumed += len(samples)
+        self._produced = n_end
+        return out
+
+
+class AudioIngest:
+    """
+    Turns one browser connection's audio messages into 16 kHz mono int16 PCM
+    for AssemblyAI, tracking per-frame processing time.
+    """
+
+    def __init__(self, encoding=ENCODING_PCM16, sample_rate=TARGET_RATE, channels=1, target_rate=TARGET_RATE):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported audio encoding: {encoding}")
+        if encoding == ENCODING_OPUS:
+            import opuslib  # optional: only needed for Opus clients
+            sample_rate = 48000  # Opus always decodes at 48 kHz here
+            self.decoder = opuslib.Decoder(sample_rate, channels)
+        else:
+            self.decoder = None
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.passthrough = encoding == ENCODING_PCM16 and sample_rate == target_rate and channels == 1
+        self.resampler = PolyphaseResampler(sample_rate, target_rate)
+
+        self.frames = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _decode(self, message):
+        """Message -> mono float32 samples in [-1, 1]."""
+        if self.encoding == ENCODING_FLOAT32:
+            samples = np.frombuffer(message, dtype="<f4", count=len(message) // 4)
+        else:
+            if self.encoding == ENCODING_OPUS:
+                message = self.decoder.decode(bytes(message), OPUS_MAX_FRAME)
+            samples = np.frombuffer(message, dtype="<i2", count=len(message) // 2).astype(np.float32) / 32768.0
+        if self.channels > 1:
+            samples = samples[:len(samples) // self.channels * self.channels]
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        return samples
+
+    def process(self, message):
+        """Returns 16 kHz mono int16 PCM bytes (possibly empty)."""
+        if self.passthrough:
+            return message
+        start = time.perf_counter()
+        out = self.resampler.process(self._decode(message))
+        pcm = (np.clip(out, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        return pcm
+
+    def stats(self):
+        return {
+            "encoding": self.encoding,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "frames": self.frames,
+            "avg_frame_ms": round(self.total_seconds / self.frames * 1000, 3) if self.frames else 0.0,
+            "max_frame_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+def ingest_from_query(query):
+    """AudioIngest from parsed websocket query params (parse_qs output)."""
+    encoding = query.get("encoding", [ENCODING_PCM16])[0]
+    sample_rate = int(query.get("sample_rate", [TARGET_RATE])[0])
+    channels = int(query.get("channels", [1])[0])
+    return AudioIngest(encoding, sample_rate, channels)
@@ -0,0 +1,65 @@
+import json
+import uuid
+
+from flask import Response
+
+# Transports for the question audio returned by /send-msg
+TRANSPORT_JSON = "json"            # base64 audio inside the JSON body (older clients)
+TRANSPORT_MULTIPART = "multipart"  # JSON metadata part + raw audio/mpeg part
+
+JSON_MEDIA_TYPE = "application/json"
+MULTIPART_MEDIA_TYPE = "multipart/mixed"
+AUDIO_MEDIA_TYPE = "audio/mpeg"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"  # sentence-by-sentence streaming
+
+
+def _prefers(accept_mimetypes, media_type):
+    """
+    True if a werkzeug Accept header ranks media_type above plain JSON.
+    Ties (e.g. */*) go to JSON, and a q=0 entry is a refusal.
+    """
+    best = accept_mimetypes.best_match([JSON_MEDIA_TYPE, media_type], default=JSON_MEDIA_TYPE)
+    return best == media_type and accept_mimetypes[media_type] > 0
+
+
+def negotiate_transport(accept_mimetypes):
+    """
+    Pick the audio transport from a werkzeug Accept header.
+    Clients must ask for multipart/mixed explicitly; JSON stays the default.
+    """
+    if _prefers(accept_mimetypes, MULTIPART_MEDIA_TYPE):
+        return TRANSPORT_MULTIPART
+    return TRANSPORT_JSON
+
+
+def wants_stream(accept_mimetypes):
+    """True if the client asked for the sentence-chunked NDJSON stream in its Accept header."""
+    return _prefers(accept_mimetypes, NDJSON_MEDIA_TYPE)
+
+
+def multipart_response(metadata: dict, audio: bytes, metadata_type="application/json"):
+    """
+    Build a multipart/mixed response: the metadata (blendData, duration,
+    question) as the first part and the MP3 bytes unencoded as the second.
+    The audio buffer is passed through as-is rather than copied into one body.
+    """
+    boundary = uuid.uuid4().hex
+    metadata_bytes = json.dumps(metadata).encode("utf-8")
+    parts = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {metadata_type}\r\n"
+            f"Content-Length: {len(metadata_bytes)}\r\n\r\n"
+        ).encode("ascii"),
+        metadata_bytes,
+        (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {AUDIO_MEDIA_TYPE}\r\n"
+            f"Content-Length: {len(audio)}\r\n\r\n"
+        ).encode("ascii"),
+        audio,
+        f"\r\n--{boundary}--\r\n".encode("ascii"),
+    ]
+    response = Response(parts, mimetype=f"{MULTIPART_MEDIA_TYPE}; boundary={boundary}")
+    response.headers["Content-Length"] = str(sum(len(part) for part in parts))
+    return response
@@ -0,0 +1 @@
+"""Benchmarks. Run them from the repository root: python -m bench.<name> [args]"""
@@ -0,0 +1,63 @@
+import sys
+import time
+
+import numpy as np
+
+from audioalign import align_phoneme_times, energy_envelope, voiced_segments
+
+SAMPLE_RATE = 24000  # Google Neural2 MP3 output rate
+REPEATS = 200
+PHONEMES_PER_SECOND = 12
+
+
+def synthetic_speech(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """
+    Speech-like test signal: modulated tone bursts (words) separated by
+    short gaps, with a longer pause after every sentence.
+    """
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+    t = 0.2
+    words = 0
+    while t < seconds - 0.5:
+        length = rng.uniform(0.15, 0.5)
+        start, end = int(t * sample_rate), int((t + length) * sample_rate)
+        n = np.arange(end - start) / sample_rate
+        samples[start:end] = 0.3 * np.sin(2 * np.pi * 180 * n) * np.hanning(end - start)
+        words += 1
+        t += length + (0.6 if words % 8 == 0 else rng.uniform(0.03, 0.1))
+    samples += rng.normal(0, 1e-4, len(samples)).astype(np.float32)
+    return samples
+
+
+def load_audio(path):
+    from pydub import AudioSegment
+    from audioalign import audio_segment_samples
+    audio = AudioSegment.from_file(path)
+    return audio_segment_samples(audio), audio.frame_rate
+
+
+def bench(name, samples, sample_rate):
+    duration = len(samples) / sample_rate
+    n_phonemes = int(duration * PHONEMES_PER_SECOND)
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        envelope = energy_envelope(samples, sample_rate)
+        segments = voiced_segments(envelope)
+        align_phoneme_times(n_phonemes, segments, duration)
+    elapsed = (time.perf_counter() - start) / REPEATS
+    print(f"{name:>28} | {duration:6.1f}s audio | {len(segments):3d} voiced segments | {elapsed * 1e3:6.3f} ms")
+
+
+def main():
+    for seconds in (5, 15, 30, 60):
+        bench(f"synthetic {seconds}s", synthetic_speech(seconds), SAMPLE_RATE)
+    # Optional real TTS outputs: python -m bench.bench_audio_align out1.mp3 out2.mp3 ...
+    for path in sys.argv[1:]:
+        samples, sample_rate = load_audio(path)
+        bench(path, samples, sample_rate)
+
+
+if __name__ == "__main__":
+    main()
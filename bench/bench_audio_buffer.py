@@ -0,0 +1,62 @@
+import asyncio
+import sys
+import time
+
+from audiobuffer import POLICY_BLOCK, POLICY_DROP, POLICY_MERGE, CoalescingAudioBuffer
+
+SAMPLE_RATE = 16000
+FRAME_MS = int(sys.argv[1]) if len(sys.argv) > 1 else 20  # browser message size
+SECONDS = 3.0
+MAX_MS = 500  # small buffer so a slow upstream exercises each policy
+
+
+async def run(policy, upstream_delay):
+    """Stream SECONDS of audio in real time through the buffer to an upstream that takes upstream_delay per send."""
+    received = []
+    sends = 0
+
+    async def send(data, is_binary):
+        nonlocal sends
+        sends += 1
+        await asyncio.sleep(upstream_delay)
+        if is_binary:
+            received.append(data)
+
+    buffer = CoalescingAudioBuffer(send, SAMPLE_RATE, policy=policy, max_ms=MAX_MS).start()
+    frame_bytes = SAMPLE_RATE * 2 * FRAME_MS // 1000
+    n_frames = int(SECONDS * 1000 / FRAME_MS)
+    sent = bytearray()
+
+    start = time.monotonic()
+    for i in range(n_frames):
+        frame = bytes([i % 256]) * frame_bytes
+        sent += frame
+        await buffer.put(frame)
+        # real-time pacing, measured from the start so blocking shows up as lost time
+        await asyncio.sleep(max(start + (i + 1) * FRAME_MS / 1000 - time.monotonic(), 0))
+    await buffer.put_control('{"type": "ForceEndpoint"}')
+    await buffer.close(timeout=30)
+
+    stats = buffer.stats()
+    out = b"".join(received)
+    assert len(out) + buffer.bytes_dropped == len(sent), "audio lost without being counted"
+    if buffer.bytes_dropped == 0:
+        assert out == bytes(sent), "audio reordered or corrupted"
+    print(f"{policy:>6} | upstream {upstream_delay * 1000:4.0f}ms/send | {time.monotonic() - start:4.1f}s | "
+          f"{stats['messages_in']:4d} msgs -> "
+          f"{stats['chunks_out']:3d} chunks | lag avg {stats['lag_ms']:6.1f}ms max {stats['max_lag_ms']:6.1f}ms | "
+          f"max depth {stats['max_depth_ms']:6.1f}ms | dropped {stats['dropped_ms']:6.1f}ms | "
+          f"blocked {stats['blocked_seconds']:.2f}s")
+
+
+async def main():
+    print(f"{SECONDS:.0f}s of audio in {FRAME_MS}ms messages, {MAX_MS}ms buffer")
+    for policy in (POLICY_BLOCK, POLICY_DROP, POLICY_MERGE):
+        await run(policy, upstream_delay=0.002)
+    print("-- upstream slower than real time --")
+    for policy in (POLICY_BLOCK, POLICY_DROP, POLICY_MERGE):
+        await run(policy, upstream_delay=0.15)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+import sys
+import time
+
+import numpy as np
+
+from audioingest import ENCODING_FLOAT32, ENCODING_OPUS, ENCODING_PCM16, AudioIngest, PolyphaseResampler
+
+FRAME_MS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+SECONDS = 10
+BUDGET_MS = 50
+
+
+def tone(freq, rate, seconds, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def level_db(samples):
+    samples = samples[len(samples) // 4:]  # skip the filter warm-up
+    return 20 * np.log10(np.sqrt(np.mean(samples.astype(np.float64) ** 2)) + 1e-12)
+
+
+def check_response(rate):
+    """A passband tone keeps its level; one above 8 kHz is removed instead of aliasing."""
+    for freq, expect in ((1000, "pass"), (3400, "pass"), (9000, "stop"), (20000, "stop")):
+        if freq >= rate / 2:
+            continue
+        resampler = PolyphaseResampler(rate)
+        src = tone(freq, rate, 1.0)
+        frame = rate * FRAME_MS // 1000
+        out = np.concatenate([resampler.process(src[i:i + frame]) for i in range(0, len(src), frame)])
+        assert abs(len(out) - 16000) <= 1, len(out)
+        gain = level_db(out) - level_db(src)
+        ok = gain > -0.5 if expect == "pass" else gain < -60
+        assert ok, f"{rate} Hz input, {freq} Hz tone: {gain:.1f} dB"
+        print(f"   {rate:>5} Hz -> 16 kHz | {freq:>5} Hz tone {gain:7.1f} dB ({expect})")
+
+
+def bench(name, ingest, frames):
+    for frame in frames[:5]:  # warm up
+        ingest.process(frame)
+    times = []
+    out_bytes = 0
+    for frame in frames:
+        start = time.perf_counter()
+        out_bytes += len(ingest.process(frame))
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+    print(f"{name:>26} | {len(frames):4d} frames | avg {times.mean():6.3f} ms | p99 {np.percentile(times, 99):6.3f} ms "
+          f"| max {times.max():6.3f} ms | {out_bytes / 32000:5.1f}s out")
+    assert np.percentile(times, 99) < BUDGET_MS
+
+
+def main():
+    print("Frequency response")
+    for rate in (48000, 44100):
+        check_response(rate)
+
+    print(f"Per-frame latency, {FRAME_MS}ms frames, budget {BUDGET_MS}ms")
+    speech = tone(220, 48000, SECONDS) + tone(3000, 48000, SECONDS, 0.1)
+    frame = 48000 * FRAME_MS // 1000
+
+    f32 = [speech[i:i + frame].astype("<f4").tobytes() for i in range(0, len(speech), frame)]
+    bench("float32 48 kHz mono", AudioIngest(ENCODING_FLOAT32, 48000), f32)
+
+    stereo = np.repeat(speech, 2)
+    f32_stereo = [stereo[i:i + 2 * frame].astype("<f4").tobytes() for i in range(0, len(stereo), 2 * frame)]
+    bench("float32 48 kHz stereo", AudioIngest(ENCODING_FLOAT32, 48000, channels=2), f32_stereo)
+
+    speech441 = tone(220, 44100, SECONDS)
+    frame441 = 44100 * FRAME_MS // 1000
+    s16 = [(speech441[i:i + frame441] * 32767).astype("<i2").tobytes() for i in range(0, len(speech441), frame441)]
+    bench("int16 44.1 kHz mono", AudioIngest(ENCODING_PCM16, 44100), s16)
+
+    try:
+        import opuslib
+    except ImportError:
+        print(f"{'opus 48 kHz mono':>26} | skipped (opuslib not installed)")
+    else:
+        encoder = opuslib.Encoder(48000, 1, opuslib.APPLICATION_VOIP)
+        pcm = (speech * 32767).astype("<i2")
+        packets = [encoder.encode(pcm[i:i + frame].tobytes(), frame) for i in range(0, len(pcm) - frame + 1, frame)]
+        bench("opus 48 kHz mono", AudioIngest(ENCODING_OPUS), packets)
+    print("✅ every format fits the per-frame budget")
+
+
+if __name__ == "__main__":
+    main()
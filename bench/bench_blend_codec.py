@@ -0,0 +1,37 @@
+import json
+import time
+
+from bench.bench_phonemes import load_questions
+from blendcodec import encode_phoneme_blend
+from getphenome import build_blend_data, get_phonemes
+
+REPEATS = 200
+SECONDS_PER_CHAR = 0.06
+
+
+def time_per_item(fn, items, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for item in items:
+            fn(*item)
+    return (time.perf_counter() - start) / (repeats * len(items))
+
+
+def main():
+    questions = load_questions()
+    items = [(get_phonemes(q), len(q) * SECONDS_PER_CHAR) for q in questions]
+
+    json_size = sum(len(json.dumps(build_blend_data(ph, d))) for ph, d in items) / len(items)
+    print(f"{'format':>16} | {'bytes/question':>14} | {'build+serialize µs':>18}")
+    json_time = time_per_item(lambda ph, d: json.dumps(build_blend_data(ph, d)), items)
+    print(f"{'json dicts':>16} | {json_size:14.0f} | {json_time * 1e6:18.1f}")
+
+    for dtype in ("float16", "uint8"):
+        size = sum(len(json.dumps(encode_phoneme_blend(ph, d, dtype))) for ph, d in items) / len(items)
+        elapsed = time_per_item(lambda ph, d: json.dumps(encode_phoneme_blend(ph, d, dtype)), items)
+        print(f"{'compact ' + dtype:>16} | {size:14.0f} | {elapsed * 1e6:18.1f}"
+              f"  ({json_size / size:.1f}x smaller, {json_time / elapsed:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
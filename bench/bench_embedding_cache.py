@@ -0,0 +1,71 @@
+import hashlib
+import os
+import random
+import time
+
+# Memory tier only unless a Redis URL is given, so the benchmark does not touch shared data
+os.environ.setdefault("EMBEDDING_CACHE_REDIS_URL", "")
+
+import numpy as np
+
+from embeddingcache import EmbeddingCache
+
+# Stand-in for openai.embeddings.create: a fixed random unit vector per text, after a typical API delay
+API_LATENCY = 0.01
+DIMENSION = 1024
+MODEL = "text-embedding-3-small"
+CANDIDATES = 50
+QUESTIONS_PER_TOPIC = 2
+# Interview structures are built from a shared skill vocabulary, so candidates draw from the same topics
+TOPIC_POOL = [f"{skill} {area}" for skill in ("Java", "Spring Boot", "SQL", "Kafka", "Docker", "React")
+              for area in ("fundamentals", "concurrency", "testing", "performance", "design patterns")]
+TOPICS_PER_CANDIDATE = 8
+
+
+def fake_embedding(text):
+    time.sleep(API_LATENCY)
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "big")
+    vector = np.random.default_rng(seed).standard_normal(DIMENSION)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def run_interviews(cache):
+    """
+    Question generation embeds the topic through the cache; evaluation embeds
+    each (unique) Q&A and topic summary directly. Returns the direct calls.
+    """
+    random.seed(1)
+    direct = 0
+    for candidate in range(CANDIDATES):
+        for topic in random.sample(TOPIC_POOL, TOPICS_PER_CANDIDATE):
+            for question in range(QUESTIONS_PER_TOPIC):
+                cache.get_or_embed(MODEL, DIMENSION, topic, lambda: fake_embedding(topic))
+                fake_embedding(f"Topic: {topic}\nQuestion: {candidate}-{question}\nAnswer: ...")
+                direct += 1
+            fake_embedding(f"Topic: {topic}\nSummary: candidate {candidate}")
+            direct += 1
+    return direct
+
+
+def main():
+    cache = EmbeddingCache()
+    start = time.perf_counter()
+    direct = run_interviews(cache)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats()
+    uncached = (stats["lookups"] + direct) * API_LATENCY
+
+    print(f"{CANDIDATES} interviews, {stats['lookups']} cached topic lookups, {direct} one-off answer embeddings")
+    print(f"API calls: {stats['api_calls'] + direct}  avoided: {stats['api_calls_avoided']}  "
+          f"topic hit rate: {stats['hit_rate']:.1%}  cache entries: {stats['entries']}")
+    print(f"embedding time: {elapsed:.2f}s cached vs {uncached:.2f}s uncached")
+
+    vector = fake_embedding("precision check")
+    stored = cache.put(MODEL, DIMENSION, "precision check", vector)
+    cosine = float(np.dot(vector, stored) / (np.linalg.norm(vector) * np.linalg.norm(stored)))
+    print(f"float16 storage: {DIMENSION * 2} bytes per vector, cosine to float64 original {cosine:.6f}")
+    assert cosine > 0.9999
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from phonemizer import phonemize
+
+from bench.bench_phonemes import load_questions
+from espeakpool import espeak_pool
+from getphenome import PHONEMIZE_OPTIONS
+
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32]
+REQUESTS_PER_LEVEL = 128
+
+
+def per_call_backend(text):
+    """Baseline: phonemize() builds a fresh espeak backend on every call."""
+    return phonemize(text, **PHONEMIZE_OPTIONS)
+
+
+def pooled_backend(text):
+    return espeak_pool.phonemize([text])[0]
+
+
+def run_level(fn, texts, concurrency):
+    latencies = []
+
+    def timed(text):
+        start = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - start)
+
+    work = [texts[i % len(texts)] for i in range(REQUESTS_PER_LEVEL)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, work))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": len(work) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    texts = load_questions()
+    print(f"espeak pool size: {espeak_pool.size}, {REQUESTS_PER_LEVEL} requests per level")
+    print(f"{'concurrency':>11} | {'mode':>8} | {'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+    for concurrency in CONCURRENCY_LEVELS:
+        for name, fn in (("per-call", per_call_backend), ("pooled", pooled_backend)):
+            result = run_level(fn, texts, concurrency)
+            print(f"{concurrency:>11} | {name:>8} | {result['throughput']:8.1f} | "
+                  f"{result['p50_ms']:8.2f} | {result['p95_ms']:8.2f}")
+    print(f"pool: {espeak_pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import glob
+import io
+import os
+import sys
+import time
+
+from pydub import AudioSegment
+
+from mp3duration import mp3_duration
+from ttscache import CACHE_DIR
+
+REPEATS = 5
+
+
+def load_corpus(paths):
+    """MP3 files from the command line, or every cached TTS output."""
+    if not paths:
+        paths = glob.glob(os.path.join(CACHE_DIR, "*", "*.mp3"))
+    corpus = []
+    for path in paths:
+        with open(path, "rb") as f:
+            corpus.append((path, f.read()))
+    return corpus
+
+
+def pydub_duration(data):
+    return AudioSegment.from_file(io.BytesIO(data), format="mp3").duration_seconds
+
+
+def time_per_file(fn, corpus, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for _, data in corpus:
+            fn(data)
+    return (time.perf_counter() - start) / (repeats * len(corpus))
+
+
+def main():
+    corpus = load_corpus(sys.argv[1:])
+    if not corpus:
+        print(f"No MP3 files found; pass paths or populate {CACHE_DIR}/ by running ttsblend.")
+        return
+
+    max_error = 0.0
+    for path, data in corpus:
+        header, decoded = mp3_duration(data), pydub_duration(data)
+        max_error = max(max_error, abs(header - decoded))
+        print(f"{os.path.basename(path):>72} | header {header:8.3f}s | pydub {decoded:8.3f}s")
+
+    header_time = time_per_file(mp3_duration, corpus)
+    pydub_time = time_per_file(pydub_duration, corpus)
+    print(f"{len(corpus)} files, max difference {max_error * 1000:.1f} ms")
+    print(f"frame-header scan: {header_time * 1e3:8.3f} ms/file")
+    print(f"pydub/ffmpeg decode: {pydub_time * 1e3:8.3f} ms/file  ({pydub_time / header_time:.0f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import tempfile
+import time
+
+# Keep benchmark runs out of the real phoneme cache
+os.environ.setdefault("PHONEME_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "phoneme_cache.sqlite3"))
+
+from phonemizer import phonemize
+
+from getphenome import (
+    MULTI_CHAR_PHONEMES,
+    PHONEMIZE_OPTIONS,
+    build_blend_data,
+    generate_phonemes,
+    generate_phonemes_batch,
+    tokenize_ipa,
+)
+from phonemecache import phoneme_cache
+
+QUESTIONS_FILE = "questions.json"
+REPEATS = 200
+
+
+def load_questions(path=QUESTIONS_FILE):
+    with open(path) as f:
+        data = json.load(f)
+    return [q["question"] for q in data.get("generatedQuestions", []) if q.get("question")]
+
+
+def legacy_tokenize_ipa(ipa_str):
+    """Tokenizer as it was before the precompiled pattern (re-sorts per character)."""
+    ipa_str = re.sub(r'[.,!?;:]', '', ipa_str)
+    phonemes = []
+    for word in ipa_str.split():
+        i = 0
+        while i < len(word):
+            matched = False
+            for m in sorted(MULTI_CHAR_PHONEMES, key=len, reverse=True):
+                if word[i:i + len(m)] == m:
+                    phonemes.append(m)
+                    i += len(m)
+                    matched = True
+                    break
+            if not matched:
+                phonemes.append(word[i])
+                i += 1
+    return phonemes
+
+
+def time_per_item(fn, items, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - start) / (repeats * len(items))
+
+
+def main():
+    questions = load_questions()
+    durations = [len(q) * 0.06 for q in questions]
+    print(f"📚 {len(questions)} questions from {QUESTIONS_FILE}")
+
+    # Phonemize once so the tokenizer comparison excludes espeak
+    ipa_strs = phonemize(questions, **PHONEMIZE_OPTIONS)
+    for ipa_str in ipa_strs:
+        assert legacy_tokenize_ipa(ipa_str) == tokenize_ipa(ipa_str)
+
+    legacy = time_per_item(lambda s: build_blend_data(legacy_tokenize_ipa(s), 5.0), ipa_strs)
+    compiled = time_per_item(lambda s: build_blend_data(tokenize_ipa(s), 5.0), ipa_strs)
+    print(f"tokenize+blend  before: {legacy * 1e6:8.1f} µs/question")
+    print(f"tokenize+blend  after : {compiled * 1e6:8.1f} µs/question  ({legacy / compiled:.1f}x)")
+
+    # End to end, including espeak (cold cache)
+    phoneme_cache.clear()
+    start = time.perf_counter()
+    for text, duration in zip(questions, durations):
+        generate_phonemes(text, duration)
+    single = (time.perf_counter() - start) / len(questions)
+
+    phoneme_cache.clear()
+    start = time.perf_counter()
+    generate_phonemes_batch(questions, durations)
+    batch = (time.perf_counter() - start) / len(questions)
+    print(f"end-to-end  one call per question: {single * 1e3:8.2f} ms/question")
+    print(f"end-to-end  generate_phonemes_batch: {batch * 1e3:8.2f} ms/question  ({single / batch:.1f}x)")
+
+    # Repeated questions are served from the phoneme cache
+    start = time.perf_counter()
+    for text, duration in zip(questions, durations):
+        generate_phonemes(text, duration)
+    warm = (time.perf_counter() - start) / len(questions)
+    print(f"end-to-end  warm phoneme cache:    {warm * 1e3:8.2f} ms/question  ({single / warm:.1f}x)")
+    print(f"phoneme cache: {phoneme_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
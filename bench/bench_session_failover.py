@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+
+import aiohttp
+import redis
+
+# Moves a live interview between two local workers: starts python router.py with two workers,
+# serves a question from the user's worker, kills that worker mid-session and checks that the
+# other worker rehydrates the session from Redis and continues the interview where it stopped.
+# Needs a local Redis and the OpenAI/Pinecone credentials the workers use.
+ROUTER_URL = "http://localhost:5301"
+USER_ID = sys.argv[1] if len(sys.argv) > 1 else "failover-check-user"
+SILENCE = b"\x00" * 3200  # 100ms of 16 kHz PCM
+PAYLOAD = {
+    "question": {
+        "Java": {
+            "Collections": ["Definition-based", "Scenario-based", "Real-world usage-based"],
+            "Concurrency": ["Definition-based", "Scenario-based", "Real-world usage-based"],
+        }
+    },
+    "role": "Java Developer",
+    "experience": "3 years",
+}
+
+redis_client = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
+
+
+def agent_state():
+    state = redis_client.hget(f"session:{USER_ID}", "agent")
+    return json.loads(state) if state else None
+
+
+def progress(state):
+    return state["current_topic_index"], state["question_count"]
+
+
+async def wait_for_workers(client, count, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with client.get(f"{ROUTER_URL}/router/stats") as response:
+                stats = await response.json()
+            if len(stats["ring"]) == count:
+                return stats
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(1)
+    raise TimeoutError(f"{count} workers did not come up")
+
+
+async def ask(client):
+    async with client.post(f"{ROUTER_URL}/send-msg", json={"userId": USER_ID}) as response:
+        response.raise_for_status()
+        data = await response.json()
+        return response.headers["X-Worker"], data.get("question")
+
+
+async def stream_audio(ws, stop):
+    while not stop.is_set():
+        await ws.send_bytes(SILENCE)
+        await asyncio.sleep(0.1)
+
+
+async def main():
+    redis_client.set(USER_ID, json.dumps(PAYLOAD), ex=60 * 60)
+    redis_client.delete(f"session:{USER_ID}")
+    for key in redis_client.scan_iter(f"asked_questions:{USER_ID}:*"):
+        redis_client.delete(key)
+
+    env = {**os.environ, "WORKERS": "2", "WORKER_BASE_PORT": "5311", "WORKER_RESTART": "0",
+           "HTTP_PORT": "5301", "WS_PORT": "5301"}
+    router = await asyncio.create_subprocess_exec(sys.executable, "router.py", env=env)
+    try:
+        async with aiohttp.ClientSession() as client:
+            stats = await wait_for_workers(client, 2)
+            ws = await client.ws_connect(f"{ROUTER_URL}/?userId={USER_ID}")
+            stop = asyncio.Event()
+            streaming = asyncio.create_task(stream_audio(ws, stop))
+
+            first_worker, first_question = await ask(client)
+            before = agent_state()
+            print(f"1️⃣ {first_worker}: {first_question}")
+            print(f"   saved state: {before}")
+
+            pid = stats["workers"][first_worker]["pid"]
+            os.kill(pid, signal.SIGKILL)
+            print(f"💥 killed {first_worker} (pid {pid})")
+            await asyncio.sleep(1)
+
+            second_worker, second_question = await ask(client)
+            after = agent_state()
+            print(f"2️⃣ {second_worker}: {second_question}")
+            print(f"   saved state: {after}")
+
+            stop.set()
+            await streaming
+            assert not ws.closed, "audio websocket was dropped instead of moved"
+            await ws.close()
+
+        assert second_worker != first_worker, "session did not move"
+        assert progress(after) > progress(before), "the new worker restarted the interview instead of continuing it"
+        print("✅ session moved between workers and continued from the shared state")
+    finally:
+        router.send_signal(signal.SIGINT)
+        await router.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import time
+
+from localstt import LocalSTTServer
+from sttpool import STTConnectionPool
+from sttsession import AsyncSTTSessionManager
+
+HANDSHAKE_DELAY = 0.15  # stand-in for TLS + auth on the real endpoint
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+FRAME = b"\x00" * 1600
+
+
+async def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+async def time_to_first_audio(manager, user_id):
+    """From 'candidate connected' to the first frame accepted upstream."""
+    start = time.perf_counter()
+    session = await manager.get_or_create(user_id)
+    assert await session.send(FRAME, is_binary=True)
+    return time.perf_counter() - start
+
+
+async def sessions_latency(server, pool_size):
+    manager = AsyncSTTSessionManager(endpoint=server.url, key="local", record=False, pool_size=pool_size)
+    await manager.start_pool()
+    if manager.pool is not None:
+        assert await wait_until(lambda: len(manager.pool._idle) == pool_size), "pool did not fill"
+    latencies = []
+    for i in range(SESSIONS):
+        latencies.append(await time_to_first_audio(manager, f"{pool_size}-{i}"))
+        await asyncio.sleep(0.3)  # sessions arrive one at a time; the pool refills in between
+    stats = manager.stats()
+    await manager.close_all()
+    return latencies, stats
+
+
+async def check_health_and_expiry(server):
+    pool = STTConnectionPool(server.url, "local", size=2, idle_seconds=0.5, health_seconds=0.1)
+    await pool.start()
+    assert await wait_until(lambda: len(pool._idle) == 2)
+
+    first = set(pool._idle)
+    await server.disconnect_all()  # upstream drops the idle connections
+    assert await wait_until(lambda: pool.stats_counters["unhealthy"] >= 2 and len(pool._idle) == 2)
+    assert not first & set(pool._idle)
+    print(f"✅ dropped connections detected and replaced: {pool.stats()}")
+
+    opened = pool.stats_counters["opened"]
+    assert await wait_until(lambda: pool.stats_counters["expired"] >= 2 and pool.stats_counters["opened"] >= opened + 2)
+    print(f"✅ idle connections recycled: {pool.stats()}")
+    await pool.close()
+
+
+async def main():
+    server = await LocalSTTServer(handshake_delay=HANDSHAKE_DELAY).serve()
+
+    cold, _ = await sessions_latency(server, pool_size=0)
+    warm, stats = await sessions_latency(server, pool_size=2)
+    print(f"{SESSIONS} sessions, {HANDSHAKE_DELAY * 1000:.0f}ms simulated handshake")
+    print(f"  dialing:   avg {sum(cold) / len(cold) * 1000:6.1f} ms to first audio")
+    print(f"  warm pool: avg {sum(warm) / len(warm) * 1000:6.1f} ms to first audio | {stats['pool']}")
+    assert stats["pool"]["hits"] == SESSIONS
+
+    await check_health_and_expiry(server)
+    await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
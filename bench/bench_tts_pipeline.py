@@ -0,0 +1,39 @@
+import os
+import tempfile
+import time
+
+# Keep benchmark runs out of the real phoneme cache
+os.environ.setdefault("PHONEME_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "phoneme_cache.sqlite3"))
+
+import texttospeech
+from bench.bench_phonemes import load_questions
+from phonemecache import phoneme_cache
+
+
+def run(questions, parallel):
+    """Mean wall-clock seconds per uncached synthesize() call."""
+    texttospeech.PARALLEL_PHONEMIZE = parallel
+    phoneme_cache.clear()
+    elapsed = []
+    for text in questions:
+        start = time.perf_counter()
+        texttospeech.synthesize(text, use_cache=False)
+        elapsed.append(time.perf_counter() - start)
+    return sum(elapsed) / len(elapsed)
+
+
+def main():
+    questions = load_questions()
+    # warm up the TTS client and espeak pool
+    texttospeech.synthesize(questions[0], use_cache=False)
+
+    sequential = run(questions, parallel=False)
+    parallel = run(questions, parallel=True)
+    print(f"{len(questions)} questions, TTS cache bypassed, phoneme cache cold")
+    print(f"phonemize after synthesis:   {sequential * 1e3:8.1f} ms/request")
+    print(f"phonemize during synthesis:  {parallel * 1e3:8.1f} ms/request")
+    print(f"saved wall-clock time:       {(sequential - parallel) * 1e3:8.1f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
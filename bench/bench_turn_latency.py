@@ -0,0 +1,59 @@
+import asyncio
+import json
+import sys
+import time
+
+import requests
+import websockets
+
+# Compares per-turn latency of the two ways a question reaches the browser, against a running server
+# (python handshake.py or python asyncserver.py) with an interview already set up for USER_ID:
+#   http - POST /send-msg after the answer, as the frontend does today
+#   push - {"type": "NextQuestion"} on the audio websocket, answered with Question + MP3 frames
+# Each turn generates a real question (LLM + TTS), so this needs the server's API credentials.
+HTTP_URL = "http://localhost:5001"
+WS_URL = "ws://localhost:8001"
+USER_ID = sys.argv[1] if len(sys.argv) > 1 else "bench-user"
+TURNS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+SILENCE = b"\x00" * 3200  # 100ms of 16 kHz PCM, so the session has audio between turns
+
+
+async def http_turn(ws):
+    """Seconds from the request to the full question response."""
+    await ws.send(SILENCE)
+    start = time.perf_counter()
+    response = await asyncio.to_thread(requests.post, f"{HTTP_URL}/send-msg", json={"userId": USER_ID})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def push_turn(ws):
+    """Seconds from NextQuestion to the question's MP3 on the websocket."""
+    await ws.send(SILENCE)
+    start = time.perf_counter()
+    await ws.send(json.dumps({"type": "NextQuestion"}))
+    while True:
+        message = await ws.recv()
+        if isinstance(message, bytes):
+            return time.perf_counter() - start
+        data = json.loads(message)
+        if data.get("type") == "QuestionError":
+            raise RuntimeError(data.get("error"))
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return f"p50 {samples[len(samples) // 2] * 1000:.0f}ms  p95 {samples[int(len(samples) * 0.95)] * 1000:.0f}ms"
+
+
+async def main():
+    results = {}
+    async with websockets.connect(f"{WS_URL}/?userId={USER_ID}&push=1", max_size=None) as ws:
+        for mode, turn in (("http", http_turn), ("push", push_turn)):
+            results[mode] = [await turn(ws) for _ in range(TURNS)]
+            print(f"{mode:5s} {summary(results[mode])}")
+    print("server-side:", json.dumps(requests.get(f"{HTTP_URL}/turn-latency/stats").json(), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+import sys
+import time
+
+import numpy as np
+
+from bench.bench_audio_align import synthetic_speech
+from vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 800  # 50ms browser frames
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+
+
+def answer_audio(seconds, noise_db, seed=0):
+    """Speech-like bursts, a long thinking pause in the middle, background noise throughout."""
+    speech = synthetic_speech(seconds / 3, SAMPLE_RATE, seed)
+    pause = np.zeros(int(seconds / 3 * SAMPLE_RATE), dtype=np.float32)
+    samples = np.concatenate([speech, pause, synthetic_speech(seconds / 3, SAMPLE_RATE, seed + 1)])
+    rng = np.random.default_rng(seed)
+    samples += rng.normal(0, 10 ** (noise_db / 20), len(samples)).astype(np.float32)
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+def bench(name, pcm):
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    frames = [pcm[i:i + FRAME_SAMPLES].tobytes() for i in range(0, len(pcm), FRAME_SAMPLES)]
+
+    start = time.perf_counter()
+    for frame in frames:
+        vad.process(frame)
+    elapsed = time.perf_counter() - start
+
+    stats = vad.stats()
+    print(f"{name:>22} | {elapsed / len(frames) * 1e6:6.1f} us/frame | "
+          f"suppressed {stats['suppressed_ratio'] * 100:5.1f}% | "
+          f"speech {stats['speech_seconds']:5.1f}s | end-of-answer events {stats['end_of_answer_events']}")
+    return stats
+
+
+def main():
+    print(f"{SECONDS:.0f}s of 16 kHz audio in 50ms frames")
+    for noise_db in (-80, -60, -50):
+        stats = bench(f"noise {noise_db} dBFS", answer_audio(SECONDS, noise_db))
+        assert stats["bytes_forwarded"] + stats["bytes_suppressed"] == stats["bytes_in"]
+
+    # a full answer followed by silence ends exactly once
+    vad = VoiceActivityDetector(SAMPLE_RATE)
+    speech = (synthetic_speech(5, SAMPLE_RATE) * 32767).astype(np.int16)
+    pcm = np.concatenate([speech, np.zeros(3 * SAMPLE_RATE, dtype=np.int16)])
+    events = sum(vad.process(pcm[i:i + FRAME_SAMPLES].tobytes())[1] for i in range(0, len(pcm), FRAME_SAMPLES))
+    assert events == 1, events
+    print("✅ one end-of-answer event after trailing silence")
+
+
+if __name__ == "__main__":
+    main()
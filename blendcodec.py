@@ -0,0 +1,118 @@
+import base64
+import numbers
+
+import numpy as np
+
+from getphenome import BLENDSHAPE_NAMES, PHENOME_MATRIX, phoneme_ids
+
+# Media types clients can put in the Accept header of /send-msg
+JSON_MEDIA_TYPE = "application/json"
+COMPACT_MEDIA_TYPE = "application/vnd.mockpanel.blend+json"
+
+BLEND_FORMAT_JSON = "json"
+BLEND_FORMAT_COMPACT = "compact"
+
+# Weight column encodings: uint8 is quantized to 1/255 steps, float16 keeps ~3 significant digits
+WEIGHT_DTYPES = {
+    "uint8": np.uint8,
+    "float16": np.float16,
+}
+DEFAULT_WEIGHT_DTYPE = "uint8"
+
+
+def negotiate_blend_format(accept_mimetypes):
+    """
+    Pick the blendData format from a werkzeug Accept header.
+    Plain JSON stays the default for older clients.
+    """
+    best = accept_mimetypes.best_match([JSON_MEDIA_TYPE, COMPACT_MEDIA_TYPE], default=JSON_MEDIA_TYPE)
+    if best == COMPACT_MEDIA_TYPE and accept_mimetypes[COMPACT_MEDIA_TYPE] > 0:
+        return BLEND_FORMAT_COMPACT
+    return BLEND_FORMAT_JSON
+
+
+def _b64(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).astype(array.dtype.newbyteorder("<")).tobytes()).decode("ascii")
+
+
+def _encode_weights(weights: np.ndarray, dtype: str) -> np.ndarray:
+    if dtype not in WEIGHT_DTYPES:
+        raise ValueError(f"Unsupported weight dtype: {dtype}")
+    if dtype == "uint8":
+        return np.rint(np.clip(weights, 0.0, 1.0) * 255).astype(np.uint8)
+    return weights.astype(np.float16)
+
+
+def encode_phoneme_blend(phonemes, duration: numbers.Number, dtype=DEFAULT_WEIGHT_DTYPE, times=None):
+    """
+    Struct-of-arrays equivalent of getphenome.build_blend_data.
+    times are float32 seconds, phonemeIds index into the `phonemes` dictionary
+    and weights hold one column per blendshape, each base64 encoded little-endian.
+    """
+    count = len(phonemes)
+    dictionary = list(dict.fromkeys(phonemes))
+    lookup = {ph: i for i, ph in enumerate(dictionary)}
+
+    if times is None:
+        step = duration / count if count else 0.0
+        times = np.arange(count) * step
+    times = np.round(np.asarray(times, dtype=np.float64), 2).astype(np.float32)
+    ids = np.fromiter((lookup[ph] for ph in phonemes), dtype=np.uint8 if len(dictionary) <= 256 else np.uint16, count=count)
+    weights = _encode_weights(PHENOME_MATRIX[phoneme_ids(phonemes)], dtype)
+
+    return {
+        "encoding": "soa-v1",
+        "count": count,
+        "dtype": dtype,
+        "blendshapes": BLENDSHAPE_NAMES,
+        "phonemes": dictionary,
+        "phonemeIdType": ids.dtype.name,
+        "times": _b64(times),
+        "phonemeIds": _b64(ids),
+        "weights": {name: _b64(weights[:, i]) for i, name in enumerate(BLENDSHAPE_NAMES)},
+    }
+
+
+def encode_blend_timeline(frames: np.ndarray, fps: int, dtype=DEFAULT_WEIGHT_DTYPE):
+    """
+    Compact form of a getphenome.build_blend_timeline array: one column per blendshape.
+    """
+    weights = _encode_weights(frames, dtype)
+    return {
+        "encoding": "frames-v1",
+        "count": int(frames.shape[0]),
+        "fps": fps,
+        "dtype": dtype,
+        "blendshapes": BLENDSHAPE_NAMES,
+        "weights": {name: _b64(weights[:, i]) for i, name in enumerate(BLENDSHAPE_NAMES)},
+    }
+
+
+def _unb64(data: str, dtype) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.dtype(dtype).newbyteorder("<"))
+
+
+def decode_weights(payload):
+    """Decode the weight columns of a compact payload into a float32 (count, blendshapes) array."""
+    dtype = payload["dtype"]
+    columns = [_unb64(payload["weights"][name], WEIGHT_DTYPES[dtype]) for name in payload["blendshapes"]]
+    weights = np.stack(columns, axis=1).astype(np.float32) if columns else np.zeros((payload["count"], 0), np.float32)
+    if dtype == "uint8":
+        weights /= 255.0
+    return weights
+
+
+def decode_phoneme_blend(payload):
+    """
+    Reference decoder for "soa-v1" payloads, returning the list-of-dicts blendData.
+    """
+    times = _unb64(payload["times"], np.float32)
+    ids = _unb64(payload["phonemeIds"], payload["phonemeIdType"])
+    weights = decode_weights(payload)
+    names = payload["blendshapes"]
+    dictionary = payload["phonemes"]
+    return [
+        {"time": round(float(times[i]), 2), "phoneme": dictionary[ids[i]],
+         **{name: round(float(weights[i, j]), 3) for j, name in enumerate(names)}}
+        for i in range(payload["count"])
+    ]
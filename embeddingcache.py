@@ -0,0 +1,137 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))  # in-process LRU, in vectors (~2 KB each)
+EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL", "redis://localhost:6379/0")  # "" to disable
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 60 * 60)))
+
+
+def embedding_cache_key(model: str, dimension: int, text: str) -> str:
+    """Content address of one embedding."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{dimension}:{digest}"
+
+
+def _encode(vector):
+    return np.asarray(vector, dtype="<f2").tobytes()
+
+
+def _decode(data):
+    return np.frombuffer(data, dtype="<f2").astype(np.float32).tolist()
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by (model, dimension, text hash), stored as float16
+    bytes: an in-process LRU in front of a Redis tier shared by all workers
+    (with a TTL). Vectors are returned as lists of floats, rounded through
+    float16 on a miss too, so a text always gets the same vector. Only for
+    texts that recur (interview topics); one-off texts such as a candidate's
+    answer would just fill Redis for the length of the TTL.
+    """
+
+    def __init__(self, max_entries=EMBEDDING_CACHE_SIZE, redis_url=EMBEDDING_CACHE_REDIS_URL,
+                 redis_ttl=EMBEDDING_CACHE_TTL):
+        self.max_entries = max_entries
+        self.redis_ttl = redis_ttl
+        self.redis = redis.Redis.from_url(redis_url) if redis_url else None
+
+        self._lock = Lock()
+        self._entries = OrderedDict()  # key -> float16 bytes, oldest first
+
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.api_seconds = 0.0  # time spent in the embeddings API on misses
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, model, dimension, text):
+        """The cached vector or None."""
+        key = embedding_cache_key(model, dimension, text)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return _decode(data)
+
+        if self.redis is not None:
+            try:
+                data = self.redis.get(f"embedding:{key}")
+            except redis.RedisError as e:
+                print(f"⚠️ Embedding cache Redis error: {e}")
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.redis_hits += 1
+                return _decode(data)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, model, dimension, text, vector):
+        """Store a vector; returns it as later hits will see it (float16-rounded)."""
+        key = embedding_cache_key(model, dimension, text)
+        data = _encode(vector)
+        self._remember(key, data)
+        if self.redis is not None:
+            try:
+                self.redis.set(f"embedding:{key}", data, ex=self.redis_ttl)
+            except redis.RedisError as e:
+                print(f"⚠️ Embedding cache Redis error: {e}")
+        return _decode(data)
+
+    def get_or_embed(self, model, dimension, text, embed):
+        """
+        The vector for `text`, calling embed() (the embeddings API, returning
+        a `dimension`-long vector or None on failure) only on a miss.
+        """
+        vector = self.get(model, dimension, text)
+        if vector is not None:
+            return vector
+        start = time.perf_counter()
+        vector = embed()
+        with self._lock:
+            self.api_seconds += time.perf_counter() - start
+        if vector is None:
+            return None  # failures are not cached
+        return self.put(model, dimension, text, vector)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.redis_hits
+            lookups = hits + self.misses
+            avg_api_seconds = self.api_seconds / self.misses if self.misses else 0.0
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "api_calls": self.misses,
+                "api_calls_avoided": hits,
+                "avg_api_ms": round(avg_api_seconds * 1000, 1),
+                "est_api_seconds_saved": round(hits * avg_api_seconds, 2),
+                "entries": len(self._entries),
+                "bytes": sum(len(data) for data in self._entries.values()),
+            }
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,110 @@
+import os
+import queue
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from dotenv import load_dotenv
+from phonemizer.backend import EspeakBackend
+from phonemizer.separator import default_separator
+
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("ESPEAK_POOL_SIZE", str(os.cpu_count() or 4)))
+ACQUIRE_TIMEOUT = float(os.getenv("ESPEAK_ACQUIRE_TIMEOUT", "10"))
+
+
+class EspeakPool:
+    """
+    Bounded pool of long-lived EspeakBackend instances.
+    Backends are created lazily up to `size`; callers beyond that wait on
+    the queue for up to `timeout` seconds before a TimeoutError is raised.
+    """
+
+    def __init__(self, language="en-us", size=POOL_SIZE, timeout=ACQUIRE_TIMEOUT,
+                 preserve_punctuation=True, with_stress=False):
+        self.language = language
+        self.size = size
+        self.timeout = timeout
+        self.preserve_punctuation = preserve_punctuation
+        self.with_stress = with_stress
+
+        self._idle = queue.Queue(maxsize=size)
+        self._lock = Lock()
+        self.created = 0
+        self.in_use = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def _new_backend(self):
+        return EspeakBackend(
+            self.language,
+            preserve_punctuation=self.preserve_punctuation,
+            with_stress=self.with_stress,
+        )
+
+    @contextmanager
+    def acquire(self):
+        backend = None
+        try:
+            backend = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self.created < self.size
+                if can_create:
+                    self.created += 1
+            if can_create:
+                try:
+                    backend = self._new_backend()
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+            else:
+                start = time.perf_counter()
+                with self._lock:
+                    self.waits += 1
+                try:
+                    backend = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self.timeouts += 1
+                    raise TimeoutError(f"No espeak backend available after {self.timeout}s")
+                finally:
+                    with self._lock:
+                        self.wait_seconds += time.perf_counter() - start
+
+        with self._lock:
+            self.in_use += 1
+        try:
+            yield backend
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._idle.put(backend)
+
+    def phonemize(self, texts, strip=True):
+        """
+        Phonemize a list of texts with a pooled backend.
+        Returns one IPA string per text, in the same order.
+        """
+        # The backend works line by line, so keep each text on a single line
+        lines = [" ".join(text.splitlines()) for text in texts]
+        with self.acquire() as backend:
+            return backend.phonemize(lines, separator=default_separator, strip=strip)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self.created,
+                "in_use": self.in_use,
+                "idle": self._idle.qsize(),
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_seconds / self.waits * 1000, 4) if self.waits else 0.0,
+            }
+
+
+espeak_pool = EspeakPool()
@@ -4,11 +4,14 @@ import openai
 from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
 
+from embeddingcache import embedding_cache
+
 # ---------------- Load Environment Variables ---------------- #
 load_dotenv()
 
 # Embedding model selection — ensure 1024-dim embeddings
 EMBEDDING_MODEL = "text-embedding-3-small"  # 1024 dimensions
+EMBEDDING_DIMENSION = 1024
 
 # ---------------- Initialize Pinecone ---------------- #
 pc = Pinecone(api_key=os.getenv("PINECONE_API"))
@@ -26,6 +29,30 @@ if INDEX_NAME not in [idx["name"] for idx in pc.list_indexes()]:
 index = pc.Index(INDEX_NAME)
 
 
+def _request_embedding(text, use_cache=False):
+    """
+    One embeddings API call; the vector is normalized to EMBEDDING_DIMENSION
+    (truncate or pad). With use_cache, the embedding cache is checked first
+    and the result stored in it. API errors are raised to the caller.
+    """
+    if use_cache:
+        return embedding_cache.get_or_embed(EMBEDDING_MODEL, EMBEDDING_DIMENSION, text,
+                                            lambda: _request_embedding(text))
+    emb_response = openai.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    vector = emb_response.data[0].embedding
+
+    # Normalize embedding to 1024 dims (truncate or pad) if provider returns different size
+    expected_dim = EMBEDDING_DIMENSION
+    if len(vector) != expected_dim:
+        print(f"⚠️ Embedding length {len(vector)} != {expected_dim}. Normalizing (truncate/pad).")
+        # Truncate if longer, pad with zeros if shorter
+        if len(vector) > expected_dim:
+            vector = vector[:expected_dim]
+        else:
+            vector = vector + [0.0] * (expected_dim - len(vector))
+    return vector
+
+
 # ---------------- EvaluationAgent ---------------- #
 class EvaluationAgent:
     def __init__(self, role="Java Spring Boot Developer", experience_level="3 years"):
@@ -35,6 +62,25 @@ class EvaluationAgent:
         self.current_topic = None
         self.questions_under_topic = []
 
+    # ---------------- Shared Session State ---------------- #
+    def to_state(self):
+        return {
+            "role": self.role,
+            "experience_level": self.experience_level,
+            "topics": self.topics,
+            "current_topic": self.current_topic,
+            "questions_under_topic": self.questions_under_topic,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild an agent saved by another worker (see to_state)."""
+        agent = cls(role=state["role"], experience_level=state["experience_level"])
+        agent.topics = state["topics"]
+        agent.current_topic = state["current_topic"]
+        agent.questions_under_topic = state["questions_under_topic"]
+        return agent
+
     # ---------------- Add Q&A ---------------- #
     def add_question_answer(self, question: str, answer: str, topic: str, user_id: str):
         if not question.strip() or not answer.strip():
@@ -56,18 +102,8 @@ class EvaluationAgent:
     def _save_qna_embedding(self, user_id: str, topic: str, question: str, answer: str):
         try:
             text = f"Topic: {topic}\nQuestion: {question}\nAnswer: {answer}"
-            emb_response = openai.embeddings.create(model=EMBEDDING_MODEL, input=text)
-            vector = emb_response.data[0].embedding
-
-            # Normalize embedding to 1024 dims (truncate or pad) if provider returns different size
-            expected_dim = 1024
-            if len(vector) != expected_dim:
-                print(f"⚠️ Embedding length {len(vector)} != {expected_dim}. Normalizing (truncate/pad).")
-                # Truncate if longer, pad with zeros if shorter
-                if len(vector) > expected_dim:
-                    vector = vector[:expected_dim]
-                else:
-                    vector = vector + [0.0] * (expected_dim - len(vector))
+            # one candidate's answer: never reused, so not worth a cache entry
+            vector = _request_embedding(text)
 
             vector_id = f"{user_id}-{topic}-{abs(hash(question))}"
             index.upsert(
@@ -162,16 +198,7 @@ class EvaluationAgent:
                 f"Stage: {feedback.get('next_stage')}"
             )
 
-            embedding_response = openai.embeddings.create(model=EMBEDDING_MODEL, input=summary_text)
-            vector = embedding_response.data[0].embedding
-
-            expected_dim = 1024
-            if len(vector) != expected_dim:
-                print(f"⚠️ Embedding length {len(vector)} != {expected_dim}. Normalizing (truncate/pad).")
-                if len(vector) > expected_dim:
-                    vector = vector[:expected_dim]
-                else:
-                    vector = vector + [0.0] * (expected_dim - len(vector))
+            vector = _request_embedding(summary_text)
 
             vector_id = f"{user_id}-{topic}-summary"
             index.upsert(
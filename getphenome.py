@@ -2,9 +2,11 @@ import numbers
 import os
 import json
 import time
+import numpy as np
 from flask import Flask, request, jsonify
-from phonemizer import phonemize
 import re
+from phonemecache import phoneme_cache
+from espeakpool import espeak_pool
 
 
 app = Flask(__name__)
@@ -57,57 +59,73 @@ phenome_map = {
 
 import json
 
-def generate_phonemes(text: str, duration: numbers.Number):
-    """
-    Convert text into individual IPA phonemes and generate blendData.
-    Ensures total duration does not exceed the specified duration.
-    """
-    # 1️⃣ phonemize text
-    ipa_str = phonemize(
-        text,
-        language='en-us',
-        backend='espeak',
-        strip=True,
-        preserve_punctuation=True,
-        with_stress=False
-    )
+# Multi-char phonemes first so the tokenizer always takes the longest match
+MULTI_CHAR_PHONEMES = [
+    "tʃ", "dʒ", "aɪ", "oʊ", "eɪ", "ɔː", "ɜː", "ʊə", "əʊ", "ɪə",
+    "ɑː", "æ", "ɛ", "ɪ", "iː", "ɒ", "ʌ", "ʊ", "uː", "ɔɪ", "aʊ",
+    "p", "b", "t", "d", "k", "g", "f", "v", "θ", "ð", "s", "z",
+    "ʃ", "ʒ", "h", "m", "n", "ŋ", "l", "r", "j", "w"
+]
 
-    # 2️⃣ remove punctuation
-    ipa_str = re.sub(r'[.,!?;:]', '', ipa_str)
+# Compiled once at import: longest-match alternation, falling back to a single character
+PHONEME_PATTERN = re.compile(
+    "|".join(re.escape(m) for m in sorted(MULTI_CHAR_PHONEMES, key=len, reverse=True)) + "|."
+)
+# Punctuation, and the stress marks espeak emits with with_stress (they are not phonemes of their own)
+PUNCTUATION_PATTERN = re.compile(r'[.,!?;:ˈˌ]')
 
-    # 3️⃣ split words
-    words = ipa_str.split()
+# phenome_map as a matrix: one row per phoneme, plus a trailing neutral row for unmapped phonemes
+BLENDSHAPE_NAMES = ["jawOpen", "mouthFunnel", "mouthPucker", "tongue_out", "tongue_up"]
+PHONEME_INDEX = {ph: i for i, ph in enumerate(phenome_map)}
+NEUTRAL_INDEX = len(phenome_map)
+PHENOME_MATRIX = np.array(
+    [[params[name] for name in BLENDSHAPE_NAMES] for params in phenome_map.values()]
+    + [[0.0] * len(BLENDSHAPE_NAMES)],
+    dtype=np.float32,
+)
 
-    # 4️⃣ multi-char phoneme list
-    multi_char_phonemes = [
-        "tʃ", "dʒ", "aɪ", "oʊ", "eɪ", "ɔː", "ɜː", "ʊə", "əʊ", "ɪə",
-        "ɑː", "æ", "ɛ", "ɪ", "iː", "ɒ", "ʌ", "ʊ", "uː", "ɔɪ", "aʊ",
-        "p", "b", "t", "d", "k", "g", "f", "v", "θ", "ð", "s", "z",
-        "ʃ", "ʒ", "h", "m", "n", "ŋ", "l", "r", "j", "w"
-    ]
+DEFAULT_FPS = 30
+DEFAULT_COARTICULATION_SECONDS = 0.1
+
+PHONEMIZE_OPTIONS = {
+    "language": "en-us",
+    "backend": "espeak",
+    "strip": True,
+    "preserve_punctuation": True,
+    "with_stress": False,
+}
 
-    # 5️⃣ split into individual phonemes
+
+def tokenize_ipa(ipa_str: str):
+    """
+    Split an IPA string into individual phonemes using the precompiled pattern.
+    """
+    ipa_str = PUNCTUATION_PATTERN.sub('', ipa_str)
     phonemes = []
-    for word in words:
-        i = 0
-        while i < len(word):
-            matched = False
-            for m in sorted(multi_char_phonemes, key=len, reverse=True):  # match longest first
-                if word[i:i + len(m)] == m:
-                    phonemes.append(m)
-                    i += len(m)
-                    matched = True
-                    break
-            if not matched:
-                phonemes.append(word[i])
-                i += 1
-
-    # 6️⃣ calculate step to fit total duration
+    for word in ipa_str.split():
+        phonemes.extend(PHONEME_PATTERN.findall(word))
+    return phonemes
+
+
+def build_blend_data(phonemes, duration: numbers.Number, times=None):
+    """
+    Spread phonemes evenly over duration and attach facial params to each one.
+    When `times` is given (e.g. from audioalign), those start times are used instead.
+    """
     if len(phonemes) == 0:
         return []
+
+    if times is not None:
+        blend_data = []
+        for ph, start in zip(phonemes, times):
+            datum = {"time": round(float(start), 2), "phoneme": ph}
+            datum.update(phenome_map.get(ph, {}))
+            blend_data.append(datum)
+        return blend_data
+
+    # calculate step to fit total duration
     step = duration / len(phonemes)
 
-    # 7️⃣ generate blendData
     blend_data = []
     current_time = 0.0
 
@@ -125,16 +143,192 @@ def generate_phonemes(text: str, duration: numbers.Number):
     return blend_data
 
 
+def get_phonemes(text: str):
+    """
+    Return the phoneme list for text, using the phoneme cache before the espeak pool.
+    """
+    language = PHONEMIZE_OPTIONS["language"]
+    cached = phoneme_cache.get(text, language)
+    if cached is not None:
+        return cached[1]
+
+    ipa_str = espeak_pool.phonemize([text])[0]
+    phonemes = tokenize_ipa(ipa_str)
+    phoneme_cache.put(text, language, ipa_str, phonemes)
+    return phonemes
+
+
+def generate_phonemes(text: str, duration: numbers.Number):
+    """
+    Convert text into individual IPA phonemes and generate blendData.
+    Ensures total duration does not exceed the specified duration.
+    """
+    # 1️⃣ phonemize text and split into individual phonemes (cached)
+    phonemes = get_phonemes(text)
+
+    # 2️⃣ generate blendData
+    return build_blend_data(phonemes, duration)
+
+
+def generate_phonemes_batch(texts, durations):
+    """
+    Generate blendData for many texts with a single espeak call.
+    Cached texts are skipped; only the misses are sent to espeak.
+    Returns one blendData list per text, in the same order.
+    """
+    texts = list(texts)
+    durations = list(durations)
+    if len(texts) != len(durations):
+        raise ValueError("texts and durations must have the same length")
+    if not texts:
+        return []
+
+    language = PHONEMIZE_OPTIONS["language"]
+    phoneme_lists = [None] * len(texts)
+    missing = []
+    for i, text in enumerate(texts):
+        cached = phoneme_cache.get(text, language)
+        if cached is not None:
+            phoneme_lists[i] = cached[1]
+        else:
+            missing.append(i)
+
+    if missing:
+        ipa_strs = espeak_pool.phonemize([texts[i] for i in missing])
+        for i, ipa_str in zip(missing, ipa_strs):
+            phoneme_lists[i] = tokenize_ipa(ipa_str)
+            phoneme_cache.put(texts[i], language, ipa_str, phoneme_lists[i])
+
+    return [
+        build_blend_data(phonemes, duration)
+        for phonemes, duration in zip(phoneme_lists, durations)
+    ]
+
+
+def phoneme_ids(phonemes):
+    """Map phonemes to PHENOME_MATRIX rows; unmapped phonemes use the neutral row."""
+    return np.fromiter(
+        (PHONEME_INDEX.get(ph, NEUTRAL_INDEX) for ph in phonemes),
+        dtype=np.intp,
+        count=len(phonemes),
+    )
+
+
+def _aligned_keyframes(phonemes, duration, times):
+    """
+    Keyframes for phonemes with explicit start times. Gaps much longer than a
+    typical phoneme are pauses, so the neutral pose is held across them.
+    """
+    starts = np.asarray(times, dtype=np.float64)
+    gaps = np.diff(np.append(starts, duration))
+    typical = np.median(gaps)
+    slots = np.minimum(gaps, typical)
+    paused = gaps > 2 * typical
+
+    rest_times = np.concatenate(((starts + slots)[paused], starts[1:][paused[:-1]]))
+    key_times = np.concatenate(([0.0], starts + slots / 2, rest_times, [duration]))
+    key_ids = np.concatenate((
+        [NEUTRAL_INDEX], phoneme_ids(phonemes),
+        np.full(len(rest_times), NEUTRAL_INDEX, dtype=np.intp), [NEUTRAL_INDEX],
+    ))
+    order = np.argsort(key_times, kind="stable")
+    return key_times[order], key_ids[order]
+
+
+def build_blend_timeline(phonemes, duration: numbers.Number, fps=DEFAULT_FPS,
+                         coarticulation_seconds=DEFAULT_COARTICULATION_SECONDS, times=None):
+    """
+    Sample blendshape weights at a fixed frame rate.
+    Each phoneme is keyed at the centre of its evenly spaced slot (or of its
+    aligned slot when `times` is given), with the neutral pose at 0 and
+    `duration`; frames are linearly interpolated between keys and then smoothed
+    with a Hann window of `coarticulation_seconds` so neighbouring phonemes
+    blend into each other.
+    Returns a float32 array of shape (frames, len(BLENDSHAPE_NAMES)).
+    """
+    n_frames = int(np.ceil(duration * fps)) + 1
+    if n_frames <= 1 or len(phonemes) == 0:
+        return np.zeros((max(n_frames, 0), len(BLENDSHAPE_NAMES)), dtype=np.float32)
+
+    # keyframes: neutral, one per phoneme, neutral
+    if times is not None:
+        key_times, key_ids = _aligned_keyframes(phonemes, duration, times)
+    else:
+        step = duration / len(phonemes)
+        key_times = np.concatenate(([0.0], (np.arange(len(phonemes)) + 0.5) * step, [duration]))
+        key_ids = np.concatenate(([NEUTRAL_INDEX], phoneme_ids(phonemes), [NEUTRAL_INDEX]))
+    keys = PHENOME_MATRIX[key_ids]
+
+    # linear interpolation for every frame and blendshape at once
+    frame_times = np.minimum(np.arange(n_frames, dtype=np.float64) / fps, duration)
+    right = np.clip(np.searchsorted(key_times, frame_times, side="right"), 1, len(key_times) - 1)
+    left = right - 1
+    span = key_times[right] - key_times[left]
+    frac = np.divide(frame_times - key_times[left], span, out=np.zeros_like(frame_times), where=span > 0)
+    frac = frac.astype(np.float32)[:, None]
+    frames = keys[left] * (1.0 - frac) + keys[right] * frac
+
+    # coarticulation: Hann-window smoothing along time, one shifted add per tap
+    taps = int(round(coarticulation_seconds * fps)) | 1
+    if taps > 1:
+        window = np.hanning(taps + 2)[1:-1].astype(np.float32)
+        window /= window.sum()
+        half = taps // 2
+        padded = np.pad(frames, ((half, half), (0, 0)), mode="edge")
+        smoothed = np.zeros_like(frames)
+        for k, weight in enumerate(window):
+            smoothed += weight * padded[k:k + n_frames]
+        frames = smoothed
+
+    return frames.astype(np.float32, copy=False)
+
+
+def generate_blend_timeline(text: str, duration: numbers.Number, fps=DEFAULT_FPS,
+                            coarticulation_seconds=DEFAULT_COARTICULATION_SECONDS):
+    """
+    Frame-rate alternative to generate_phonemes: returns a dense float32
+    (frames, blendshapes) array instead of one dict per phoneme.
+    """
+    return build_blend_timeline(get_phonemes(text), duration, fps, coarticulation_seconds)
+
+
 @app.route("/phonemes", methods=["POST"])
 def phonemes():
     data = request.json
     text = data.get("text", "")
-    result, elapsed = generate_phonemes(text)
+    duration = data.get("duration")
+    if not text or duration is None:
+        return jsonify({"error": "text and duration are required"}), 400
+
+    fps = data.get("fps")
+    start = time.time()
+    if fps:
+        frames = generate_blend_timeline(text, float(duration), fps=int(fps))
+        elapsed = time.time() - start
+        return jsonify({
+            "fps": int(fps),
+            "blendshapes": BLENDSHAPE_NAMES,
+            "frames": frames.round(3).tolist(),
+            "time_taken_seconds": round(elapsed, 2)
+        })
+
+    result = generate_phonemes(text, float(duration))
+    elapsed = time.time() - start
     return jsonify({
         "phonemes": result,
         "time_taken_seconds": round(elapsed, 2)
     })
 
 
+@app.route("/phonemes/cache-stats", methods=["GET"])
+def phoneme_cache_stats():
+    return jsonify(phoneme_cache.stats())
+
+
+@app.route("/phonemes/pool-stats", methods=["GET"])
+def espeak_pool_stats():
+    return jsonify(espeak_pool.stats())
+
+
 if __name__ == "__main__":
     app.run(port=3002, debug=True)
@@ -1,52 +1,381 @@
 import asyncio
+import json
+import os
 import threading
 import websockets
-from flask import Flask, request, jsonify
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from flask import Flask, Response, request, jsonify, stream_with_context
 from llmconnection import process_message
-from speechtotext import send_to_assemblyai, run, send_msg_to_llm
+from questionagent import speculation_summary
+from speechtotext import auto_endpoint, push_question, send_msg_to_llm, send_msg_to_llm_stream
+from sttsession import DEFAULT_SESSION_ID, async_session_manager, find_session, session_manager
 from flask_cors import CORS
+from sessionstate import FIELD_STOPPED, session_state
+from embeddingcache import embedding_cache
+from blendcodec import BLEND_FORMAT_COMPACT, BLEND_FORMAT_JSON, negotiate_blend_format
+from audiotransport import NDJSON_MEDIA_TYPE, negotiate_transport, wants_stream
+from audiobuffer import CoalescingAudioBuffer
+from audioingest import ingest_from_query
+from vad import VAD_AUTO_ENDPOINT, VAD_ENABLED, VoiceActivityDetector
 import subprocess
 import time
 
+# "async": STT sessions run on this event loop; "thread": one websocket-client thread per session
+STT_BRIDGE = os.getenv("STT_BRIDGE", "async")
+FINAL_TURN_WAIT_SECONDS = 2.0  # how long an end-of-answer waits for AssemblyAI's final transcript
+
+# userId -> VoiceActivityDetector of its open connection (for /vad/stats)
+vad_detectors = {}
+# userId -> the CoalescingAudioBuffer feeding its STT session (latest open connection)
+audio_buffers = {}
+# userId -> AudioIngest decoding/resampling its browser audio (latest open connection)
+audio_ingests = {}
+
+# Seconds from the end of an answer until the next question is on its way, by delivery mode:
+#   push / http                 - measured from the server-detected end of answer (VAD_AUTO_ENDPOINT);
+#                                 http includes the client's EndOfAnswer -> /send-msg round trip
+#   push_request / http_request - measured from the client's NextQuestion message / /send-msg request
+turn_latencies = {mode: deque(maxlen=1000) for mode in ("push", "http", "push_request", "http_request")}
+end_of_answer_at = {}  # userId -> when the server detected the end of the answer (HTTP mode, open connections)
+
 # ------------------- WebSocket Handler -------------------
+def _connection_query(websocket):
+    return parse_qs(urlparse(websocket.request.path).query)
+
+
+def _session_user_id(websocket):
+    """userId from ws://host:8001/?userId=..., else the shared default session."""
+    return _connection_query(websocket).get("userId", [DEFAULT_SESSION_ID])[0]
+
+
+def _parse_message(message):
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _bind_message(message):
+    """A text message {"userId": ...} (without a "type") binds the connection to that user."""
+    data = _parse_message(message)
+    if data and "userId" in data and "type" not in data:
+        return data["userId"]
+    return None
+
+
+def _push_options(options):
+    """Push settings from the connection query (?push=1&blendFormat=compact&stream=1) or a NextQuestion message."""
+    def first(key):
+        value = options.get(key)
+        return value[0] if isinstance(value, list) else value
+    blend_format = BLEND_FORMAT_COMPACT if first("blendFormat") == BLEND_FORMAT_COMPACT else BLEND_FORMAT_JSON
+    return {"blend_format": blend_format, "stream": str(first("stream")).lower() in ("1", "true")}
+
+
+async def _open_session(user_id):
+    if STT_BRIDGE == "async":
+        try:
+            return await async_session_manager.get_or_create(user_id)
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            print(f"⚠️ Could not connect STT session for {user_id}: {e}")
+            return None
+    return session_manager.get_or_create(user_id)
+
+
+async def _forward(session, message, is_binary):
+    if STT_BRIDGE == "async":
+        return await session.send(message, is_binary=is_binary)
+    return session.send(message, is_binary=is_binary)
+
+
+async def _close_session(user_id):
+    if STT_BRIDGE == "async":
+        await async_session_manager.close(user_id)
+    else:
+        await asyncio.to_thread(session_manager.close, user_id)
+
+
+def _release(registry, user_id, value):
+    """Drop a connection's entry, unless a newer connection for the user has replaced it."""
+    if value is not None and registry.get(user_id) is value:
+        del registry[user_id]
+
+
+async def _open_buffer(session, user_id, previous=None):
+    """Start the upstream buffer for session, after draining the one it replaces."""
+    if previous is not None:
+        if previous.target is session:
+            return previous
+        await previous.close()
+        for previous_user_id in [u for u, registered in audio_buffers.items() if registered is previous]:
+            del audio_buffers[previous_user_id]
+    if session is None:
+        return None
+
+    async def send(data, is_binary):
+        return await _forward(session, data, is_binary)
+
+    buffer = CoalescingAudioBuffer(send, target=session).start()
+    audio_buffers[user_id] = buffer
+    return buffer
+
+
+async def _push_question(websocket, user_id, blend_format=BLEND_FORMAT_JSON, stream=False,
+                         started=None, mode="push_request"):
+    """
+    Generate the next question off the loop and send it down the session
+    websocket: a JSON "Question" message, then its MP3 as one binary message
+    (one pair per sentence when stream is set).
+    """
+    started = started or time.monotonic()
+    parts = push_question(user_id, blend_format, stream)
+    # The generator is only ever touched from this one thread, so closing it waits for a next() that is
+    # still running (e.g. when the task is cancelled) instead of failing with "generator already executing"
+    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="push-question")
+    loop = asyncio.get_running_loop()
+    first = True
+    try:
+        while True:
+            part = await loop.run_in_executor(worker, next, parts, None)
+            if part is None:
+                break
+            metadata, audio = part
+            await websocket.send(json.dumps({"type": "Question", **metadata, "audioBytes": len(audio)}))
+            await websocket.send(audio)
+            if first:
+                turn_latencies[mode].append(time.monotonic() - started)
+                first = False
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    except Exception as e:
+        print(f"⚠️ Could not push question ({user_id}): {e}")
+        try:
+            await websocket.send(json.dumps({"type": "QuestionError", "error": str(e)}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+    finally:
+        worker.submit(parts.close)
+        worker.shutdown(wait=False)
+
+
+async def _end_of_answer(websocket, session, buffer, user_id, push=None):
+    """
+    Flush the turn upstream, then start the next question without waiting for
+    /send-msg: pushed over the websocket if the client asked for push mode,
+    otherwise prepared in the background for its /send-msg to collect.
+    """
+    detected = time.monotonic()
+    turns = session.final_turns
+    await buffer.put_control(json.dumps({"type": "ForceEndpoint"}))
+    deadline = time.monotonic() + FINAL_TURN_WAIT_SECONDS
+    while session.final_turns == turns and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if push is not None:
+        await _push_question(websocket, user_id, started=detected, mode="push", **push)
+        return
+    await asyncio.to_thread(auto_endpoint, user_id)
+    end_of_answer_at[user_id] = detected
+    try:
+        await websocket.send(json.dumps({"type": "EndOfAnswer", "userId": user_id}))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
 async def handler(websocket):
-    print("🔗 Client connected")
-    global stopmsgtollm
+    user_id = _session_user_id(websocket)
+    print(f"🔗 Client connected ({user_id})")
+    query = _connection_query(websocket)
+    # Audio format from ?encoding=pcm_s16le|pcm_f32le|opus&sample_rate=...&channels=...
+    try:
+        ingest = ingest_from_query(query)
+    except (ValueError, ImportError) as e:
+        print(f"⚠️ Unsupported audio format ({user_id}): {e}")
+        await websocket.close(1003, "unsupported audio format")
+        return
+    audio_ingests[user_id] = ingest
+    # ?push=1: questions arrive on this websocket instead of through /send-msg
+    push = _push_options(query) if query.get("push", ["0"])[0] == "1" else None
+    push_task = None
+    vad = None
+    # the user may have been served by another worker: pick up its stop flag once, then read it locally
+    await asyncio.to_thread(session_state.get, user_id, FIELD_STOPPED, False, True)
+    session = await _open_session(user_id)
+    buffer = await _open_buffer(session, user_id)
     try:
         async for message in websocket:
-            if not stopmsgtollm:
-                if isinstance(message, (bytes, bytearray)):
-                    send_to_assemblyai(message, is_binary=True)
+            if isinstance(message, str):
+                bound_user_id = _bind_message(message)
+                if bound_user_id:
+                    _release(audio_ingests, user_id, ingest)
+                    _release(vad_detectors, user_id, vad)
+                    user_id = bound_user_id
+                    audio_ingests[user_id] = ingest
+                    if vad is not None:
+                        vad_detectors[user_id] = vad
+                    await asyncio.to_thread(session_state.get, user_id, FIELD_STOPPED, False, True)
+                    session = await _open_session(user_id)
+                    buffer = await _open_buffer(session, user_id, buffer)
+                    continue
+                control = _parse_message(message)
+                if control and control.get("type") == "NextQuestion":
+                    if push_task is None or push_task.done():
+                        push_task = asyncio.create_task(
+                            _push_question(websocket, user_id, **_push_options(control)))
+                    continue
+            if not session_state.get(user_id, FIELD_STOPPED, False):
+                if session is None or not session.is_alive():
+                    session = await _open_session(user_id)
+                    buffer = await _open_buffer(session, user_id, buffer)
+                if session is None:
+                    continue
+                if isinstance(message, str):
+                    await buffer.put_control(message)
+                    continue
+                message = ingest.process(message)
+                session.record_audio(message)  # the whole answer, silences included
+                if VAD_ENABLED:
+                    if vad is None:
+                        vad = vad_detectors[user_id] = VoiceActivityDetector()
+                    chunks, end_of_answer = vad.process(message)
+                    for chunk in chunks:
+                        await buffer.put(chunk)
+                    if end_of_answer and VAD_AUTO_ENDPOINT and (push_task is None or push_task.done()):
+                        push_task = asyncio.create_task(_end_of_answer(websocket, session, buffer, user_id, push))
                 else:
-                    send_to_assemblyai(message)
+                    await buffer.put(message)
             else:
-                print("⚠️ Message to LLM is stopped (stopmsgtollm=True)")
+                print(f"⚠️ Message to LLM is stopped for {user_id} until /reconnect")
     except websockets.exceptions.ConnectionClosed as e:
         print("❌ Client disconnected:", e)
+    finally:
+        if push_task is not None and not push_task.done():
+            push_task.cancel()
+        # Send what is still buffered, then terminate upstream; the transcript stays available to /send-msg
+        if buffer is not None:
+            await buffer.close()
+        await _close_session(user_id)
+        _release(audio_buffers, user_id, buffer)
+        _release(audio_ingests, user_id, ingest)
+        _release(vad_detectors, user_id, vad)
+        end_of_answer_at.pop(user_id, None)  # no /send-msg will collect it over this connection
 
 
 # ------------------- Flask API -------------------
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}})
 
-stopmsgtollm = False
+def _record_http_latency(user_id, received, detected):
+    now = time.monotonic()
+    turn_latencies["http_request"].append(now - received)
+    if detected is not None:
+        turn_latencies["http"].append(now - detected)
+
+
+def _timed_stream(lines, user_id, received, detected):
+    """Record the turn latency when the first streamed chunk is ready."""
+    first = True
+    for line in lines:
+        if first:
+            _record_http_latency(user_id, received, detected)
+            first = False
+        yield line
+
 
 @app.route("/send-msg", methods=["POST"])
 def send_msg_api():
+    received = time.monotonic()
     data = request.get_json()
     user_id = data.get("userId")
 
     if not user_id:
         return jsonify({"error": "userId is required"}), 400
+    detected = end_of_answer_at.pop(user_id, None)
 
-    response = send_msg_to_llm(user_id)
+    blend_format = negotiate_blend_format(request.accept_mimetypes)
+
+    # Sentence-chunked streaming: ?stream=1 or Accept: application/x-ndjson
+    if request.args.get("stream") == "1" or wants_stream(request.accept_mimetypes):
+        try:
+            lines = send_msg_to_llm_stream(user_id, blend_format=blend_format)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return Response(
+            stream_with_context(_timed_stream(lines, user_id, received, detected)),
+            mimetype=NDJSON_MEDIA_TYPE
+        )
+
+    # Raw MP3 instead of base64-in-JSON: Accept: multipart/mixed
+    transport = negotiate_transport(request.accept_mimetypes)
+    response = send_msg_to_llm(user_id, blend_format=blend_format, transport=transport)
+    _record_http_latency(user_id, received, detected)
     return response
 
+@app.route("/turn-latency/stats", methods=["GET"])
+def turn_latency_stats():
+    def summary(samples):
+        samples = sorted(samples)
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": len(samples),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 1),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+            "p95_ms": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000, 1),
+        }
+    return jsonify({mode: summary(list(samples)) for mode, samples in turn_latencies.items()})
+
+@app.route("/transcript", methods=["GET"])
+def transcript_snapshot():
+    """Turns changed since ?since=<version>; poll with the returned version."""
+    user_id = request.args.get("userId")
+    session = find_session(user_id) if user_id else None
+    if session is None:
+        return jsonify({"error": "no STT session for userId"}), 404
+    version, turns = session.transcripts.changes_since(request.args.get("since", 0, type=int))
+    return jsonify({"version": version, "turns": turns, "answer": session.transcripts.answer_text()})
+
+@app.route("/stt/stats", methods=["GET"])
+def stt_stats():
+    manager = async_session_manager if STT_BRIDGE == "async" else session_manager
+    return jsonify(manager.stats())
+
+@app.route("/speculation/stats", methods=["GET"])
+def speculation_stats():
+    return jsonify(speculation_summary())
+
+@app.route("/embedding-cache/stats", methods=["GET"])
+def embedding_cache_stats():
+    return jsonify(embedding_cache.stats())
+
+@app.route("/vad/stats", methods=["GET"])
+def vad_stats():
+    return jsonify({user_id: vad.stats() for user_id, vad in list(vad_detectors.items())})
+
+@app.route("/audio-buffer/stats", methods=["GET"])
+def audio_buffer_stats():
+    return jsonify({user_id: buffer.stats() for user_id, buffer in list(audio_buffers.items())})
+
+@app.route("/audio-ingest/stats", methods=["GET"])
+def audio_ingest_stats():
+    return jsonify({user_id: ingest.stats() for user_id, ingest in list(audio_ingests.items())})
+
 @app.route("/reconnect", methods=["POST"])
 def reconnect():
-    global stopmsgtollm
-    stopmsgtollm = False
-    return jsonify({"success": True, "stopmsgtollm": stopmsgtollm})
+    """The candidate is answering again: resume passing their audio to the LLM."""
+    user_id = (request.get_json(silent=True) or {}).get("userId") or DEFAULT_SESSION_ID
+    session_state.save(user_id, **{FIELD_STOPPED: False})
+    return jsonify({"success": True, "stopmsgtollm": session_state.get(user_id, FIELD_STOPPED, False)})
+
+@app.route("/session/state", methods=["GET"])
+def session_state_info():
+    """Which worker last wrote the user's shared interview state (multi-worker mode)."""
+    user_id = request.args.get("userId")
+    if not user_id:
+        return jsonify(session_state.stats())
+    return jsonify(session_state.describe(user_id))
 
 
 def run_flask():
@@ -63,8 +392,8 @@ async def main():
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
 
-    stt_thread = threading.Thread(target=run, daemon=True)
-    stt_thread.start()
+    if STT_BRIDGE == "async":
+        await async_session_manager.start_pool()  # warm STT connections, if STT_POOL_SIZE > 0
 
     async with websockets.serve(handler, "localhost", 8001):
         print("✅ WebSocket server started at ws://localhost:8001")
@@ -3,8 +3,11 @@ from openai import OpenAI
 from dotenv import load_dotenv
 from langchain.chat_models import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
+from langchain.schema import messages_from_dict, messages_to_dict
 import re
 
+from sessionstate import FIELD_MEMORY, session_state
+
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("OPENAI_API_KEY")
@@ -46,10 +49,17 @@ def process_message(message: str, session_id: str) -> str:
     Each session_id keeps its own memory (conversation history).
     """
     try:
+        # Another worker may have continued this conversation: pick up its history
+        if session_id not in sessions_memory or session_state.is_stale(session_id, (FIELD_MEMORY,)):
+            history = session_state.load(session_id, (FIELD_MEMORY,)).get(FIELD_MEMORY)
+            if history:
+                sessions_memory[session_id] = ConversationBufferMemory(
+                    memory_key="history", return_messages=True
+                )
+                sessions_memory[session_id].chat_memory.messages = messages_from_dict(history)
+
         # Initialize memory for this session if not exists
         if session_id not in sessions_memory:
-            from langchain.memory import ConversationBufferMemory
-
             sessions_memory[session_id] = ConversationBufferMemory(
                 memory_key="history", return_messages=True
             )
@@ -99,6 +109,8 @@ def process_message(message: str, session_id: str) -> str:
         # Get the model’s response
         response = chain.run(message)
 
+        session_state.save(session_id, **{FIELD_MEMORY: messages_to_dict(memory.chat_memory.messages)})
+
         # Clean unwanted characters
         response = clean_response(response)
 
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+
+import websockets
+
+# Emit a partial Turn every this many bytes of audio (0.5s of 16 kHz int16)
+PARTIAL_TURN_BYTES = 16000
+
+
+class LocalSTTServer:
+    """
+    Local stand-in for the AssemblyAI v3 streaming endpoint, for offline runs.
+    It speaks the same message types (Begin / Turn / Termination) and, since
+    it cannot transcribe, reports "received <n> bytes" as the transcript so
+    callers can check that audio reached the right session.
+    """
+
+    def __init__(self, host="localhost", port=0, partial_turn_bytes=PARTIAL_TURN_BYTES, handshake_delay=0.0,
+                 begin_delay=0.0):
+        self.host = host
+        self.port = port
+        self.partial_turn_bytes = partial_turn_bytes
+        self.handshake_delay = handshake_delay  # simulated TLS + auth time before the upgrade completes
+        self.begin_delay = begin_delay  # simulated session setup time before Begin
+        self.connections = 0
+        self.active = 0
+        self.bytes_received = 0
+        self._server = None
+        self._websockets = set()
+        self._loop = None
+        self._thread = None
+        self._stopped = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/v3/ws?sample_rate=16000&format_turns=true"
+
+    async def _handler(self, websocket):
+        self.connections += 1
+        self.active += 1
+        self._websockets.add(websocket)
+        started = time.time()
+        received = 0
+        turn_order = 0
+        since_partial = 0
+
+        def turn(final):
+            return json.dumps({
+                "type": "Turn",
+                "turn_order": turn_order,
+                "turn_is_formatted": final,
+                "end_of_turn": final,
+                "transcript": f"received {received} bytes",
+                "end_of_turn_confidence": 1.0 if final else 0.0,
+                "words": [],
+            })
+
+        try:
+            if self.begin_delay:
+                await asyncio.sleep(self.begin_delay)
+            await websocket.send(json.dumps({
+                "type": "Begin",
+                "id": str(uuid.uuid4()),
+                "expires_at": int(started) + 3600,
+            }))
+            async for message in websocket:
+                if isinstance(message, (bytes, bytearray)):
+                    received += len(message)
+                    since_partial += len(message)
+                    self.bytes_received += len(message)
+                    if since_partial >= self.partial_turn_bytes:
+                        since_partial = 0
+                        await websocket.send(turn(final=False))
+                    continue
+
+                msg_type = json.loads(message).get("type")
+                if msg_type == "ForceEndpoint":
+                    await websocket.send(turn(final=True))
+                    turn_order += 1
+                    since_partial = 0
+                elif msg_type == "Terminate":
+                    if received:
+                        await websocket.send(turn(final=True))
+                    await websocket.send(json.dumps({
+                        "type": "Termination",
+                        "audio_duration_seconds": received / 32000,
+                        "session_duration_seconds": time.time() - started,
+                    }))
+                    break
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.active -= 1
+            self._websockets.discard(websocket)
+
+    async def _process_request(self, connection, request):
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        return None
+
+    async def serve(self):
+        """Start serving on the current event loop; returns once listening."""
+        self._server = await websockets.serve(self._handler, self.host, self.port,
+                                              process_request=self._process_request)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def disconnect_all(self):
+        """Drop every open connection without a Termination, like a network failure."""
+        for websocket in list(self._websockets):
+            websocket.transport.abort()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    # --- Background-thread mode, for synchronous callers ---
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.serve())
+            self._stopped = asyncio.Event()
+            ready.set()
+            self._loop.run_until_complete(self._stopped.wait())
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True, name="local-stt")
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    async def main():
+        server = await LocalSTTServer(port=8765).serve()
+        print(f"Local STT server at {server.url}")
+        await asyncio.Future()
+
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+import struct
+
+# Bitrates in kbps, indexed by [version is MPEG1][layer][bitrate_index]
+_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+_LAYERS = {3: 1, 2: 2, 1: 3}  # header bits -> layer number
+
+
+def _parse_header(data, pos):
+    """
+    Parse the 4-byte frame header at pos.
+    Returns (frame_length, samples_per_frame, sample_rate, mpeg1, mono) or None.
+    """
+    if pos + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 3
+    layer = _LAYERS.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 3
+    if version_bits == 1 or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (b2 >> 1) & 1
+    mono = (b3 >> 6) == 3
+
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples_per_frame = 1152
+        frame_length = 144 * bitrate // sample_rate + padding
+    else:
+        samples_per_frame = 576
+        frame_length = 72 * bitrate // sample_rate + padding
+    return frame_length, samples_per_frame, sample_rate, mpeg1, mono
+
+
+def _skip_id3v2(data):
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _find_first_frame(data, pos):
+    """Find the first header that is followed by another valid header."""
+    while True:
+        pos = data.find(b"\xff", pos)
+        if pos < 0:
+            return None
+        header = _parse_header(data, pos)
+        if header and header[0] > 0:
+            next_pos = pos + header[0]
+            if next_pos >= len(data) or _parse_header(data, next_pos):
+                return pos, header
+        pos += 1
+
+
+def _lame_gap(data, tag):
+    """(encoder delay, end padding) in samples from a LAME tag at `tag`, or (0, 0)."""
+    if len(data) < tag + 24 or not data[tag:tag + 4].isalpha():
+        return 0, 0
+    b0, b1, b2 = data[tag + 21], data[tag + 22], data[tag + 23]
+    return (b0 << 4) | (b1 >> 4), ((b1 & 0x0F) << 8) | b2
+
+
+def _vbr_info(data, pos, header):
+    """
+    (frame count or None, encoder delay, end padding, tag frame) from a
+    Xing/Info or VBRI header in the first frame. A Xing/Info frame carries
+    no audio; LAME writes its gapless delay and padding right after it.
+    """
+    frame_length, _, _, mpeg1, mono = header
+    if mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        fields = xing + 8
+        frame_count = None
+        if flags & 1:
+            frame_count = struct.unpack(">I", data[fields:fields + 4])[0]
+            fields += 4
+        fields += 4 if flags & 2 else 0     # byte count
+        fields += 100 if flags & 4 else 0   # seek table
+        fields += 4 if flags & 8 else 0     # quality
+        delay, padding = _lame_gap(data, fields)
+        return frame_count, delay, padding, True
+
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        return struct.unpack(">I", data[vbri + 14:vbri + 18])[0], 0, 0, True
+    return None, 0, 0, False
+
+
+def mp3_duration(data: bytes):
+    """
+    MP3 duration in seconds from frame headers, without decoding.
+    Uses the Xing/Info or VBRI frame count when the stream has one and
+    otherwise walks every frame header. With a LAME tag the encoder delay
+    and padding are subtracted, which matches a gapless decoder to the
+    sample; without one the result is approximate, up to a frame or two
+    long (the padding cannot be known). Returns None if no MPEG audio
+    frames are found, so callers can fall back to a full decode.
+    """
+    first = _find_first_frame(data, _skip_id3v2(data))
+    if first is None:
+        return None
+    pos, header = first
+    sample_rate = header[2]
+
+    frame_count, delay, padding, tag_frame = _vbr_info(data, pos, header)
+    if frame_count is not None:
+        return max(frame_count * header[1] - delay - padding, 0) / sample_rate
+    if tag_frame:
+        pos += header[0]  # the tag frame is not audio
+
+    total_samples = 0
+    end = len(data)
+    while pos < end:
+        header = _parse_header(data, pos)
+        if header is None or header[0] <= 0:
+            # lost sync (trailing tag or junk): resync on the next valid frame
+            found = _find_first_frame(data, pos + 1)
+            if found is None:
+                break
+            pos, header = found
+        if pos + header[0] > end:
+            break
+        total_samples += header[1]
+        pos += header[0]
+
+    if total_samples == 0:
+        return None
+    return max(total_samples - delay - padding, 0) / sample_rate
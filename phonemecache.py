@@ -0,0 +1,154 @@
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite tier, opened on first use ("" keeps the cache in memory only)
+CACHE_PATH = os.getenv(
+    "PHONEME_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "mockpanel", "phoneme_cache.sqlite3")
+)
+CACHE_SIZE = int(os.getenv("PHONEME_CACHE_SIZE", "2048"))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so equivalent questions share one cache entry.
+    Applies NFC and collapses whitespace; case is kept, since "API" and
+    "api" are not pronounced the same.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class PhonemeCache:
+    """
+    Two-tier cache for (ipa_str, phonemes): an in-process LRU in front of a
+    SQLite store that survives restarts. The database at `path` is opened
+    on first use, so importing the module touches no files.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = Lock()
+        self._db = None
+        self._opened = False
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+
+    def _database(self):
+        """The SQLite connection, opened on first call (with _lock held); None when disabled or unavailable."""
+        if not self._opened:
+            self._opened = True
+            if self.path:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    db = sqlite3.connect(self.path, check_same_thread=False)
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS phonemes ("
+                        " language TEXT NOT NULL,"
+                        " text TEXT NOT NULL,"
+                        " ipa TEXT NOT NULL,"
+                        " phonemes TEXT NOT NULL,"
+                        " PRIMARY KEY (language, text))"
+                    )
+                    db.commit()
+                    self._db = db
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️ Phoneme cache unavailable at {self.path}, using memory only: {e}")
+        return self._db
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, text: str, language: str):
+        """Return (ipa_str, phonemes) or None."""
+        start = time.perf_counter()
+        key = (language, normalize_text(text))
+        with self._lock:
+            try:
+                value = self._memory.get(key)
+                if value is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+
+                db = self._database()
+                if db is not None:
+                    try:
+                        row = db.execute(
+                            "SELECT ipa, phonemes FROM phonemes WHERE language = ? AND text = ?",
+                            key,
+                        ).fetchone()
+                    except sqlite3.Error as e:
+                        print(f"⚠️ Phoneme cache read error: {e}")
+                        row = None  # a miss: the caller phonemizes with espeak
+                    if row:
+                        value = (row[0], json.loads(row[1]))
+                        self._remember(key, value)
+                        self.disk_hits += 1
+                        return value
+
+                self.misses += 1
+                return None
+            finally:
+                self.lookup_seconds += time.perf_counter() - start
+
+    def put(self, text: str, language: str, ipa_str: str, phonemes):
+        key = (language, normalize_text(text))
+        value = (ipa_str, list(phonemes))
+        with self._lock:
+            self._remember(key, value)
+            db = self._database()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO phonemes (language, text, ipa, phonemes) VALUES (?, ?, ?, ?)",
+                        (key[0], key[1], ipa_str, json.dumps(value[1], ensure_ascii=False)),
+                    )
+                    db.commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Phoneme cache write error: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._database()
+            if db is not None:
+                db.execute("DELETE FROM phonemes")
+                db.commit()
+
+
+phoneme_cache = PhonemeCache()
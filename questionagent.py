@@ -1,14 +1,18 @@
 import os
 import json
+import difflib
+import re
 import openai
 import redis
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 from threading import Lock
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from pinecone import Pinecone
 
-from evaluation_agent import EvaluationAgent
+from evaluation_agent import EvaluationAgent, _request_embedding
+from sessionstate import FIELD_AGENT, FIELD_EVALUATOR, FIELD_QUESTION, session_state
 
 # ---------------- Redis Setup ---------------- #
 redis_client = redis.Redis(
@@ -27,6 +31,47 @@ app = Flask(__name__)
 agent_lock = Lock()
 agents = {}
 evaluators = {}  # user_id -> EvaluationAgent instance
+SESSION_FIELDS = (FIELD_AGENT, FIELD_EVALUATOR, FIELD_QUESTION)  # shared session state held by this module
+
+# ---------------- Prefetch Setup ---------------- #
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+PREFETCH_WAIT_SECONDS = float(os.getenv("PREFETCH_WAIT_SECONDS", "30"))
+prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+# Evaluation only has side effects (Pinecone writes), so it runs off the request path
+evaluation_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="evaluate")
+# user_id -> Future of the user's last queued evaluation: the next one is submitted when it is done, so
+# each user's evaluations run one at a time and in order
+evaluation_tails = {}
+evaluation_lock = Lock()
+prefetch_stats = {"scheduled": 0, "hits": 0, "discarded": 0, "failed": 0}
+
+# ---------------- Speculation Setup ---------------- #
+# Follow-up questions are generated from the answer while the candidate is still talking
+SPECULATIVE_QUESTIONS = os.getenv("SPECULATIVE_QUESTIONS", "0") == "1"
+SPECULATION_MATCH_RATIO = float(os.getenv("SPECULATION_MATCH_RATIO", "0.9"))  # word-level similarity to reuse
+SPECULATION_MIN_WORDS = int(os.getenv("SPECULATION_MIN_WORDS", "8"))
+speculation_stats = {"started": 0, "restarted": 0, "hits": 0, "misses": 0, "used_tokens": 0, "wasted_tokens": 0}
+
+
+def _answer_words(text):
+    # words only: a turn re-sent formatted (case, punctuation) is the same answer
+    return re.findall(r"\w+", text.lower())
+
+
+def _answer_similarity(a, b):
+    return difflib.SequenceMatcher(None, _answer_words(a), _answer_words(b), autojunk=False).ratio()
+
+
+def _count_wasted_tokens(usage):
+    speculation_stats["wasted_tokens"] += sum(usage)
+
+
+def _discard_speculation(speculation):
+    """Drop a speculation already taken out of its agent's slot."""
+    _, _, future, usage = speculation
+    if not future.cancel():
+        # already calling the LLM: count its tokens once it finishes
+        future.add_done_callback(lambda _: _count_wasted_tokens(usage))
 
 
 # ---------------- Core Class ---------------- #
@@ -45,6 +90,11 @@ class QuestionPatternAgent:
         self.current_pattern_index = 0
         self.question_count = 0
         self.topics = list(self.structure[self.current_domain].keys())
+        # Background work for this agent; every read and write of the two slots holds _slot_lock,
+        # since the request thread, the speculation thread and rehydration all touch them
+        self._slot_lock = Lock()
+        self._prefetch = None  # (state, future) for the next question
+        self._speculation = None  # (state, partial answer, future, token usage) for the follow-up
 
     def _get_current_topic(self):
         return self.topics[self.current_topic_index]
@@ -81,30 +131,14 @@ class QuestionPatternAgent:
         redis_client.rpush(redis_key, question)
 
     def _embed_text(self, text):
-        """Generate embeddings for text using OpenAI's embedding model and normalize to 1024 dimensions."""
+        """Embedding of text, normalized to 1024 dimensions; topics repeat, so it is usually cached."""
         try:
-            response = openai.embeddings.create(
-                model="text-embedding-3-small",
-                input=text
-            )
-            vector = response.data[0].embedding
-
-            # ---------------- Ensure correct dimension (1024) ---------------- #
-            expected_dim = 1024
-            if len(vector) != expected_dim:
-                print(f"⚠️ Embedding length {len(vector)} != {expected_dim}. Normalizing (truncate/pad).")
-                if len(vector) > expected_dim:
-                    vector = vector[:expected_dim]
-                else:
-                    vector = vector + [0.0] * (expected_dim - len(vector))
-
-            return vector
-
+            return _request_embedding(text, use_cache=True)
         except Exception as e:
             print(f"⚠️ Embedding generation error: {e}")
             return None
 
-    def _generate_question_from_llm(self, domain, topic, pattern_type, previous_answer=None):
+    def _generate_question_from_llm(self, domain, topic, pattern_type, previous_answer=None, usage=None):
         # ---------------- Retrieve topic summary & weak areas from Pinecone ---------------- #
         try:
             index = pc.Index("topic-summary")  # Pinecone index name
@@ -174,12 +208,174 @@ class QuestionPatternAgent:
                 temperature=0.7
             )
 
+            if usage is not None and response.usage:
+                usage.append(response.usage.total_tokens)
             question = response.choices[0].message.content.strip()
             return question
 
         except Exception as e:
             return f"⚠️ LLM Error: {str(e)}"
 
+    def _state_key(self):
+        return (self.current_domain, self.current_topic_index, self.current_pattern_index, self.question_count)
+
+    def to_state(self):
+        """Progress through the question structure, for the shared session state."""
+        return {
+            "current_domain": self.current_domain,
+            "current_topic_index": self.current_topic_index,
+            "current_pattern_index": self.current_pattern_index,
+            "question_count": self.question_count,
+        }
+
+    def restore(self, state):
+        """Continue from progress saved by another worker."""
+        self.current_domain = state["current_domain"]
+        self.current_topic_index = state["current_topic_index"]
+        self.current_pattern_index = state["current_pattern_index"]
+        self.question_count = state["question_count"]
+        if self.current_domain:
+            self.topics = list(self.structure[self.current_domain].keys())
+        # anything prepared in the background was for the old position
+        with self._slot_lock:
+            prefetch, self._prefetch = self._prefetch, None
+            speculation, self._speculation = self._speculation, None
+        if prefetch is not None:
+            prefetch[1].cancel()
+        if speculation is not None:
+            _discard_speculation(speculation)
+
+    def _generate_unique_question(self, domain, topic, pattern_type, previous_answer=None, usage=None):
+        asked_questions = self._get_asked_questions(topic)
+        attempt = 0
+
+        while attempt < 3:
+            question = self._generate_question_from_llm(domain, topic, pattern_type, previous_answer, usage)
+            if question not in asked_questions:
+                break
+            attempt += 1
+        return question
+
+    def prefetch_next_question(self, warm=None):
+        """
+        Start generating the next question in the background when it does not
+        depend on the candidate's answer (the first question of a topic).
+        `warm` is called with the question text, e.g. to pre-render its TTS.
+        """
+        if not self.current_domain or self.question_count > 0:
+            return False
+
+        domain, topic = self.current_domain, self._get_current_topic()
+        pattern_type = self._get_current_pattern()
+
+        def job():
+            question = self._generate_unique_question(domain, topic, pattern_type)
+            if warm:
+                try:
+                    warm(question)
+                except Exception as e:
+                    print(f"⚠️ Prefetch warm-up error: {e}")
+            return question
+
+        with self._slot_lock:
+            if self._prefetch is not None:
+                return False
+            self._prefetch = (self._state_key(), prefetch_executor.submit(job))
+            prefetch_stats["scheduled"] += 1
+        return True
+
+    def _take_prefetched(self):
+        """Return the prefetched question if it still matches the agent state."""
+        with self._slot_lock:
+            prefetch, self._prefetch = self._prefetch, None
+            if prefetch is None:
+                return None
+            state, future = prefetch
+            if state != self._state_key():
+                future.cancel()
+                prefetch_stats["discarded"] += 1
+                return None
+        try:
+            question = future.result(timeout=PREFETCH_WAIT_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Prefetch error: {e}")
+            with self._slot_lock:
+                prefetch_stats["failed"] += 1
+            return None
+        with self._slot_lock:
+            prefetch_stats["hits"] += 1
+        return question
+
+    def speculate_next_question(self, partial_answer, warm=None, min_words=SPECULATION_MIN_WORDS,
+                                match_ratio=SPECULATION_MATCH_RATIO):
+        """
+        Start generating the follow-up to a partial answer. A running
+        speculation is kept while the answer only grows a little, and replaced
+        when it changes materially.
+        """
+        if not self.current_domain or self.question_count == 0:
+            return False  # first question of a topic: prefetch_next_question covers it
+        if len(partial_answer.split()) < min_words:
+            return False
+
+        state = self._state_key()
+        domain, topic = self.current_domain, self._get_current_topic()
+        pattern_type = self._get_current_pattern()
+        usage = []
+
+        def job():
+            question = self._generate_unique_question(domain, topic, pattern_type, partial_answer, usage)
+            if warm:
+                try:
+                    warm(question)
+                except Exception as e:
+                    print(f"⚠️ Speculation warm-up error: {e}")
+            return question
+
+        with self._slot_lock:
+            replaced = self._speculation
+            if replaced is not None:
+                spec_state, spec_answer, _, _ = replaced
+                if spec_state == state and _answer_similarity(spec_answer, partial_answer) >= match_ratio:
+                    return False
+                speculation_stats["restarted"] += 1
+            self._speculation = (state, partial_answer, prefetch_executor.submit(job), usage)
+            speculation_stats["started"] += 1
+        if replaced is not None:
+            _discard_speculation(replaced)
+        return True
+
+    def discard_speculation(self):
+        with self._slot_lock:
+            speculation, self._speculation = self._speculation, None
+        if speculation is not None:
+            _discard_speculation(speculation)
+        return speculation is not None
+
+    def _take_speculated(self, answer):
+        """Return the speculative question if it was generated for (nearly) this answer."""
+        with self._slot_lock:
+            speculation, self._speculation = self._speculation, None
+        if speculation is None:
+            return None
+        state, spec_answer, future, usage = speculation
+        if state != self._state_key() or _answer_similarity(spec_answer, answer) < SPECULATION_MATCH_RATIO:
+            _discard_speculation(speculation)
+            with self._slot_lock:
+                speculation_stats["misses"] += 1
+            return None
+        try:
+            question = future.result(timeout=PREFETCH_WAIT_SECONDS)
+        except Exception as e:
+            print(f"⚠️ Speculation error: {e}")
+            with self._slot_lock:
+                speculation_stats["misses"] += 1
+            return None
+        with self._slot_lock:
+            speculation_stats["hits"] += 1
+            speculation_stats["used_tokens"] += sum(usage)
+        return question
+
     def get_question(self, previous_answer=None):
         """Main question generation with duplicate prevention."""
         if not self.current_domain:
@@ -189,14 +385,13 @@ class QuestionPatternAgent:
         pattern_type = self._get_current_pattern()
         use_previous_answer = previous_answer if self.question_count > 0 else None
 
-        asked_questions = self._get_asked_questions(topic)
-        attempt = 0
-
-        while attempt < 3:
-            question = self._generate_question_from_llm(domain, topic, pattern_type, use_previous_answer)
-            if question not in asked_questions:
-                break
-            attempt += 1
+        question = self._take_prefetched()
+        if question is None and use_previous_answer:
+            question = self._take_speculated(use_previous_answer)
+        else:
+            self.discard_speculation()
+        if question is None:
+            question = self._generate_unique_question(domain, topic, pattern_type, use_previous_answer)
 
         # store new question in Redis
         self._store_asked_question(topic, question)
@@ -222,9 +417,37 @@ class QuestionPatternAgent:
 #     }
 # }
 
-question_asked = None
+question_asked = {}  # user_id -> last question served, evaluated against the next answer
+
+
+def _load_session(user_id, question_structure, role, exp):
+    """
+    Make sure this worker has the user's agents, rehydrating them from the
+    shared session state when another worker served the user last.
+    Called with agent_lock held.
+    """
+    if user_id in agents and not session_state.is_stale(user_id, SESSION_FIELDS):
+        return
+    state = session_state.load(user_id, SESSION_FIELDS)
+    agent = agents.get(user_id)
+    if agent is None:
+        agent = agents[user_id] = QuestionPatternAgent(
+            question_structure,
+            developer_role=role,
+            experience_level=exp,
+            user_id=user_id
+        )
+    if FIELD_AGENT in state:
+        agent.restore(state[FIELD_AGENT])
+    if FIELD_EVALUATOR in state:
+        evaluators[user_id] = EvaluationAgent.from_state(state[FIELD_EVALUATOR])
+    if FIELD_QUESTION in state:
+        question_asked[user_id] = state[FIELD_QUESTION]
+    if state:
+        print(f"♻️ Rehydrated interview session for {user_id}")
+
+
 def get_question_endpoint(user_answer, userid):
-    global question_asked
     user_id = userid
     previous_answer = user_answer
 
@@ -237,13 +460,7 @@ def get_question_endpoint(user_answer, userid):
 
 
     with agent_lock:
-        if user_id not in agents:
-            agents[user_id] = QuestionPatternAgent(
-                question_structure,
-                developer_role=role,
-                experience_level=exp,
-                user_id=user_id
-            )
+        _load_session(user_id, question_structure, role, exp)
 
     agent = agents[user_id]
     result = agent.get_question(previous_answer)
@@ -261,14 +478,97 @@ def get_question_endpoint(user_answer, userid):
     print(evaluator , "evaluator")
 
     # Evaluate only if a previous question exists
-    if question_asked:
+    if question_asked.get(user_id):
         current_topic = result.get("topic")
-        evaluator.add_question_answer(question_asked, previous_answer, current_topic , user_id)
+        _queue_evaluation(user_id, evaluator, question_asked[user_id], previous_answer, current_topic)
 
     # update latest question
-    question_asked = result.get("question")
+    question_asked[user_id] = result.get("question")
+    session_state.save(user_id, **{FIELD_AGENT: agent.to_state(), FIELD_QUESTION: question_asked[user_id]})
 
     return result
 
+
+def _log_evaluation_error(future, user_id):
+    """Nobody waits on an evaluation, so its failure is reported here."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        print(f"⚠️ Evaluation failed for {user_id}: {error!r}")
+
+
+def _queue_evaluation(user_id, evaluator, question, answer, topic):
+    """Evaluate on evaluation_executor once the user's previous evaluation has finished."""
+    done = Future()
+    with evaluation_lock:
+        previous = evaluation_tails.get(user_id)
+        evaluation_tails[user_id] = done
+
+    def finished(future):
+        with evaluation_lock:
+            if evaluation_tails.get(user_id) is done:
+                del evaluation_tails[user_id]
+        _log_evaluation_error(future, user_id)
+        done.set_result(None)
+
+    def start(_=None):
+        try:
+            future = evaluation_executor.submit(_evaluate, evaluator, question, answer, topic, user_id)
+        except RuntimeError as e:  # executor shut down
+            future = Future()
+            future.set_exception(e)
+        future.add_done_callback(finished)
+
+    if previous is None:
+        start()
+    else:
+        previous.add_done_callback(start)
+    return done
+
+
+def _evaluate(evaluator, question, answer, topic, user_id):
+    evaluator.add_question_answer(question, answer, topic, user_id)
+    session_state.save(user_id, **{FIELD_EVALUATOR: evaluator.to_state()})
+
+
+def prefetch_question(user_id, warm=None):
+    """
+    Called once a question has been served: prepare the user's next question
+    in the background if the answer will not change it.
+    """
+    agent = agents.get(user_id)
+    if agent is None:
+        return False
+    return agent.prefetch_next_question(warm)
+
+
+
+def speculate_question(user_id, partial_answer, warm=None, min_words=SPECULATION_MIN_WORDS,
+                       match_ratio=SPECULATION_MATCH_RATIO):
+    """
+    Called as the candidate's answer comes in: speculatively prepare the
+    follow-up. Blocking (the agent's slot lock); keep it off the event loop.
+    """
+    agent = agents.get(user_id)
+    if agent is None:
+        return False
+    return agent.speculate_next_question(partial_answer, warm, min_words, match_ratio)
+
+
+def discard_speculation(user_id):
+    """Drop the user's speculative follow-up: the answer it was built for is no longer current."""
+    agent = agents.get(user_id)
+    return agent.discard_speculation() if agent is not None else False
+
+
+def speculation_summary():
+    decided = speculation_stats["hits"] + speculation_stats["misses"]
+    return {
+        **speculation_stats,
+        "hit_rate": round(speculation_stats["hits"] / decided, 3) if decided else 0.0,
+    }
+
+
 if __name__ == "__main__":
     app.run(port=5000, debug=True)
@@ -0,0 +1,178 @@
+import queue
+import struct
+import threading
+import time
+
+HEADER_BYTES = 44
+QUEUE_CHUNKS = 200               # ~10s of 50ms chunks buffered per recording before dropping
+HEADER_PATCH_INTERVAL = 1.0      # seconds between header updates while recording
+
+
+def _wav_header(data_bytes, sample_rate, channels, sample_width):
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", data_bytes,
+    )
+
+
+class _RecordingWriter:
+    """
+    One background thread that performs the disk writes for every open
+    recording, so the number of threads does not grow with sessions.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._open = set()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, recorder, chunk):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="wav-writer")
+                self._thread.start()
+        self._queue.put((recorder, chunk))
+
+    def _run(self):
+        while True:
+            try:
+                items = [self._queue.get(timeout=HEADER_PATCH_INTERVAL)]
+            except queue.Empty:
+                items = []
+            # drain whatever else is queued so a slow disk catches up in few writes
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = {}
+            for recorder, chunk in items:
+                if chunk is not None:
+                    pending.setdefault(recorder, []).append(chunk)
+                    continue
+                # close: write what was queued before it, then finalize the file
+                self._flush(recorder, pending.pop(recorder, []))
+                self._open.discard(recorder)
+                self._safely(recorder, recorder._finish)
+
+            for recorder, chunks in pending.items():
+                self._flush(recorder, chunks)
+            now = time.monotonic()
+            for recorder in list(self._open):
+                if now - recorder._last_patch >= HEADER_PATCH_INTERVAL:
+                    self._safely(recorder, recorder._patch_header)
+
+    def _flush(self, recorder, chunks):
+        if not chunks:
+            return
+        if recorder._finished:
+            recorder._drop(chunks)  # queued after the file was closed
+            return
+        self._open.add(recorder)
+        self._safely(recorder, recorder._write_chunks, chunks)
+
+    def _safely(self, recorder, action, *args):
+        """A failing recording is closed and logged; the thread keeps writing the others."""
+        try:
+            action(*args)
+        except Exception as e:
+            print(f"⚠️ Recording error, closing {recorder.path}: {e}")
+            self._open.discard(recorder)
+            recorder._fail()
+
+
+_writer = _RecordingWriter()
+
+
+class WavRecorder:
+    """
+    Streams PCM to a WAV file off the audio path.
+    write() only enqueues for the shared writer thread, so the caller never
+    touches the disk; memory is bounded per recording (chunks are dropped and
+    counted if the disk falls behind). The header sizes are patched about once
+    a second and at close, so a crash loses at most the last second of audio.
+    """
+
+    def __init__(self, path, sample_rate=16000, channels=1, sample_width=2, max_chunks=QUEUE_CHUNKS):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.max_chunks = max_chunks
+        self.data_bytes = 0
+        self.dropped_chunks = 0
+
+        self._file = open(path, "wb")
+        self._file.write(_wav_header(0, sample_rate, channels, sample_width))
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._last_patch = time.monotonic()
+        self._closed = False    # no more writes accepted
+        self._finished = False  # file closed (writer thread only)
+        self._done = threading.Event()
+
+    def write(self, pcm: bytes):
+        if self._closed:
+            return False
+        with self._pending_lock:
+            if self._pending >= self.max_chunks:
+                self.dropped_chunks += 1
+                return False
+            self._pending += 1
+        _writer.submit(self, bytes(pcm))
+        return True
+
+    # --- Called on the writer thread ---
+    def _write_chunks(self, chunks):
+        with self._pending_lock:
+            self._pending -= len(chunks)
+        data = b"".join(chunks)
+        self._file.write(data)
+        self.data_bytes += len(data)
+
+    def _drop(self, chunks):
+        with self._pending_lock:
+            self._pending -= len(chunks)
+            self.dropped_chunks += len(chunks)
+
+    def _patch_header(self):
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(_wav_header(self.data_bytes, self.sample_rate, self.channels, self.sample_width))
+        self._file.seek(position)
+        self._file.flush()
+        self._last_patch = time.monotonic()
+
+    def _finish(self):
+        self._finished = True
+        try:
+            self._patch_header()
+        finally:
+            self._file.close()
+            self._done.set()
+
+    def _fail(self):
+        self._closed = True
+        self._finished = True
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        self._done.set()
+
+    def close(self, timeout=None):
+        """Flush queued audio, finalize the header and close the file."""
+        if not self._closed:
+            self._closed = True
+            _writer.submit(self, None)
+        self._done.wait(timeout)
+        return self.path
+
+    @property
+    def duration_seconds(self):
+        return self.data_bytes / (self.sample_rate * self.channels * self.sample_width)
@@ -0,0 +1,349 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import sys
+
+import aiohttp
+from aiohttp import WSMsgType, web
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Multi-worker mode (python router.py): starts WORKERS copies of asyncserver.py and sends every request
+# and audio websocket for a userId to the same worker, so its STT session and agents stay in memory.
+# Interview state is written through to Redis (sessionstate.py); when a worker dies, its users move
+# to the next worker on the ring, which rehydrates them.
+WORKERS = int(os.getenv("WORKERS", "2"))
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "5101"))  # worker i serves HTTP + websocket on base + i
+WORKER_HEALTH_SECONDS = float(os.getenv("WORKER_HEALTH_SECONDS", "2"))
+WORKER_RESTART = os.getenv("WORKER_RESTART", "1") == "1"  # respawn workers that exit
+HTTP_PORT = int(os.getenv("HTTP_PORT", "5001"))
+WS_PORT = int(os.getenv("WS_PORT", "8001"))
+RING_REPLICAS = 100  # virtual nodes per worker, to spread users evenly
+HEALTH_TIMEOUT = 1.0
+
+# Hop-by-hop or recomputed on each side of the proxy
+SKIP_HEADERS = {"host", "content-length", "transfer-encoding", "connection", "upgrade"}
+# Upstream closes that mean "worker went away" rather than "session over": re-dial another worker
+WORKER_LOST_CODES = {1001, 1006, 1011, 1012}
+
+
+class HashRing:
+    """Consistent hashing: adding or removing a worker only moves the users that hash to it."""
+
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        self.replicas = replicas
+        self._hashes = []
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def add(self, node):
+        if node in self:
+            return
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            index = bisect.bisect(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node):
+        kept = [(point, n) for point, n in zip(self._hashes, self._nodes) if n != node]
+        self._hashes = [point for point, _ in kept]
+        self._nodes = [n for _, n in kept]
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def node_for(self, key):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class Worker:
+    """One asyncserver.py process serving HTTP and the audio websocket on a single port."""
+
+    def __init__(self, worker_id, port, command=None):
+        self.worker_id = worker_id
+        self.port = port
+        self.command = command or [sys.executable, "asyncserver.py"]
+        self.url = f"http://localhost:{port}"
+        self.process = None
+        self.restarts = 0
+        self.requests = 0
+        self.websockets = 0
+
+    async def start(self):
+        env = {
+            **os.environ,
+            "WORKER_ID": self.worker_id,
+            "HTTP_PORT": str(self.port),
+            "WS_PORT": str(self.port),
+            "SHARED_SESSION_STATE": "1",
+        }
+        self.process = await asyncio.create_subprocess_exec(*self.command, env=env)
+
+    def exited(self):
+        return self.process is not None and self.process.returncode is not None
+
+    def stop(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+
+
+def _user_id(request, body):
+    """userId from the query string or a JSON body (/send-msg)."""
+    user_id = request.query.get("userId")
+    if user_id or not body or request.content_type != "application/json":
+        return user_id
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return data.get("userId") if isinstance(data, dict) else None
+
+
+def _bind_user_id(message):
+    """userId from a websocket bind message {"userId": ...}."""
+    if message.type != WSMsgType.TEXT:
+        return None
+    try:
+        data = json.loads(message.data)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and "type" not in data:
+        return data.get("userId")
+    return None
+
+
+class Router:
+    """
+    Front process for the workers: routes by userId on a HashRing of the
+    healthy workers, health-checks and restarts them, and re-dials an audio
+    websocket to the user's new worker when its worker goes away.
+    """
+
+    def __init__(self, workers):
+        self.workers = {worker.worker_id: worker for worker in workers}
+        self.ring = HashRing()
+        self.client = None
+        self._health_task = None
+        self.stats_counters = {"http_requests": 0, "websockets": 0, "failovers": 0, "websocket_redials": 0}
+
+    async def start(self):
+        self.client = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_connect=5))
+        for worker in self.workers.values():
+            await worker.start()
+        self._health_task = asyncio.create_task(self._health_loop(), name="worker-health")
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for worker in self.workers.values():
+            worker.stop()
+        for worker in self.workers.values():
+            if worker.process is not None:
+                await worker.process.wait()
+        if self.client is not None:
+            await self.client.close()
+
+    def worker_for(self, user_id):
+        worker_id = self.ring.node_for(user_id or "")
+        return self.workers.get(worker_id)
+
+    def mark_down(self, worker):
+        if worker.worker_id in self.ring:
+            self.ring.remove(worker.worker_id)
+            print(f"⚠️ {worker.worker_id} is down; its users move to the next worker")
+
+    def mark_up(self, worker):
+        if worker.worker_id not in self.ring:
+            self.ring.add(worker.worker_id)
+            print(f"✅ {worker.worker_id} is serving on port {worker.port}")
+
+    async def _healthy(self, worker):
+        try:
+            async with self.client.get(f"{worker.url}/server/stats",
+                                       timeout=aiohttp.ClientTimeout(total=HEALTH_TIMEOUT)) as response:
+                return response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def _check(self, worker):
+        if worker.exited():
+            self.mark_down(worker)
+            if WORKER_RESTART:
+                worker.restarts += 1
+                await worker.start()
+            return
+        if await self._healthy(worker):
+            self.mark_up(worker)
+        else:
+            self.mark_down(worker)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self._check(worker) for worker in self.workers.values()))
+            await asyncio.sleep(WORKER_HEALTH_SECONDS)
+
+    # --- HTTP ---
+    async def proxy_http(self, request):
+        body = await request.read()
+        user_id = _user_id(request, body)
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in SKIP_HEADERS]
+        self.stats_counters["http_requests"] += 1
+        for _ in range(len(self.workers)):
+            worker = self.worker_for(user_id)
+            if worker is None:
+                break
+            try:
+                upstream = await self.client.request(request.method, worker.url + request.path_qs,
+                                                     headers=headers, data=body)
+            except aiohttp.ClientConnectorError:
+                # nothing was sent: safe to retry on the next worker
+                self.mark_down(worker)
+                self.stats_counters["failovers"] += 1
+                continue
+            worker.requests += 1
+            async with upstream:
+                response = web.StreamResponse(status=upstream.status, headers=[
+                    (k, v) for k, v in upstream.headers.items() if k.lower() not in SKIP_HEADERS
+                ])
+                response.headers["X-Worker"] = worker.worker_id
+                await response.prepare(request)
+                async for chunk in upstream.content.iter_any():
+                    await response.write(chunk)
+                await response.write_eof()
+                return response
+        return web.json_response({"error": "no healthy workers"}, status=503)
+
+    # --- Websocket ---
+    async def _connect_upstream(self, user_id, path_qs):
+        for _ in range(len(self.workers)):
+            worker = self.worker_for(user_id)
+            if worker is None:
+                break
+            try:
+                upstream = await self.client.ws_connect(worker.url + path_qs, max_msg_size=0)
+                worker.websockets += 1
+                return worker, upstream
+            except aiohttp.ClientConnectorError:
+                self.mark_down(worker)
+                self.stats_counters["failovers"] += 1
+        return None, None
+
+    @staticmethod
+    async def _pump_one(message, sink):
+        if message.type == WSMsgType.TEXT:
+            await sink.send_str(message.data)
+        else:
+            await sink.send_bytes(message.data)
+
+    async def _pump(self, source, sink):
+        try:
+            async for message in source:
+                if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    break
+                await self._pump_one(message, sink)
+        except ConnectionResetError:
+            pass  # the other side is gone; proxy_websocket decides what happens next
+
+    async def proxy_websocket(self, request):
+        client = web.WebSocketResponse(max_msg_size=0)
+        await client.prepare(request)
+        self.stats_counters["websockets"] += 1
+
+        user_id = request.query.get("userId")
+        first = None
+        if not user_id:  # the client may bind with {"userId": ...} as its first message instead
+            first = await client.receive()
+            user_id = _bind_user_id(first)
+
+        while not client.closed:
+            worker, upstream = await self._connect_upstream(user_id, request.path_qs)
+            if upstream is None:
+                await client.close(code=1013, message=b"no healthy workers")
+                break
+            # every new worker gets the bind message, as it gets the query string
+            if first is not None and first.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                await self._pump_one(first, upstream)
+            tasks = [asyncio.create_task(self._pump(client, upstream)),
+                     asyncio.create_task(self._pump(upstream, client))]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            if client.closed or (tasks[0] in done and not upstream.closed):
+                await upstream.close()
+                break
+            if upstream.close_code not in WORKER_LOST_CODES:
+                await client.close(code=upstream.close_code or 1000)
+                break
+            # the worker went away mid-session: continue on the user's next worker
+            self.mark_down(worker)
+            self.stats_counters["websocket_redials"] += 1
+        return client
+
+    def build_app(self):
+        async def dispatch(request):
+            if request.headers.get("Upgrade", "").lower() == "websocket":
+                return await self.proxy_websocket(request)
+            return await self.proxy_http(request)
+
+        async def stats_endpoint(request):
+            return web.json_response({
+                **self.stats_counters,
+                "ring": sorted(set(self.ring._nodes)),
+                "workers": {
+                    worker.worker_id: {
+                        "port": worker.port,
+                        "pid": worker.process.pid if worker.process else None,
+                        "healthy": worker.worker_id in self.ring,
+                        "restarts": worker.restarts,
+                        "requests": worker.requests,
+                        "websockets": worker.websockets,
+                    }
+                    for worker in self.workers.values()
+                },
+            })
+
+        async def route_endpoint(request):
+            worker = self.worker_for(request.query.get("userId"))
+            return web.json_response({"worker": worker.worker_id if worker else None})
+
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_get("/router/stats", stats_endpoint)
+        app.router.add_get("/router/route", route_endpoint)
+        app.router.add_route("*", "/{tail:.*}", dispatch)
+        return app
+
+
+async def main():
+    print("⚙️ Starting extractresume.py...")
+    extract_process = await asyncio.create_subprocess_exec("python", "extractresume.py")
+
+    router = Router([Worker(f"worker-{i}", WORKER_BASE_PORT + i) for i in range(WORKERS)])
+    await router.start()
+    runner = web.AppRunner(router.build_app())
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", HTTP_PORT).start()
+    if WS_PORT != HTTP_PORT:
+        await web.TCPSite(runner, "localhost", WS_PORT).start()
+    print(f"✅ Router at http://localhost:{HTTP_PORT} and ws://localhost:{WS_PORT} ({WORKERS} workers)")
+    try:
+        await asyncio.Future()
+    finally:
+        await runner.cleanup()
+        await router.close()
+        extract_process.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+import json
+import os
+
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Multi-worker mode (python router.py): interview state is written through to Redis after every
+# change, so whichever worker a user is routed to can pick the session up where another left off
+SHARED_SESSION_STATE = os.getenv("SHARED_SESSION_STATE", "0") == "1"
+SESSION_STATE_REDIS_URL = os.getenv("SESSION_STATE_REDIS_URL", "redis://localhost:6379/0")
+SESSION_STATE_TTL = int(os.getenv("SESSION_STATE_TTL", str(24 * 60 * 60)))  # same lifetime as the interview payload
+WORKER_ID = os.getenv("WORKER_ID", "")
+
+# Fields of the session:{user_id} hash; each is JSON, written independently
+FIELD_AGENT = "agent"              # QuestionPatternAgent progress
+FIELD_EVALUATOR = "evaluator"      # EvaluationAgent topics and pending Q&A
+FIELD_MEMORY = "memory"            # llmconnection conversation history
+FIELD_QUESTION = "question_asked"  # last question served, evaluated against the next answer
+FIELD_STOPPED = "stopmsgtollm"
+FIELDS = (FIELD_AGENT, FIELD_EVALUATOR, FIELD_MEMORY, FIELD_QUESTION, FIELD_STOPPED)
+
+
+def _version_field(name):
+    return f"version:{name}"
+
+
+class SessionStateStore:
+    """
+    Per-user interview state in one Redis hash. Every field carries its own
+    version, bumped on each write; this worker remembers the version of each
+    field it wrote or loaded, so a field another worker has written since is
+    detected with one HMGET and rehydrated before it is used. Consumers check
+    only the fields they hold: one of them reloading does not mark another's
+    in-memory copy current. The values this worker wrote or loaded are also
+    kept locally, so get() is a dict lookup; with sharing off, that copy is
+    the only one.
+    """
+
+    def __init__(self, redis_url=SESSION_STATE_REDIS_URL, ttl=SESSION_STATE_TTL, enabled=SHARED_SESSION_STATE):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True) if enabled else None
+        self._versions = {}  # user_id -> {field: version}, as last written or loaded here
+        self._values = {}    # user_id -> {field: value}, as last written or loaded here
+        self.stats_counters = {"saves": 0, "loads": 0, "errors": 0}
+
+    @staticmethod
+    def _key(user_id):
+        return f"session:{user_id}"
+
+    def save(self, user_id, **fields):
+        """Write the given fields (JSON-serializable), bumping their versions, and stamp this worker."""
+        self._values.setdefault(user_id, {}).update(fields)
+        if not self.enabled:
+            return
+        mapping = {name: json.dumps(value) for name, value in fields.items()}
+        mapping["worker"] = WORKER_ID
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(self._key(user_id), mapping=mapping)
+            for name in fields:
+                pipe.hincrby(self._key(user_id), _version_field(name), 1)
+            pipe.hincrby(self._key(user_id), "version", 1)
+            pipe.expire(self._key(user_id), self.ttl)
+            results = pipe.execute()
+        except redis.RedisError as e:
+            self.stats_counters["errors"] += 1
+            print(f"⚠️ Session state Redis error ({user_id}): {e}")
+            return
+        self._versions.setdefault(user_id, {}).update(zip(fields, (int(v) for v in results[1:1 + len(fields)])))
+        self.stats_counters["saves"] += 1
+
+    def is_stale(self, user_id, fields=FIELDS):
+        """True if another worker has written any of these fields since this worker last wrote or loaded it."""
+        if not self.enabled:
+            return False
+        try:
+            stored = self.redis.hmget(self._key(user_id), *(_version_field(name) for name in fields))
+        except redis.RedisError as e:
+            self.stats_counters["errors"] += 1
+            print(f"⚠️ Session state Redis error ({user_id}): {e}")
+            return False
+        known = self._versions.get(user_id, {})
+        return any(int(version or 0) != known.get(name, 0) for name, version in zip(fields, stored))
+
+    def load(self, user_id, fields=FIELDS):
+        """The stored values of these fields (absent ones left out); this worker now has their current copy."""
+        if not self.enabled:
+            return {}
+        key = self._key(user_id)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hmget(key, *fields)
+            pipe.hmget(key, *(_version_field(name) for name in fields))
+            values, versions = pipe.execute()
+        except redis.RedisError as e:
+            self.stats_counters["errors"] += 1
+            print(f"⚠️ Session state Redis error ({user_id}): {e}")
+            return {}
+        self._versions.setdefault(user_id, {}).update(
+            (name, int(version or 0)) for name, version in zip(fields, versions))
+        loaded = {name: json.loads(value) for name, value in zip(fields, values) if value is not None}
+        local = self._values.setdefault(user_id, {})
+        for name in fields:
+            local.pop(name, None)
+        local.update(loaded)
+        if loaded:
+            self.stats_counters["loads"] += 1
+        return loaded
+
+    def get(self, user_id, field, default=None, refresh=False):
+        """
+        One field of the user's state from the local copy. The shared copy is
+        read if this worker has not seen the field yet, or with refresh=True
+        (one HMGET, plus a reload if another worker wrote it since).
+        """
+        if self.enabled and (field not in self._versions.get(user_id, {})
+                             or (refresh and self.is_stale(user_id, (field,)))):
+            self.load(user_id, (field,))
+        return self._values.get(user_id, {}).get(field, default)
+
+    def describe(self, user_id):
+        """Version and owning worker, without the state itself (for /session/state)."""
+        if not self.enabled:
+            return {"enabled": False}
+        version, worker = self.redis.hmget(self._key(user_id), "version", "worker")
+        return {
+            "enabled": True,
+            "version": int(version) if version else None,
+            "last_worker": worker,
+            "worker": WORKER_ID,
+        }
+
+    def stats(self):
+        return {"enabled": self.enabled, "worker": WORKER_ID, "users": len(self._versions), **self.stats_counters}
+
+
+session_state = SessionStateStore()
@@ -1,255 +1,233 @@
 import pyaudio
-import websocket
 import json
 import threading
 import time
-import wave
-from urllib.parse import urlencode
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from llmconnection import process_message
 from flask import Flask, jsonify, request
 
-from questionagent import get_question_endpoint
-from texttospeech import ttsblend
-from dotenv import load_dotenv
-import os
-
-
-
-# Load environment variables
-load_dotenv()
-api_key = os.getenv("ASSEMBLYAI_API_KEY")
-
-CONNECTION_PARAMS = {
-    "sample_rate": 16000,
-    "format_turns": True,  # Request formatted final transcripts
-}
-API_ENDPOINT_BASE_URL = "wss://streaming.assemblyai.com/v3/ws"
-API_ENDPOINT = f"{API_ENDPOINT_BASE_URL}?{urlencode(CONNECTION_PARAMS)}"
+from questionagent import (
+    SPECULATIVE_QUESTIONS,
+    discard_speculation,
+    get_question_endpoint,
+    prefetch_question,
+    speculate_question,
+)
+from texttospeech import (
+    synthesize,
+    synthesize_chunks,
+    ttsblend,
+    ttsblend_parts,
+    ttsblend_stream,
+    ttsblend_stream_parts,
+)
+from blendcodec import BLEND_FORMAT_JSON
+from sessionstate import FIELD_STOPPED, session_state
+from audiotransport import TRANSPORT_JSON
+from sttsession import (
+    API_ENDPOINT,
+    CONNECTION_PARAMS,
+    DEFAULT_SESSION_ID,
+    SAMPLE_RATE,
+    CHANNELS,
+    find_session,
+    session_manager,
+    turn_listeners,
+)
 
 # Audio Configuration
 FRAMES_PER_BUFFER = 800  # 50ms of audio (0.05s * 16000Hz)
-SAMPLE_RATE = CONNECTION_PARAMS["sample_rate"]
-CHANNELS = 1
 FORMAT = pyaudio.paInt16
 
-# Global variables for audio stream and websocket
-audio = None
-stream = None
-ws_app = None
-audio_thread = None
-ws_global = None
-user_prompt =""
-transcript = ""
-stop_event = threading.Event()  # To signal the audio thread to stop
+stop_event = threading.Event()  # To signal the microphone loop to stop
 
-# WAV recording variables
-recorded_frames = []  # Store audio frames for WAV file
-recording_lock = threading.Lock()  # Thread-safe access to recorded_frames
+# Server-side end-of-answer (VAD): userId -> transcript spoken_version the follow-up question was started for.
+# The question itself waits in the agent's speculation slot until the client's /send-msg.
+auto_spoken = {}
+auto_lock = threading.Lock()
+# One thread, so each user's turns are speculated on in the order they ended
+speculation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculate")
 
 
 # --- WebSocket Send Function ---
 
-def send_to_assemblyai(data, is_binary=False):
+def send_to_assemblyai(data, is_binary=False, user_id=DEFAULT_SESSION_ID):
     """
-    Send data to AssemblyAI via WebSocket, unless stopmsgtollm is True.
+    Send data to AssemblyAI via the user's STT session.
     """
-    global ws_global, stopmsgtollm
+    if is_binary and session_state.get(user_id, FIELD_STOPPED, False):
+        return False  # a question is out; audio resumes after /reconnect
+    session = session_manager.get(user_id)
+    if session is None:
+        print(f"No STT session for {user_id}.")
+        return False
+    if is_binary:
+        session.record_audio(data)
+    return session.send(data, is_binary=is_binary)
 
 
+def _session_for(userid):
+    """The user's STT session, falling back to the shared default session."""
+    return find_session(userid) or find_session(DEFAULT_SESSION_ID)
 
-    if ws_global is None:
-        print("WebSocket connection not established yet.")
-        return False
+
+def _speculate(user_id, answer):
     try:
-        if is_binary:
-            ws_global.send(data, websocket.ABNF.OPCODE_BINARY)
-        else:
-            if isinstance(data, dict):
-                data = json.dumps(data)
-            ws_global.send(data)
-        return True
+        speculate_question(user_id, answer, warm=synthesize)
     except Exception as e:
-        print(f"Error sending data to AssemblyAI: {e}")
-        return False
-
+        print(f"⚠️ Speculation error ({user_id}): {e}")
 
 
-
-def send_msg_to_llm(userid):
+def _speculate_on_turn(session, turn):
     """
-    Flask API to send collected user_prompt to LLM
+    A turn has ended (a pause in the answer): speculate on the answer so far.
+    Listeners run on the STT receive path (the event loop in async mode), so
+    the speculation itself runs on speculation_executor.
     """
-    print("llm agent starting process ")
-    global user_prompt, stopmsgtollm, transcript
-    print(transcript , "transcript")
+    if not turn.get("end_of_turn"):
+        return
+    speculation_executor.submit(_speculate, session.user_id, session.transcripts.answer_text())
+
+
+if SPECULATIVE_QUESTIONS:
+    turn_listeners.append(_speculate_on_turn)
 
-    # if not user_prompt.strip():
-    #     return jsonify({"error": "No user prompt available"}), 400
+
+def _run_llm(userid):
+    """Run the LLM on the user's current answer; returns the next question."""
+    session = _session_for(userid)
+    # every turn of the answer since the last question, final text where available
+    transcript = session.transcripts.take_answer() if session else ""
+    print(transcript , "transcript")
 
     # Process with your LLM connection
     response = get_question_endpoint(transcript,userid)
-    print(response.get("question"))
-    user_prompt = ""
-    blendtextdata = ttsblend(response.get("question"))
-    stopmsgtollm = True
-    return blendtextdata
+    question = response.get("question")
+    print(question)
+    return question
 
 
+def _generate_question(userid):
+    """
+    The next question for the whole answer. A follow-up auto_endpoint started
+    is used by the agent only if the candidate has not said more since.
+    """
+    with auto_lock:
+        spoken = auto_spoken.pop(userid, None)
+    session = _session_for(userid)
+    if spoken is not None and session is not None and session.transcripts.spoken_version != spoken:
+        discard_speculation(userid)  # built from part of the answer
+    return _run_llm(userid)
 
 
-# --- WebSocket Event Handlers ---
-def on_open(ws):
-    """Called when the WebSocket connection is established."""
-    print("WebSocket connection opened.")
-    global ws_global
-    ws_global = ws  # Store the ws for use elsewhere
+def auto_endpoint(userid):
+    """
+    The candidate stopped talking: start the follow-up question and its audio
+    for the answer as it stands, so the client's /send-msg only has to collect
+    them. Nothing is committed here: the agent keeps the question in its
+    speculation slot, and _generate_question drops it if the answer went on.
+    Blocking (the agent's slot lock); keep it off the event loop.
+    """
+    session = _session_for(userid)
+    if session is None:
+        return False
+    spoken = session.transcripts.spoken_version
+    # the whole answer: a speculation from an earlier pause is replaced unless it saw the same words
+    started = speculate_question(userid, session.transcripts.answer_text(), warm=synthesize,
+                                 min_words=1, match_ratio=1.0)
+    with auto_lock:
+        auto_spoken[userid] = spoken
+    return started
 
-    # Start sending audio data in a separate thread
-    def stream_audio():
-        global stream
-        print("Starting audio streaming...")
-        while not stop_event.is_set():
-            try:
-                audio_data = stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
-
-                # Store audio data for WAV recording
-                with recording_lock:
-                    recorded_frames.append(audio_data)
-
-                # Send audio data using the separate function
-                send_to_assemblyai(audio_data, is_binary=True)
-            except Exception as e:
-                print(f"Error streaming audio: {e}")
-                # If stream read fails, likely means it's closed, stop the loop
-                break
-        print("Audio streaming stopped.")
-
-    global audio_thread
-    audio_thread = threading.Thread(target=stream_audio)
-    audio_thread.daemon = (
-        True  # Allow main thread to exit even if this thread is running
-    )
-    audio_thread.start()
 
+def _stop_messages(userid):
+    """A question is on its way: stop passing the candidate's audio to the LLM until /reconnect."""
+    session_state.save(userid, **{FIELD_STOPPED: True})
 
-def on_message(ws, message):
-    global user_prompt, transcript
-    try:
-        data = json.loads(message)
-        msg_type = data.get('type')
-        if msg_type == "Begin":
-            session_id = data.get('id')
-            expires_at = data.get('expires_at')
-        elif msg_type == "Turn":
-            transcript = data.get('transcript', '')
-            formatted = data.get('turn_is_formatted', False)
-            # Clear previous line for formatted messages
-            if formatted:
-
-                user_prompt+=transcript
-            else:
-                user_prompt += transcript
-        elif msg_type == "Termination":
-            audio_duration = data.get('audio_duration_seconds', 0)
-            session_duration = data.get('session_duration_seconds', 0)
-    except json.JSONDecodeError as e:
-        print(f"Error decoding message: {e}")
-    except Exception as e:
-        print(f"Error handling message: {e}")
 
+def send_msg_to_llm(userid, blend_format=BLEND_FORMAT_JSON, transport=TRANSPORT_JSON):
+    """
+    Flask API to send the candidate's answer to LLM
+    """
+    print("llm agent starting process ")
+    question = _generate_question(userid)
+    blendtextdata = ttsblend(question, blend_format=blend_format, transport=transport)
+    _stop_messages(userid)
+    # Prepare the next question (and its audio) while the candidate answers
+    prefetch_question(userid, warm=synthesize)
+    return blendtextdata
 
-def on_error(ws, error):
-    """Called when a WebSocket error occurs."""
-    print(f"\nWebSocket Error: {error}")
-    # Attempt to signal stop on error
-    stop_event.set()
 
+def send_msg_to_llm_stream(userid, blend_format=BLEND_FORMAT_JSON):
+    """
+    Streaming variant of send_msg_to_llm: returns one NDJSON line per
+    synthesized sentence so the first audio reaches the client early. The
+    question is generated before returning, so an empty one raises
+    ValueError (ttsblend's "Text is required") while a 400 can still be sent.
+    """
+    question = _generate_question(userid)
+    chunks = ttsblend_stream(question, blend_format=blend_format)
+    _stop_messages(userid)
 
-def on_close(ws, close_status_code, close_msg):
-    """Called when the WebSocket connection is closed."""
-    print(f"\nWebSocket Disconnected: Status={close_status_code}, Msg={close_msg}")
+    def lines():
+        for chunk in chunks:
+            yield json.dumps(chunk) + "\n"
+        prefetch_question(userid, warm=synthesize_chunks)
 
-    # Save recorded audio to WAV file
-    save_wav_file()
+    return lines()
 
-    # Ensure audio resources are released
-    global stream, audio
-    stop_event.set()  # Signal audio thread just in case it's still running
 
+def push_question(userid, blend_format=BLEND_FORMAT_JSON, stream=False):
+    """
+    Server-push variant of send_msg_to_llm for the session websocket: yields
+    (metadata, mp3 bytes) for the whole question, or per sentence if stream.
+    """
+    question = _generate_question(userid)
+    _stop_messages(userid)
     if stream:
-        if stream.is_active():
-            stream.stop_stream()
-        stream.close()
-        stream = None
-    if audio:
-        audio.terminate()
-        audio = None
-    # Try to join the audio thread to ensure clean exit
-    if audio_thread and audio_thread.is_alive():
-        audio_thread.join(timeout=1.0)
-
-
+        yield from ttsblend_stream_parts(question, blend_format=blend_format)
+        prefetch_question(userid, warm=synthesize_chunks)
+    else:
+        yield ttsblend_parts(question, blend_format=blend_format)
+        prefetch_question(userid, warm=synthesize)
 
 
 # --- Main Execution ---
-def run():
-    global audio, stream, ws_app
-    # Create WebSocketApp
-    ws_app = websocket.WebSocketApp(
-        API_ENDPOINT,
-        header={"Authorization": api_key},
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close,
+def run(user_id=DEFAULT_SESSION_ID):
+    """
+    Stream the local microphone into an STT session (standalone mode).
+    """
+    audio = pyaudio.PyAudio()
+    stream = audio.open(
+        input=True,
+        frames_per_buffer=FRAMES_PER_BUFFER,
+        channels=CHANNELS,
+        format=FORMAT,
+        rate=SAMPLE_RATE,
     )
-
-    # Run WebSocketApp in a separate thread to allow main thread to catch KeyboardInterrupt
-    ws_thread = threading.Thread(target=ws_app.run_forever)
-    ws_thread.daemon = True
-    ws_thread.start()
+    session = session_manager.get_or_create(user_id)
+    session.wait_connected(timeout=10)
 
     try:
-        # Keep main thread alive until interrupted
-        while ws_thread.is_alive():
-            time.sleep(0.1)
+        print("Starting audio streaming...")
+        while not stop_event.is_set() and session.is_alive():
+            audio_data = stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
+            session.record_audio(audio_data)
+            session.send(audio_data, is_binary=True)
     except KeyboardInterrupt:
         print("\nCtrl+C received. Stopping...")
-        stop_event.set()  # Signal audio thread to stop
-
-        # Send termination message to the server using the new function
-        terminate_message = {"type": "Terminate"}
-        print(f"Sending termination message: {json.dumps(terminate_message)}")
-        send_to_assemblyai(terminate_message)
-
-        # Give a moment for messages to process before forceful close
-        time.sleep(5)
-
-        # Close the WebSocket connection (will trigger on_close)
-        if ws_app:
-            ws_app.close()
-
-        # Wait for WebSocket thread to finish
-        ws_thread.join(timeout=2.0)
-
     except Exception as e:
         print(f"\nAn unexpected error occurred: {e}")
-        stop_event.set()
-        if ws_app:
-            ws_app.close()
-        ws_thread.join(timeout=2.0)
-
     finally:
-        # Final cleanup (already handled in on_close, but good as a fallback)
-        if stream and stream.is_active():
+        stop_event.set()
+        # Terminate the session (also saves the recording)
+        session_manager.close(user_id)
+        if stream.is_active():
             stream.stop_stream()
-        if stream:
-            stream.close()
-        if audio:
-            audio.terminate()
+        stream.close()
+        audio.terminate()
         print("Cleanup complete. Exiting.")
 
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run()
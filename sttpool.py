@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import time
+
+import websockets
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pre-opened AssemblyAI connections. Idle connections are billed as streaming time, so the pool is off by default.
+STT_POOL_SIZE = int(os.getenv("STT_POOL_SIZE", "0"))
+STT_POOL_IDLE_SECONDS = float(os.getenv("STT_POOL_IDLE_SECONDS", "120"))   # recycle connections idle this long
+STT_POOL_HEALTH_SECONDS = float(os.getenv("STT_POOL_HEALTH_SECONDS", "15"))  # ping idle connections this often
+OPEN_TIMEOUT = 10
+PING_TIMEOUT = 5
+EXPIRY_MARGIN_SECONDS = 60  # never hand out a connection this close to the session's expires_at
+
+
+class PooledConnection:
+    """An open upstream connection that has already received its Begin message."""
+
+    def __init__(self, ws, begin):
+        self.ws = ws
+        self.session_id = begin.get("id")
+        self.expires_at = begin.get("expires_at")
+        self.opened_at = time.monotonic()
+        self.last_checked = self.opened_at
+
+    def is_open(self):
+        return self.ws.close_code is None
+
+    def is_expired(self, idle_seconds):
+        if time.monotonic() - self.opened_at > idle_seconds:
+            return True
+        return self.expires_at is not None and self.expires_at - time.time() < EXPIRY_MARGIN_SECONDS
+
+
+class STTConnectionPool:
+    """
+    Keeps `size` authenticated STT connections open so a new session can
+    start streaming without waiting for the TLS handshake and Begin. A
+    background task refills the pool, pings idle connections and recycles
+    ones that have been idle too long. Runs on the caller's event loop.
+    """
+
+    def __init__(self, endpoint, key, size=STT_POOL_SIZE, idle_seconds=STT_POOL_IDLE_SECONDS,
+                 health_seconds=STT_POOL_HEALTH_SECONDS):
+        self.endpoint = endpoint
+        self.key = key
+        self.size = size
+        self.idle_seconds = idle_seconds
+        self.health_seconds = health_seconds
+
+        self._idle = []
+        self._opening = 0
+        self._wake = None
+        self._task = None
+        self.stats_counters = {"hits": 0, "misses": 0, "opened": 0, "open_failures": 0,
+                               "expired": 0, "unhealthy": 0, "maintenance_errors": 0}
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._maintain(), name="stt-pool")
+        return self
+
+    def take(self):
+        """An open connection, or None if the pool is empty (the caller dials instead)."""
+        while self._idle:
+            connection = self._idle.pop(0)
+            if connection.is_open() and not connection.is_expired(self.idle_seconds):
+                self.stats_counters["hits"] += 1
+                self._refill()
+                return connection
+            asyncio.ensure_future(self._retire(connection))
+        self.stats_counters["misses"] += 1
+        self._refill()
+        return None
+
+    def _refill(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _open(self):
+        self._opening += 1
+        try:
+            ws = await websockets.connect(self.endpoint, additional_headers={"Authorization": self.key or ""},
+                                          open_timeout=OPEN_TIMEOUT)
+            try:
+                begin = json.loads(await asyncio.wait_for(ws.recv(), OPEN_TIMEOUT))
+                if begin.get("type") != "Begin":
+                    raise ConnectionError(f"expected Begin, got {begin.get('type')}")
+                connection = PooledConnection(ws, begin)
+            except Exception:
+                await ws.close()
+                raise
+            self._idle.append(connection)
+            self.stats_counters["opened"] += 1
+        # ValueError: the first frame is not JSON; AttributeError: it is not an object
+        except (OSError, asyncio.TimeoutError, ConnectionError, ValueError, AttributeError,
+                websockets.exceptions.WebSocketException) as e:
+            self.stats_counters["open_failures"] += 1
+            print(f"⚠️ STT pool could not open a connection: {e}")
+        finally:
+            self._opening -= 1
+
+    async def _retire(self, connection):
+        """Close a pooled connection, ending its upstream session cleanly."""
+        try:
+            if connection.is_open():
+                await connection.ws.send(json.dumps({"type": "Terminate"}))
+            await connection.ws.close()
+        except websockets.exceptions.WebSocketException:
+            pass
+
+    async def _check(self, connection):
+        try:
+            pong = await connection.ws.ping()
+            await asyncio.wait_for(pong, PING_TIMEOUT)
+            connection.last_checked = time.monotonic()
+            return True
+        except (asyncio.TimeoutError, websockets.exceptions.WebSocketException):
+            return False
+
+    async def _health_check(self):
+        now = time.monotonic()
+        for connection in list(self._idle):
+            if connection.is_expired(self.idle_seconds):
+                reason = "expired"
+            elif not connection.is_open():
+                reason = "unhealthy"
+            elif now - connection.last_checked >= self.health_seconds and not await self._check(connection):
+                reason = "unhealthy"
+            else:
+                continue
+            if connection in self._idle:
+                self._idle.remove(connection)
+                self.stats_counters[reason] += 1
+                await self._retire(connection)
+
+    async def _maintain(self):
+        backoff = 0
+        while True:
+            try:
+                await self._health_check()
+                missing = self.size - len(self._idle) - self._opening
+                if missing > 0:
+                    failures = self.stats_counters["open_failures"]
+                    await asyncio.gather(*(self._open() for _ in range(missing)))
+                    # back off while the upstream is refusing connections
+                    backoff = min(backoff * 2 or 1, 30) if self.stats_counters["open_failures"] > failures else 0
+            except Exception as e:
+                # one bad pass must not end the task: the pool would silently stop refilling
+                self.stats_counters["maintenance_errors"] += 1
+                print(f"⚠️ STT pool maintenance error: {e!r}")
+                backoff = min(backoff * 2 or 1, 30)
+            self._wake.clear()
+            if backoff:
+                await asyncio.sleep(backoff)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), min(self.health_seconds, self.idle_seconds))
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._retire(connection) for connection in idle))
+
+    def stats(self):
+        taken = self.stats_counters["hits"] + self.stats_counters["misses"]
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "opening": self._opening,
+            **self.stats_counters,
+            "hit_rate": round(self.stats_counters["hits"] / taken, 3) if taken else 0.0,
+        }
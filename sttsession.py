@@ -0,0 +1,460 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+import websocket
+import websockets
+from dotenv import load_dotenv
+
+from recording import WavRecorder
+from sttpool import STT_POOL_SIZE, STTConnectionPool
+from transcriptstore import TranscriptStore
+
+# Load environment variables
+load_dotenv()
+api_key = os.getenv("ASSEMBLYAI_API_KEY")
+
+CONNECTION_PARAMS = {
+    "sample_rate": 16000,
+    "format_turns": True,  # Request formatted final transcripts
+}
+API_ENDPOINT_BASE_URL = os.getenv("ASSEMBLYAI_ENDPOINT", "wss://streaming.assemblyai.com/v3/ws")
+API_ENDPOINT = f"{API_ENDPOINT_BASE_URL}?{urlencode(CONNECTION_PARAMS)}"
+
+SAMPLE_RATE = CONNECTION_PARAMS["sample_rate"]
+CHANNELS = 1
+SAMPLE_WIDTH = 2  # int16 PCM
+
+# Browser connections that do not identify themselves share this session
+DEFAULT_SESSION_ID = "default"
+
+# Called as listener(session, turn_message) after each Turn is stored, on the reader thread/loop;
+# listeners must return quickly
+turn_listeners = []
+
+# Each connection streams its audio to <RECORDINGS_DIR>/recorded_audio_<userId>_<timestamp>.wav
+RECORD_AUDIO = os.getenv("RECORD_AUDIO", "1") != "0"
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR", ".")
+
+# A closed session stays in its manager this long so /send-msg can still read its transcript, then is evicted
+CLOSED_SESSION_SECONDS = float(os.getenv("STT_CLOSED_SESSION_SECONDS", "600"))
+
+
+class BaseSTTSession:
+    """
+    One interview's AssemblyAI streaming connection, with its own transcript
+    buffer and recording. Subclasses provide the transport.
+    """
+
+    def __init__(self, user_id, endpoint=API_ENDPOINT, key=api_key, record=RECORD_AUDIO):
+        self.user_id = user_id
+        self.endpoint = endpoint
+        self.key = key
+        self.record = record
+        self.session_id = None
+
+        self.transcripts = TranscriptStore()
+
+        # WAV recording, streamed to disk
+        self.recorder = None
+        self.recording_lock = threading.Lock()
+
+    def handle_message(self, message):
+        """Apply one AssemblyAI v3 server message; returns its type."""
+        try:
+            data = json.loads(message)
+            msg_type = data.get('type')
+            if msg_type == "Begin":
+                self.session_id = data.get('id')
+            elif msg_type == "Turn":
+                self.transcripts.update(data.get('turn_order', 0), data.get('transcript', ''),
+                                        data.get('end_of_turn', False))
+                for listener in turn_listeners:
+                    listener(self, data)
+            return msg_type
+        except json.JSONDecodeError as e:
+            print(f"Error decoding message: {e}")
+        except Exception as e:
+            print(f"Error handling message: {e}")
+        return None
+
+    @property
+    def transcript(self):
+        """Text of the most recent turn."""
+        return self.transcripts.latest
+
+    @property
+    def final_turns(self):
+        return self.transcripts.final_turns
+
+    # --- Recording ---
+    def record_audio(self, pcm):
+        """
+        Append inbound audio to the session recording. Callers record what
+        the candidate sent, before any silence suppression, so send() does not.
+        """
+        if not self.record:
+            return
+        with self.recording_lock:
+            if self.recorder is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                path = os.path.join(RECORDINGS_DIR, f"recorded_audio_{self.user_id}_{timestamp}.wav")
+                try:
+                    self.recorder = WavRecorder(path, SAMPLE_RATE, CHANNELS, SAMPLE_WIDTH)
+                except OSError as e:
+                    print(f"Error opening WAV file: {e}")
+                    self.record = False
+                    return
+            self.recorder.write(pcm)
+
+    def close_recording(self):
+        """Finalize this connection's WAV file; the next connection starts a new one."""
+        with self.recording_lock:
+            recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return None
+        path = recorder.close()
+        if recorder.dropped_chunks:
+            print(f"⚠️ Recording dropped {recorder.dropped_chunks} chunks ({self.user_id})")
+        print(f"Audio saved to {path}")
+        return path
+
+
+class STTSession(BaseSTTSession):
+    """Session on a websocket-client connection with its own reader thread."""
+
+    def __init__(self, user_id, endpoint=API_ENDPOINT, key=api_key, record=RECORD_AUDIO):
+        super().__init__(user_id, endpoint, key, record)
+        self.ws_app = None
+        self.ws_thread = None
+        self.ws = None  # set once the connection is open
+        self.connected = threading.Event()
+        self.closed = threading.Event()
+
+    # --- Connection ---
+    def start(self):
+        """Open the upstream connection in a background thread."""
+        self.connected.clear()
+        self.closed.clear()
+        self.ws_app = websocket.WebSocketApp(
+            self.endpoint,
+            header={"Authorization": self.key or ""},
+            on_open=self.on_open,
+            on_message=self.on_message,
+            on_error=self.on_error,
+            on_close=self.on_close,
+        )
+        self.ws_thread = threading.Thread(target=self.ws_app.run_forever, daemon=True,
+                                          name=f"stt-{self.user_id}")
+        self.ws_thread.start()
+        return self
+
+    def is_alive(self):
+        return self.ws_thread is not None and self.ws_thread.is_alive() and not self.closed.is_set()
+
+    def wait_connected(self, timeout=None):
+        return self.connected.wait(timeout)
+
+    def send(self, data, is_binary=False):
+        """
+        Send data to AssemblyAI via this session's WebSocket.
+        """
+        if self.ws is None:
+            print(f"WebSocket connection for {self.user_id} not established yet.")
+            return False
+        try:
+            if is_binary:
+                self.ws.send(data, websocket.ABNF.OPCODE_BINARY)
+            else:
+                if isinstance(data, dict):
+                    data = json.dumps(data)
+                self.ws.send(data)
+            return True
+        except Exception as e:
+            print(f"Error sending data to AssemblyAI ({self.user_id}): {e}")
+            return False
+
+    def stop(self, grace_seconds=1.0):
+        """Ask AssemblyAI to terminate the session, then close the connection."""
+        if self.ws is not None:
+            self.send({"type": "Terminate"})
+            self.closed.wait(grace_seconds)
+        if self.ws_app:
+            self.ws_app.close()
+        if self.ws_thread and self.ws_thread is not threading.current_thread():
+            self.ws_thread.join(timeout=2.0)
+
+    # --- WebSocket Event Handlers ---
+    def on_open(self, ws):
+        print(f"WebSocket connection opened ({self.user_id}).")
+        self.ws = ws
+        self.connected.set()
+
+    def on_message(self, ws, message):
+        if self.handle_message(message) == "Termination":
+            self.closed.set()
+
+    def on_error(self, ws, error):
+        print(f"\nWebSocket Error ({self.user_id}): {error}")
+
+    def on_close(self, ws, close_status_code, close_msg):
+        print(f"\nWebSocket Disconnected ({self.user_id}): Status={close_status_code}, Msg={close_msg}")
+        self.ws = None
+        self.closed.set()
+        self.close_recording()
+
+
+class AsyncSTTSession(BaseSTTSession):
+    """
+    Session on an asyncio websockets connection, run on the caller's event
+    loop: sends are awaited directly and replies are read by a task, so a
+    session costs no threads.
+    """
+
+    def __init__(self, user_id, endpoint=API_ENDPOINT, key=api_key, record=RECORD_AUDIO):
+        super().__init__(user_id, endpoint, key, record)
+        self.ws = None
+        self.reader = None
+        self.terminated = None
+
+    async def start(self, open_timeout=10, connection=None):
+        """
+        Connect and start reading server messages; returns once the connection
+        is open. `connection` is an already-open PooledConnection to use instead.
+        """
+        self.terminated = asyncio.Event()
+        if connection is not None:
+            self.ws = connection.ws
+            self.session_id = connection.session_id
+        else:
+            self.ws = await websockets.connect(
+                self.endpoint,
+                additional_headers={"Authorization": self.key or ""},
+                open_timeout=open_timeout,
+            )
+        print(f"WebSocket connection opened ({self.user_id}).")
+        self.reader = asyncio.create_task(self._read(), name=f"stt-{self.user_id}")
+        return self
+
+    def is_alive(self):
+        return self.reader is not None and not self.reader.done()
+
+    async def _read(self):
+        ws = self.ws
+        try:
+            async for message in ws:
+                if self.handle_message(message) == "Termination":
+                    break
+        except websockets.exceptions.ConnectionClosed as e:
+            print(f"\nWebSocket Disconnected ({self.user_id}): {e}")
+        finally:
+            self.terminated.set()
+            self.ws = None
+            await ws.close()
+            await asyncio.to_thread(self.close_recording)
+
+    async def send(self, data, is_binary=False):
+        """
+        Send data to AssemblyAI via this session's WebSocket.
+        """
+        if self.ws is None:
+            print(f"WebSocket connection for {self.user_id} not established yet.")
+            return False
+        try:
+            if is_binary:
+                await self.ws.send(bytes(data))
+            else:
+                if isinstance(data, dict):
+                    data = json.dumps(data)
+                await self.ws.send(data)
+            return True
+        except Exception as e:
+            print(f"Error sending data to AssemblyAI ({self.user_id}): {e}")
+            return False
+
+    async def stop(self, grace_seconds=1.0):
+        """Ask AssemblyAI to terminate the session, then close the connection."""
+        if self.ws is not None:
+            await self.send({"type": "Terminate"})
+            try:
+                await asyncio.wait_for(self.terminated.wait(), grace_seconds)
+            except asyncio.TimeoutError:
+                pass
+        if self.reader is not None and not self.reader.done():
+            self.reader.cancel()
+            try:
+                await self.reader
+            except asyncio.CancelledError:
+                pass
+
+
+class STTSessionManager:
+    """
+    Maps userId -> STTSession so one process can host many interviews.
+    Closed sessions are evicted CLOSED_SESSION_SECONDS after closing, on
+    the next get_or_create() or close().
+    """
+
+    def __init__(self, endpoint=API_ENDPOINT, key=api_key, record=RECORD_AUDIO,
+                 closed_seconds=CLOSED_SESSION_SECONDS):
+        self.endpoint = endpoint
+        self.key = key
+        self.record = record
+        self.closed_seconds = closed_seconds
+        self.sessions = {}
+        self._closed = {}  # user_id -> when its session was closed
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        return self.sessions.get(user_id)
+
+    def _evict_closed(self):
+        """Called with _lock held."""
+        now = time.monotonic()
+        for user_id, closed_at in list(self._closed.items()):
+            if now - closed_at >= self.closed_seconds:
+                del self._closed[user_id]
+                session = self.sessions.get(user_id)
+                if session is not None and not session.is_alive():
+                    del self.sessions[user_id]
+
+    def get_or_create(self, user_id):
+        """Return the user's session, (re)connecting it if needed."""
+        with self._lock:
+            self._closed.pop(user_id, None)
+            self._evict_closed()
+            session = self.sessions.get(user_id)
+            if session is None:
+                session = STTSession(user_id, self.endpoint, self.key, self.record)
+                self.sessions[user_id] = session
+            if not session.is_alive():
+                session.start()
+            return session
+
+    def close(self, user_id):
+        """Close the upstream connection; the transcript stays readable until the session is evicted."""
+        session = self.sessions.get(user_id)
+        if session is not None:
+            session.stop()
+        with self._lock:
+            if session is not None and self.sessions.get(user_id) is session and not session.is_alive():
+                self._closed[user_id] = time.monotonic()
+            self._evict_closed()
+        return session
+
+    def remove(self, user_id):
+        session = self.close(user_id)
+        with self._lock:
+            self._closed.pop(user_id, None)
+            self.sessions.pop(user_id, None)
+        return session
+
+    def close_all(self):
+        for user_id in list(self.sessions):
+            self.close(user_id)
+
+    def stats(self):
+        sessions = list(self.sessions.values())
+        return {
+            "sessions": len(sessions),
+            "connected": sum(1 for s in sessions if s.is_alive()),
+        }
+
+
+class AsyncSTTSessionManager:
+    """
+    STTSessionManager for AsyncSTTSession; call it from a single event loop.
+    With pool_size > 0, new sessions take a pre-opened connection from a
+    warm pool (after start_pool()) and only dial when it is empty.
+    """
+
+    def __init__(self, endpoint=API_ENDPOINT, key=api_key, record=RECORD_AUDIO, pool_size=STT_POOL_SIZE,
+                 closed_seconds=CLOSED_SESSION_SECONDS):
+        self.endpoint = endpoint
+        self.key = key
+        self.record = record
+        self.closed_seconds = closed_seconds
+        self.sessions = {}
+        self._closed = {}  # user_id -> when its session was closed
+        self._connecting = {}
+        self.pool = STTConnectionPool(endpoint, key, size=pool_size) if pool_size > 0 else None
+
+    async def start_pool(self):
+        if self.pool is not None:
+            await self.pool.start()
+        return self.pool
+
+    def get(self, user_id):
+        return self.sessions.get(user_id)
+
+    def _evict_closed(self):
+        now = time.monotonic()
+        for user_id, closed_at in list(self._closed.items()):
+            if now - closed_at >= self.closed_seconds and user_id not in self._connecting:
+                del self._closed[user_id]
+                self.sessions.pop(user_id, None)
+
+    async def get_or_create(self, user_id):
+        """Return the user's session, (re)connecting it if needed."""
+        self._closed.pop(user_id, None)
+        self._evict_closed()
+        session = self.sessions.get(user_id)
+        if session is None:
+            session = AsyncSTTSession(user_id, self.endpoint, self.key, self.record)
+            self.sessions[user_id] = session
+        if session.is_alive():
+            return session
+        # Concurrent callers for the same user share one connection attempt
+        connecting = self._connecting.get(user_id)
+        if connecting is None:
+            connection = self.pool.take() if self.pool is not None else None
+            connecting = asyncio.ensure_future(session.start(connection=connection))
+            self._connecting[user_id] = connecting
+            connecting.add_done_callback(lambda _: self._connecting.pop(user_id, None))
+        await connecting
+        return session
+
+    async def close(self, user_id):
+        """Close the upstream connection; the transcript stays readable until the session is evicted."""
+        session = self.sessions.get(user_id)
+        if session is not None:
+            await session.stop()
+            if self.sessions.get(user_id) is session and not session.is_alive():
+                self._closed[user_id] = time.monotonic()
+        self._evict_closed()
+        return session
+
+    async def remove(self, user_id):
+        session = await self.close(user_id)
+        self._closed.pop(user_id, None)
+        self.sessions.pop(user_id, None)
+        return session
+
+    async def close_all(self):
+        await asyncio.gather(*(self.close(user_id) for user_id in list(self.sessions)))
+        if self.pool is not None:
+            await self.pool.close()
+
+    def stats(self):
+        sessions = list(self.sessions.values())
+        stats = {
+            "sessions": len(sessions),
+            "connected": sum(1 for s in sessions if s.is_alive()),
+        }
+        if self.pool is not None:
+            stats["pool"] = self.pool.stats()
+        return stats
+
+
+session_manager = STTSessionManager()
+async_session_manager = AsyncSTTSessionManager()
+
+
+def find_session(user_id):
+    """The user's session from whichever manager (thread or asyncio) hosts it."""
+    return session_manager.get(user_id) or async_session_manager.get(user_id)
+
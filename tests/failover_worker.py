@@ -0,0 +1,63 @@
+"""
+A router worker for tests/test_session_failover.py: the real questionagent,
+evaluation_agent, llmconnection and sessionstate modules, with the external
+services replaced by tests/stubs.py and Redis by a SQLite file shared between
+the worker processes (FAILOVER_STORE).
+"""
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+WORKER_ID = os.environ["WORKER_ID"]
+stubs.install(os.environ["FAILOVER_STORE"])
+
+import llmconnection  # noqa: E402
+import questionagent  # noqa: E402
+
+
+def _answer(user_id, answer):
+    """One interview turn, as speechtotext runs it: next question, then the conversation memory."""
+    result = questionagent.get_question_endpoint(answer, user_id)
+    llmconnection.process_message(answer, user_id)
+    return result
+
+
+async def send_msg(request):
+    data = await request.json()
+    result = await asyncio.to_thread(_answer, data["userId"], data.get("answer", ""))
+    return web.json_response({**result, "worker": WORKER_ID})
+
+
+async def session(request):
+    """What this worker holds in memory for the user."""
+    user_id = request.query["userId"]
+    agent = questionagent.agents.get(user_id)
+    evaluator = questionagent.evaluators.get(user_id)
+    memory = llmconnection.sessions_memory.get(user_id)
+    return web.json_response({
+        "worker": WORKER_ID,
+        "agent": agent.to_state() if agent else None,
+        "evaluator": evaluator.to_state() if evaluator else None,
+        "question_asked": questionagent.question_asked.get(user_id),
+        "memory": stubs.messages_to_dict(memory.chat_memory.messages) if memory else None,
+    })
+
+
+async def stats(request):
+    return web.json_response({"worker": WORKER_ID})
+
+
+app = web.Application()
+app.router.add_post("/send-msg", send_msg)
+app.router.add_get("/session", session)
+app.router.add_get("/server/stats", stats)
+
+if __name__ == "__main__":
+    web.run_app(app, host="localhost", port=int(os.environ["HTTP_PORT"]), print=None)
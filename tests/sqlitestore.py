@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+
+
+class SQLiteRedis:
+    """
+    The subset of redis.Redis (strings, hashes, lists, pipelines) that the
+    interview modules use, backed by one SQLite file so that separate worker
+    processes share it. TTLs are accepted and ignored. Test-only.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._db() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB)")
+            db.execute("CREATE TABLE IF NOT EXISTS hash (key TEXT, field TEXT, value BLOB, PRIMARY KEY (key, field))")
+            db.execute("CREATE TABLE IF NOT EXISTS list (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, value BLOB)")
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return db
+
+    # --- strings ---
+    def get(self, key):
+        row = self._db().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ex=None):
+        self._db().execute("INSERT OR REPLACE INTO kv VALUES (?, ?)", (key, value))
+        return True
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, *keys):
+        with self._db() as db:
+            for key in keys:
+                for table in ("kv", "hash", "list"):
+                    db.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+
+    # --- hashes ---
+    def hset(self, key, mapping):
+        with self._db() as db:
+            db.executemany("INSERT OR REPLACE INTO hash VALUES (?, ?, ?)",
+                           [(key, field, value) for field, value in mapping.items()])
+        return len(mapping)
+
+    def hincrby(self, key, field, amount=1):
+        with self._db() as db:
+            value = int(self.hget(key, field) or 0) + amount
+            db.execute("INSERT OR REPLACE INTO hash VALUES (?, ?, ?)", (key, field, str(value)))
+        return value
+
+    def hget(self, key, field):
+        row = self._db().execute("SELECT value FROM hash WHERE key = ? AND field = ?", (key, field)).fetchone()
+        return row[0] if row else None
+
+    def hmget(self, key, *fields):
+        return [self.hget(key, field) for field in fields]
+
+    def hgetall(self, key):
+        return dict(self._db().execute("SELECT field, value FROM hash WHERE key = ?", (key,)).fetchall())
+
+    # --- lists ---
+    def rpush(self, key, value):
+        self._db().execute("INSERT INTO list (key, value) VALUES (?, ?)", (key, value))
+
+    def lrange(self, key, start, end):
+        values = [row[0] for row in self._db().execute("SELECT value FROM list WHERE key = ? ORDER BY id", (key,))]
+        return values[start:None if end == -1 else end + 1]
+
+    def pipeline(self):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, store):
+        self.store = store
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self.store, name)(*args, **kwargs) for name, args, kwargs in self.calls]
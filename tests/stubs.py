@@ -0,0 +1,171 @@
+"""
+Deterministic stand-ins for the external services the interview modules
+import at module level (OpenAI, Pinecone, langchain, Google TTS, PyAudio),
+and Redis backed by a SQLite file (tests/sqlitestore.py). Call install()
+before importing those modules; test-only.
+"""
+import hashlib
+import json
+import os
+import sys
+import types
+
+import redis
+
+from sqlitestore import SQLiteRedis
+
+_installed = None
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def _obj(**attrs):
+    return types.SimpleNamespace(**attrs)
+
+
+def mp3_frames(count, header=b"\xff\xfb\x90\x00", frame_length=417):
+    """`count` silent MPEG-1 layer III frames (44.1 kHz, 128 kbps), 1152 samples each."""
+    return (header + bytes(frame_length - 4)) * count
+
+
+# --- OpenAI ---
+def _chat_create(model, messages, temperature=None):
+    prompt = messages[-1]["content"]
+    if "strict JSON" in prompt:
+        content = json.dumps({"score": 70, "summary": "ok", "next_stage": "intermediate", "weak_areas": []})
+    else:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        content = f"Question {digest} from {os.getenv('WORKER_ID', 'test')}?"
+    return _obj(choices=[_obj(message=_obj(content=content))], usage=_obj(total_tokens=10))
+
+
+def _embed_create(model, input):
+    seed = hashlib.sha256(input.encode("utf-8")).digest()
+    return _obj(data=[_obj(embedding=[b / 255 for b in seed] * 32)])  # 1024 values
+
+
+# --- Pinecone ---
+class _Index:
+    def query(self, **kwargs):
+        return _obj(matches=[])
+
+    def upsert(self, vectors):
+        pass
+
+
+class _Pinecone:
+    def __init__(self, api_key=None):
+        pass
+
+    def list_indexes(self):
+        return [{"name": "topic-summary"}]
+
+    def Index(self, name):
+        return _Index()
+
+
+# --- langchain (conversation memory only) ---
+class _Message:
+    def __init__(self, type, content):
+        self.type = type
+        self.content = content
+
+
+class _ChatMemory:
+    def __init__(self):
+        self.messages = []
+
+    def add_user_message(self, content):
+        self.messages.append(_Message("human", content))
+
+    def add_ai_message(self, content):
+        self.messages.append(_Message("ai", content))
+
+
+class _ConversationBufferMemory:
+    def __init__(self, memory_key=None, return_messages=False):
+        self.chat_memory = _ChatMemory()
+
+
+class _ConversationChain:
+    def __init__(self, llm, memory, verbose=False):
+        self.memory = memory
+
+    def run(self, message):
+        reply = f"Noted: {message}"
+        self.memory.chat_memory.add_user_message(message)
+        self.memory.chat_memory.add_ai_message(reply)
+        return reply
+
+
+def messages_to_dict(messages):
+    return [{"type": m.type, "data": {"content": m.content}} for m in messages]
+
+
+def _messages_from_dict(data):
+    return [_Message(m["type"], m["data"]["content"]) for m in data]
+
+
+# --- Google TTS: one 26ms silent frame per character ---
+class _TextToSpeechClient:
+    requests = []
+
+    @classmethod
+    def from_service_account_file(cls, path):
+        return cls()
+
+    def synthesize_speech(self, input, voice, audio_config):
+        _TextToSpeechClient.requests.append(input.text)
+        return _obj(audio_content=mp3_frames(max(len(input.text), 1)))
+
+
+def install(store_path):
+    """Install the stand-ins; every Redis client the modules create talks to the SQLite file at store_path."""
+    global _installed
+    if _installed is not None:
+        return _installed
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    os.environ.setdefault("EMBEDDING_CACHE_REDIS_URL", "")
+    os.environ.setdefault("TTS_CACHE_DIR", os.path.join(os.path.dirname(store_path), "tts_cache"))
+    store = SQLiteRedis(store_path)
+
+    class StoreClient:
+        def __new__(cls, *args, **kwargs):
+            return store
+
+        @staticmethod
+        def from_url(*args, **kwargs):
+            return store
+
+    redis.Redis = StoreClient
+
+    _module("openai", api_key=None, OpenAI=lambda **kwargs: None,
+            chat=_obj(completions=_obj(create=_chat_create)), embeddings=_obj(create=_embed_create))
+    _module("pinecone", Pinecone=_Pinecone, ServerlessSpec=object)
+    _module("langchain")
+    _module("langchain.chat_models", ChatOpenAI=lambda **kwargs: None)
+    _module("langchain.memory", ConversationBufferMemory=_ConversationBufferMemory)
+    _module("langchain.schema", messages_to_dict=messages_to_dict, messages_from_dict=_messages_from_dict)
+    _module("langchain.chains", ConversationChain=_ConversationChain)
+
+    tts = _module(
+        "google.cloud.texttospeech",
+        TextToSpeechClient=_TextToSpeechClient,
+        SynthesisInput=lambda text: _obj(text=text),
+        VoiceSelectionParams=lambda **kwargs: _obj(**kwargs),
+        AudioConfig=lambda **kwargs: _obj(**kwargs),
+        AudioEncoding={"MP3": "MP3", "LINEAR16": "LINEAR16"},
+    )
+    google = sys.modules.get("google") or _module("google")
+    cloud = _module("google.cloud", texttospeech=tts)
+    google.cloud = cloud
+
+    _module("pyaudio", paInt16=8, PyAudio=object)
+    _installed = store
+    return store
+
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import websockets.exceptions
+from aiohttp.test_utils import TestClient, TestServer
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def asyncserver(tmp_path_factory):
+    stubs.install(str(tmp_path_factory.mktemp("asyncserver") / "store.sqlite3"))
+    import asyncserver
+    return asyncserver
+
+
+def _flask_app(events):
+    app = Flask(__name__)
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return jsonify({
+            "body": request.get_json(),
+            "args": request.args.to_dict(),
+            "header": request.headers.get("X-Test"),
+        }), 201, {"X-Reply": "yes"}
+
+    @app.route("/stream")
+    def stream():
+        def lines():
+            try:
+                for i in range(int(request.args["count"])):
+                    # request.args is read on every chunk: the request context survives between them
+                    events.append(threading.current_thread().name)
+                    yield f"{request.args['prefix']}{i}\n"
+            finally:
+                events.append("closed")
+
+        return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+    return app
+
+
+def _run(asyncserver, scenario, ws_handler=None):
+    events = []
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="test-http")
+
+    async def no_websocket(websocket):
+        raise AssertionError("unexpected websocket")
+
+    async def main():
+        app = asyncserver.build_app(_flask_app(events), ws_handler or no_websocket, executor)
+        async with TestClient(TestServer(app)) as client:
+            return await asyncio.wait_for(scenario(client), 10)
+
+    try:
+        return asyncio.run(main()), events
+    finally:
+        executor.shutdown()
+
+
+def test_a_flask_response_keeps_its_status_headers_and_body(asyncserver):
+    async def scenario(client):
+        response = await client.post("/echo?mode=json", json={"a": 1}, headers={"X-Test": "sent"})
+        return response.status, response.headers.get("X-Reply"), await response.json()
+
+    (status, reply, body), _ = _run(asyncserver, scenario)
+    assert status == 201 and reply == "yes"
+    assert body == {"body": {"a": 1}, "args": {"mode": "json"}, "header": "sent"}
+    assert asyncserver.server_stats["http_in_flight"] == 0
+
+
+def test_a_streamed_body_is_pulled_chunk_by_chunk_on_the_executor(asyncserver):
+    async def scenario(client):
+        response = await client.get("/stream?count=3&prefix=line-")
+        chunks = []
+        async for line in response.content:
+            chunks.append(line.decode())
+        return response.headers["Content-Type"], chunks
+
+    (content_type, chunks), events = _run(asyncserver, scenario)
+    assert content_type.startswith("application/x-ndjson")
+    assert chunks == ["line-0\n", "line-1\n", "line-2\n"]
+    assert events[:3] and all(name.startswith("test-http") for name in events[:3])
+    assert events[-1] == "closed"  # the WSGI response was closed after the last chunk
+
+
+def test_the_websocket_handler_gets_the_path_and_both_frame_types(asyncserver):
+    received = []
+
+    async def handler(websocket):
+        received.append(websocket.request.path)
+        async for message in websocket:
+            received.append(message)
+            await websocket.send(message)
+
+    async def scenario(client):
+        async with client.ws_connect("/?userId=ws-user") as ws:
+            await ws.send_str('{"userId": "ws-user"}')
+            text = await ws.receive_str()
+            await ws.send_bytes(b"\x00\x01")
+            data = await ws.receive_bytes()
+        return text, data
+
+    (text, data), _ = _run(asyncserver, scenario, handler)
+    assert (text, data) == ('{"userId": "ws-user"}', b"\x00\x01")
+    assert received == ["/?userId=ws-user", '{"userId": "ws-user"}', b"\x00\x01"]
+
+
+def test_sending_on_a_closed_websocket_raises_connection_closed(asyncserver):
+    outcome = []
+
+    async def handler(websocket):
+        async for _ in websocket:
+            pass
+        try:
+            await websocket.send("too late")
+        except websockets.exceptions.ConnectionClosed as e:
+            outcome.append(type(e))
+
+    async def scenario(client):
+        async with client.ws_connect("/") as ws:
+            await ws.send_str("bye")
+        for _ in range(100):
+            if outcome:
+                break
+            await asyncio.sleep(0.01)
+        stats = await (await client.get("/server/stats")).json()
+        return stats
+
+    stats, _ = _run(asyncserver, scenario, handler)
+    assert outcome == [websockets.exceptions.ConnectionClosedOK]
+    assert stats["websockets"] == 0 and stats["websockets_total"] >= 1
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from audiobuffer import POLICY_BLOCK, POLICY_DROP, POLICY_MERGE, CoalescingAudioBuffer
+
+MS = 32  # bytes per ms of 16 kHz 16-bit mono
+
+
+class Upstream:
+    """Records what the buffer sends; each send takes `delay` seconds."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, data, is_binary):
+        self.sent.append((data, is_binary))
+        await asyncio.sleep(self.delay)
+
+    @property
+    def audio(self):
+        return [data for data, is_binary in self.sent if is_binary]
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def test_small_messages_are_coalesced_into_chunks():
+    async def scenario():
+        upstream = Upstream()
+        buffer = CoalescingAudioBuffer(upstream.send, chunk_min_ms=50, chunk_max_ms=100).start()
+        for i in range(50):  # 1s in 20ms messages, faster than real time
+            await buffer.put(bytes([i]) * 20 * MS)
+        await buffer.close()
+        return upstream, buffer
+
+    upstream, buffer = _run(scenario())
+    assert b"".join(upstream.audio) == b"".join(bytes([i]) * 20 * MS for i in range(50))
+    assert all(len(chunk) <= 100 * MS for chunk in upstream.audio)
+    assert len(upstream.audio) < 50
+    assert buffer.stats()["dropped_ms"] == 0
+
+
+def test_control_messages_follow_the_audio_queued_before_them():
+    async def scenario():
+        upstream = Upstream()
+        buffer = CoalescingAudioBuffer(upstream.send).start()
+        await buffer.put(b"\x01" * 10 * MS)
+        await buffer.put_control('{"type": "ForceEndpoint"}')
+        await buffer.put(b"\x02" * 10 * MS)
+        await buffer.close()
+        return upstream
+
+    sent = _run(scenario()).sent
+    assert sent[0] == (b"\x01" * 10 * MS, True)  # flushed early, below chunk_min
+    assert sent[1] == ('{"type": "ForceEndpoint"}', False)
+    assert sent[2] == (b"\x02" * 10 * MS, True)
+
+
+def _overload(policy):
+    """2s of audio in real time, in 20ms messages, to an upstream that takes 150ms per send."""
+    async def scenario():
+        upstream = Upstream(delay=0.15)
+        buffer = CoalescingAudioBuffer(upstream.send, policy=policy, max_ms=300).start()
+        for _ in range(100):
+            await buffer.put(b"\x00" * 20 * MS)
+            await asyncio.sleep(0.02)
+        await buffer.close(timeout=10)
+        return upstream, buffer.stats()
+
+    return _run(scenario())
+
+
+def test_block_policy_applies_backpressure_without_loss():
+    upstream, stats = _overload(POLICY_BLOCK)
+    assert sum(len(chunk) for chunk in upstream.audio) == 2000 * MS
+    assert stats["dropped_ms"] == 0
+    assert stats["blocked_seconds"] > 0
+    assert stats["max_depth_ms"] <= 300
+
+
+def test_drop_policy_discards_the_oldest_audio():
+    upstream, stats = _overload(POLICY_DROP)
+    assert stats["dropped_ms"] > 0
+    assert sum(len(chunk) for chunk in upstream.audio) == 2000 * MS - stats["dropped_ms"] * MS
+    assert stats["blocked_seconds"] == 0
+    assert stats["max_depth_ms"] <= 300
+
+
+def test_merge_policy_catches_up_with_bigger_chunks():
+    upstream, stats = _overload(POLICY_MERGE)
+    assert stats["dropped_ms"] == 0
+    assert sum(len(chunk) for chunk in upstream.audio) == 2000 * MS
+    assert max(len(chunk) for chunk in upstream.audio) > 100 * MS
+    assert stats["blocked_seconds"] == 0
+
+
+@pytest.mark.parametrize("policy", [POLICY_BLOCK, POLICY_DROP, POLICY_MERGE])
+def test_message_larger_than_the_buffer_is_split_not_stuck(policy):
+    async def scenario():
+        upstream = Upstream()
+        buffer = CoalescingAudioBuffer(upstream.send, policy=policy, max_ms=100).start()
+        assert await buffer.put(b"\x03" * 1000 * MS)
+        await buffer.close()
+        return upstream, buffer
+
+    upstream, buffer = _run(scenario())
+    if policy == POLICY_BLOCK:
+        assert b"".join(upstream.audio) == b"\x03" * 1000 * MS
+    assert buffer.stats()["messages_in"] == 1
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        CoalescingAudioBuffer(Upstream().send, policy="spill")
@@ -0,0 +1,36 @@
+import pytest
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from audiotransport import TRANSPORT_JSON, TRANSPORT_MULTIPART, negotiate_transport, wants_stream
+
+
+def _accept(header):
+    return parse_accept_header(header, MIMEAccept)
+
+
+@pytest.mark.parametrize("header, transport", [
+    ("multipart/mixed", TRANSPORT_MULTIPART),
+    ("multipart/mixed, application/json;q=0.5", TRANSPORT_MULTIPART),
+    ("application/json, multipart/mixed;q=0.5", TRANSPORT_JSON),
+    # same quality: JSON stays the default
+    ("application/json, multipart/mixed", TRANSPORT_JSON),
+    ("*/*", TRANSPORT_JSON),
+    ("", TRANSPORT_JSON),
+    ("multipart/mixed;q=0", TRANSPORT_JSON),
+    # a wildcard ranked above the explicit type must not pick multipart on its own
+    ("*/*, multipart/mixed;q=0.1", TRANSPORT_JSON),
+])
+def test_negotiate_transport(header, transport):
+    assert negotiate_transport(_accept(header)) == transport
+
+
+@pytest.mark.parametrize("header, stream", [
+    ("application/x-ndjson", True),
+    ("application/x-ndjson;q=0.9, application/json;q=0.8", True),
+    ("application/json, application/x-ndjson;q=0.8", False),
+    ("*/*", False),
+    ("application/x-ndjson;q=0", False),
+])
+def test_wants_stream(header, stream):
+    assert wants_stream(_accept(header)) is stream
@@ -0,0 +1,79 @@
+import json
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+USER_ID = "auto-endpoint-user"
+PAYLOAD = {
+    "question": {"technical": {"topics": ["Java basics", "Collections"], "patterns": ["concept", "follow_up"]}},
+    "role": "Java Developer",
+    "experience": "3 years",
+}
+
+
+@pytest.fixture(scope="module")
+def modules(tmp_path_factory):
+    store = stubs.install(str(tmp_path_factory.mktemp("auto_endpoint") / "store.sqlite3"))
+    import questionagent
+    import speechtotext
+    store.set(USER_ID, json.dumps(PAYLOAD))
+    return speechtotext, questionagent
+
+
+@pytest.fixture
+def session(modules, monkeypatch):
+    speechtotext, questionagent = modules
+    from transcriptstore import TranscriptStore
+    questionagent.agents.pop(USER_ID, None)
+    questionagent.question_asked.pop(USER_ID, None)
+    session = types.SimpleNamespace(user_id=USER_ID, transcripts=TranscriptStore())
+    monkeypatch.setattr(speechtotext, "_session_for", lambda userid: session)
+    monkeypatch.setattr(speechtotext, "synthesize", lambda text: None)
+    speechtotext._generate_question(USER_ID)  # the first question: speculation starts with the second
+    return session
+
+
+def _speculated_answer(questionagent):
+    speculation = questionagent.agents[USER_ID]._speculation
+    return speculation[1] if speculation else None
+
+
+def test_auto_endpoint_question_is_used_when_the_answer_is_unchanged(modules, session):
+    speechtotext, questionagent = modules
+    session.transcripts.update(0, "i use a hash map", end_of_turn=True)
+    assert speechtotext.auto_endpoint(USER_ID)
+    hits = questionagent.speculation_stats["hits"]
+
+    session.transcripts.update(0, "I use a hash map.", end_of_turn=True)  # the formatted re-send
+    speechtotext._generate_question(USER_ID)
+    assert questionagent.speculation_stats["hits"] == hits + 1
+
+
+def test_auto_endpoint_question_is_dropped_when_the_candidate_says_more(modules, session):
+    speechtotext, questionagent = modules
+    session.transcripts.update(0, "i use", end_of_turn=False)
+    assert speechtotext.auto_endpoint(USER_ID)
+    assert _speculated_answer(questionagent) == "i use"
+    hits = questionagent.speculation_stats["hits"]
+
+    # same turn, more words: the question above was built from part of the answer
+    session.transcripts.update(0, "i use a hash map for lookups", end_of_turn=True)
+    result = speechtotext._generate_question(USER_ID)
+    assert questionagent.speculation_stats["hits"] == hits
+    assert result and USER_ID not in speechtotext.auto_spoken
+
+
+def test_auto_endpoint_restarts_a_speculation_from_an_earlier_pause(modules, session):
+    speechtotext, questionagent = modules
+    session.transcripts.update(0, "i would use a hash map because lookups are constant time", end_of_turn=True)
+    questionagent.speculate_question(USER_ID, session.transcripts.answer_text())
+    session.transcripts.update(1, "on average", end_of_turn=True)
+
+    speechtotext.auto_endpoint(USER_ID)
+    assert _speculated_answer(questionagent) == session.transcripts.answer_text()
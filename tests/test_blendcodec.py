@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+import pytest
+
+from blendcodec import decode_phoneme_blend, decode_weights, encode_blend_timeline, encode_phoneme_blend
+from getphenome import BLENDSHAPE_NAMES, build_blend_data, build_blend_timeline
+
+PHONEMES = ["h", "ə", "l", "oʊ", "w", "ɜː", "l", "d", "p", "b", "m"]
+
+
+def _assert_same_blend_data(decoded, expected, tolerance):
+    assert len(decoded) == len(expected)
+    for got, want in zip(decoded, expected):
+        assert got["phoneme"] == want["phoneme"]
+        assert got["time"] == pytest.approx(want["time"], abs=0.005)
+        for name in BLENDSHAPE_NAMES:
+            assert got[name] == pytest.approx(want.get(name, 0.0), abs=tolerance)
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("uint8", 0.5 / 255 + 1e-3), ("float16", 1e-3)])
+def test_phoneme_blend_round_trip(dtype, tolerance):
+    payload = encode_phoneme_blend(PHONEMES, 1.7, dtype=dtype)
+    # what goes over the wire is plain JSON
+    payload = json.loads(json.dumps(payload))
+    _assert_same_blend_data(decode_phoneme_blend(payload), build_blend_data(PHONEMES, 1.7), tolerance)
+
+
+def test_phoneme_blend_round_trip_keeps_aligned_times():
+    times = [0.0, 0.12, 0.3, 0.31, 0.8, 0.95, 1.2, 1.21, 1.4, 1.5, 1.66]
+    payload = encode_phoneme_blend(PHONEMES, 1.7, times=times)
+    _assert_same_blend_data(decode_phoneme_blend(payload), build_blend_data(PHONEMES, 1.7, times=times),
+                            0.5 / 255 + 1e-3)
+
+
+def test_phoneme_blend_round_trip_empty():
+    assert decode_phoneme_blend(encode_phoneme_blend([], 0.0)) == []
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("uint8", 0.5 / 255 + 1e-6), ("float16", 1e-3)])
+def test_blend_timeline_round_trip(dtype, tolerance):
+    frames = build_blend_timeline(PHONEMES, 1.7)
+    payload = json.loads(json.dumps(encode_blend_timeline(frames, 30, dtype=dtype)))
+    decoded = decode_weights(payload)
+    assert decoded.shape == frames.shape
+    np.testing.assert_allclose(decoded, frames, atol=tolerance)
+
+
+def test_unknown_weight_dtype_is_rejected():
+    with pytest.raises(ValueError):
+        encode_phoneme_blend(PHONEMES, 1.0, dtype="float64")
@@ -0,0 +1,78 @@
+import os
+import sys
+import types
+
+import pytest
+
+from embeddingcache import EmbeddingCache, embedding_cache_key
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+
+def test_embedding_cache_key_separates_models_and_dimensions():
+    keys = {
+        embedding_cache_key("text-embedding-3-small", 1024, "Java Collections"),
+        embedding_cache_key("text-embedding-3-large", 1024, "Java Collections"),
+        embedding_cache_key("text-embedding-3-small", 512, "Java Collections"),
+        embedding_cache_key("text-embedding-3-small", 1024, "Java collections"),
+    }
+    assert len(keys) == 4
+
+
+def test_embedding_cache_embeds_each_text_once():
+    cache = EmbeddingCache(redis_url="")
+    calls = []
+
+    def embed():
+        calls.append(1)
+        return [0.25] * 8
+
+    first = cache.get_or_embed("model", 8, "Java Collections", embed)
+    second = cache.get_or_embed("model", 8, "Java Collections", embed)
+    assert first == second == [0.25] * 8
+    assert len(calls) == 1
+    assert cache.get_or_embed("model", 8, "failing", lambda: None) is None
+    assert cache.stats()["memory_hits"] == 1
+
+
+@pytest.fixture
+def evaluation_agent(tmp_path, monkeypatch):
+    stubs.install(str(tmp_path / "store.sqlite3"))
+    import evaluation_agent
+    monkeypatch.setattr(evaluation_agent, "embedding_cache", EmbeddingCache(redis_url=""))
+    calls = []
+
+    def create(model, input):
+        calls.append(input)
+        return types.SimpleNamespace(data=[types.SimpleNamespace(embedding=[0.5] * 1536)])
+
+    monkeypatch.setattr(evaluation_agent.openai.embeddings, "create", create)
+    return evaluation_agent, calls
+
+
+def test_request_embedding_normalizes_and_only_caches_on_request(evaluation_agent):
+    module, calls = evaluation_agent
+    vector = module._request_embedding("Java Collections")
+    assert vector == [0.5] * module.EMBEDDING_DIMENSION
+    module._request_embedding("Java Collections")
+    assert len(calls) == 2  # use_cache is opt-in
+
+    assert module._request_embedding("Java Collections", use_cache=True) == vector
+    assert module._request_embedding("Java Collections", use_cache=True) == vector
+    assert len(calls) == 3
+
+
+def test_question_agent_embeds_through_the_cache_and_survives_api_errors(evaluation_agent, monkeypatch):
+    module, calls = evaluation_agent
+    import questionagent
+    agent = questionagent.QuestionPatternAgent.__new__(questionagent.QuestionPatternAgent)
+    assert agent._embed_text("Concurrency") == agent._embed_text("Concurrency")
+    assert calls == ["Concurrency"]
+
+    def failing(model, input):
+        raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(module.openai.embeddings, "create", failing)
+    assert agent._embed_text("Streams") is None
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from espeakpool import EspeakPool
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = []
+
+    def phonemize(self, lines, separator=None, strip=True):
+        self.calls.append(lines)
+        return [f"ipa:{line}" for line in lines]
+
+
+class FakePool(EspeakPool):
+    """EspeakPool without espeak: each new backend is a FakeBackend."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.backends = []
+
+    def _new_backend(self):
+        backend = FakeBackend()
+        self.backends.append(backend)
+        return backend
+
+
+def test_sequential_calls_reuse_one_backend():
+    pool = FakePool(size=4, timeout=1)
+    for text in ("one", "two", "three"):
+        assert pool.phonemize([text]) == [f"ipa:{text}"]
+
+    assert len(pool.backends) == 1
+    assert pool.backends[0].calls == [["one"], ["two"], ["three"]]
+    assert pool.stats()["created"] == 1 and pool.stats()["idle"] == 1
+
+
+def test_texts_are_kept_on_one_line():
+    pool = FakePool(size=1, timeout=1)
+    assert pool.phonemize(["Explain\nthe church"]) == ["ipa:Explain the church"]
+
+
+def test_a_caller_beyond_the_pool_size_times_out():
+    pool = FakePool(size=2, timeout=0.1)
+    with pool.acquire(), pool.acquire():
+        assert pool.stats()["in_use"] == 2
+        with pytest.raises(TimeoutError):
+            with pool.acquire():
+                pass
+
+    stats = pool.stats()
+    assert stats["created"] == 2
+    assert stats["timeouts"] == 1 and stats["waits"] == 1
+    assert stats["in_use"] == 0 and stats["idle"] == 2
+
+
+def test_a_waiting_caller_gets_the_released_backend():
+    pool = FakePool(size=1, timeout=5)
+    acquired = threading.Event()
+    got = []
+
+    def waiter():
+        acquired.wait()
+        with pool.acquire() as backend:
+            got.append(backend)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    with pool.acquire() as backend:
+        acquired.set()
+        time.sleep(0.05)  # the waiter is now blocked on the queue
+    thread.join(5)
+
+    assert got == [backend]
+    assert pool.stats()["waits"] == 1 and pool.stats()["timeouts"] == 0
+
+
+def test_a_failed_backend_start_frees_its_slot():
+    pool = FakePool(size=1, timeout=0.1)
+    new_backend = pool._new_backend
+
+    def broken():
+        raise RuntimeError("espeak not installed")
+
+    pool._new_backend = broken
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+    assert pool.stats()["created"] == 0
+
+    pool._new_backend = new_backend
+    assert pool.phonemize(["hi"]) == ["ipa:hi"]  # the slot was not lost
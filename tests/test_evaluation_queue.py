@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def questionagent(tmp_path_factory):
+    stubs.install(str(tmp_path_factory.mktemp("evaluation_queue") / "store.sqlite3"))
+    import questionagent
+    return questionagent
+
+
+def test_each_users_evaluations_run_one_at_a_time_in_order(questionagent, monkeypatch):
+    done = {"a": [], "b": []}
+    running = {"a": 0, "b": 0}
+    overlaps = []
+    lock = threading.Lock()
+
+    def evaluate(evaluator, question, answer, topic, user_id):
+        with lock:
+            running[user_id] += 1
+            if running[user_id] > 1:
+                overlaps.append(user_id)
+        time.sleep(random.uniform(0, 0.01))  # later evaluations would often overtake earlier ones
+        with lock:
+            running[user_id] -= 1
+            done[user_id].append(question)
+
+    monkeypatch.setattr(questionagent, "_evaluate", evaluate)
+    futures = [questionagent._queue_evaluation(user, None, i, "answer", "topic")
+               for i in range(20) for user in ("a", "b")]
+    for future in futures:
+        future.result(timeout=10)
+
+    assert done == {"a": list(range(20)), "b": list(range(20))}
+    assert overlaps == []
+    assert questionagent.evaluation_tails == {}
+
+
+def test_a_failed_evaluation_does_not_stall_the_users_queue(questionagent, monkeypatch, capsys):
+    evaluated = []
+
+    def evaluate(evaluator, question, answer, topic, user_id):
+        if question == "bad":
+            raise ValueError("no score")
+        evaluated.append(question)
+
+    monkeypatch.setattr(questionagent, "_evaluate", evaluate)
+    futures = [questionagent._queue_evaluation("c", None, question, "answer", "topic")
+               for question in ("first", "bad", "last")]
+    for future in futures:
+        future.result(timeout=10)
+
+    assert evaluated == ["first", "last"]
+    assert "Evaluation failed for c" in capsys.readouterr().out
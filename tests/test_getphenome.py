@@ -0,0 +1,74 @@
+import pytest
+
+import getphenome
+from getphenome import MULTI_CHAR_PHONEMES, PHONEME_PATTERN, generate_phonemes, generate_phonemes_batch, tokenize_ipa
+from phonemecache import PhonemeCache
+
+# What espeak returns for the texts below (en-us)
+IPA = {
+    "Hello world": "həlˈoʊ wˈɜːld",
+    "Explain the church": "ɛksplˈeɪn ðə tʃˈɜːtʃ",
+    "Judge my choice!": "dʒˈʌdʒ maɪ tʃˈɔɪs!",
+}
+
+
+@pytest.mark.parametrize("ipa, expected", [
+    ("tʃɜːtʃ", ["tʃ", "ɜː", "tʃ"]),
+    ("dʒʌdʒ", ["dʒ", "ʌ", "dʒ"]),
+    ("maɪ tʃɔɪs", ["m", "aɪ", "tʃ", "ɔɪ", "s"]),
+    ("iːuːɑːɔː", ["iː", "uː", "ɑː", "ɔː"]),
+    ("ɪə ʊə əʊ eɪ aʊ", ["ɪə", "ʊə", "əʊ", "eɪ", "aʊ"]),
+])
+def test_multi_character_symbols_take_the_longest_match(ipa, expected):
+    assert tokenize_ipa(ipa) == expected
+
+
+def test_stress_marks_and_punctuation_are_not_phonemes():
+    assert tokenize_ipa("həlˈoʊ, wˈɜːld!") == ["h", "ə", "l", "oʊ", "w", "ɜː", "l", "d"]
+    assert tokenize_ipa("ˌʌndɚstˈænd.") == ["ʌ", "n", "d", "ɚ", "s", "t", "æ", "n", "d"]
+
+
+def test_unknown_symbols_become_single_character_tokens():
+    # e.g. espeak's en-us "ɹ" and "ɚ", which have no entry in the map
+    assert tokenize_ipa("ɹɚ") == ["ɹ", "ɚ"]
+    assert tokenize_ipa("") == []
+
+
+def test_pattern_prefers_every_multi_character_phoneme_over_its_prefix():
+    for phoneme in MULTI_CHAR_PHONEMES:
+        assert PHONEME_PATTERN.match(phoneme).group() == phoneme
+
+
+@pytest.fixture
+def fake_espeak(monkeypatch, tmp_path):
+    calls = []
+
+    def phonemize(texts, strip=True):
+        calls.append(list(texts))
+        return [IPA[text] for text in texts]
+
+    monkeypatch.setattr(getphenome.espeak_pool, "phonemize", phonemize)
+    monkeypatch.setattr(getphenome, "phoneme_cache", PhonemeCache(path=str(tmp_path / "phonemes.sqlite3")))
+    return calls
+
+
+def test_batch_output_equals_per_item_output(fake_espeak):
+    texts = list(IPA)
+    durations = [1.0, 1.5, 0.8]
+    batch = generate_phonemes_batch(texts, durations)
+
+    getphenome.phoneme_cache.clear()
+    assert batch == [generate_phonemes(text, duration) for text, duration in zip(texts, durations)]
+    assert fake_espeak[0] == texts  # the batch was one espeak call
+
+
+def test_batch_only_phonemizes_cache_misses(fake_espeak):
+    generate_phonemes("Hello world", 1.0)
+    generate_phonemes_batch(["Hello world", "Judge my choice!", "Hello world"], [1.0, 1.0, 2.0])
+    assert fake_espeak == [["Hello world"], ["Judge my choice!"]]
+
+
+def test_batch_validates_its_arguments(fake_espeak):
+    assert generate_phonemes_batch([], []) == []
+    with pytest.raises(ValueError):
+        generate_phonemes_batch(["Hello world"], [1.0, 2.0])
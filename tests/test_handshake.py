@@ -0,0 +1,110 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+FRAME = b"\x00" * 640  # 20ms of 16 kHz int16 audio
+
+
+@pytest.fixture(scope="module")
+def handshake(tmp_path_factory):
+    stubs.install(str(tmp_path_factory.mktemp("handshake") / "store.sqlite3"))
+    import handshake
+    return handshake
+
+
+async def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+def _run(handshake, monkeypatch, scenario):
+    """Run scenario(url, server) against handshake.handler, bridged to a LocalSTTServer."""
+    from localstt import LocalSTTServer
+    from sttsession import AsyncSTTSessionManager
+
+    async def main():
+        server = await LocalSTTServer().serve()
+        manager = AsyncSTTSessionManager(endpoint=server.url, key="local", record=False)
+        monkeypatch.setattr(handshake, "STT_BRIDGE", "async")
+        monkeypatch.setattr(handshake, "async_session_manager", manager)
+        try:
+            async with websockets.serve(handshake.handler, "localhost", 0) as front:
+                url = f"ws://localhost:{front.sockets[0].getsockname()[1]}"
+                return await asyncio.wait_for(scenario(url, server), 20)
+        finally:
+            await manager.close_all()
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_disconnect_releases_the_connections_per_user_state(handshake, monkeypatch):
+    monkeypatch.setattr(handshake, "VAD_ENABLED", True)
+
+    async def scenario(url, server):
+        async with websockets.connect(f"{url}/?userId=leaver") as client:
+            for _ in range(5):
+                await client.send(FRAME)
+            assert await _wait_until(lambda: "leaver" in handshake.audio_buffers)
+            assert "leaver" in handshake.audio_ingests
+            assert "leaver" in handshake.vad_detectors
+        assert await _wait_until(lambda: "leaver" not in handshake.audio_buffers)
+        assert "leaver" not in handshake.audio_ingests
+        assert "leaver" not in handshake.vad_detectors
+
+    _run(handshake, monkeypatch, scenario)
+
+
+def test_a_newer_connection_keeps_its_state_when_an_older_one_closes(handshake, monkeypatch):
+    async def scenario(url, server):
+        old = await websockets.connect(f"{url}/?userId=twice")
+        await old.send(FRAME)
+        assert await _wait_until(lambda: "twice" in handshake.audio_buffers)
+        older = handshake.audio_buffers["twice"]
+        async with websockets.connect(f"{url}/?userId=twice") as new:
+            await new.send(FRAME)
+            assert await _wait_until(lambda: handshake.audio_buffers["twice"] is not older)
+            newer = handshake.audio_buffers["twice"]
+            await old.close()
+            await asyncio.sleep(0.2)
+            assert handshake.audio_buffers.get("twice") is newer
+            assert "twice" in handshake.audio_ingests
+        assert await _wait_until(lambda: "twice" not in handshake.audio_buffers)
+
+    _run(handshake, monkeypatch, scenario)
+
+
+def test_rebinding_moves_the_ingest_to_the_new_user(handshake, monkeypatch):
+    async def scenario(url, server):
+        async with websockets.connect(f"{url}/?userId=first") as client:
+            await client.send(FRAME)
+            assert await _wait_until(lambda: "first" in handshake.audio_ingests)
+            ingest = handshake.audio_ingests["first"]
+            await client.send('{"userId": "second"}')
+            assert await _wait_until(lambda: handshake.audio_ingests.get("second") is ingest)
+            assert "first" not in handshake.audio_ingests
+        assert await _wait_until(lambda: "second" not in handshake.audio_ingests)
+
+    _run(handshake, monkeypatch, scenario)
+
+
+def test_a_pending_end_of_answer_is_dropped_on_disconnect(handshake, monkeypatch):
+    async def scenario(url, server):
+        async with websockets.connect(f"{url}/?userId=early") as client:
+            await client.send(FRAME)
+            assert await _wait_until(lambda: "early" in handshake.audio_buffers)
+            handshake.end_of_answer_at["early"] = time.monotonic()  # EndOfAnswer sent, /send-msg not yet
+        assert await _wait_until(lambda: "early" not in handshake.audio_buffers)
+        assert "early" not in handshake.end_of_answer_at
+
+    _run(handshake, monkeypatch, scenario)
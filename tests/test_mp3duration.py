@@ -0,0 +1,74 @@
+import struct
+
+import pytest
+
+from mp3duration import mp3_duration
+
+STEREO = b"\xff\xfb\x90\x00"  # MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo
+MONO = b"\xff\xfb\x90\xc0"
+FRAME_LENGTH = 417
+SAMPLES = 1152
+RATE = 44100
+
+
+def frames(count, header=STEREO):
+    return (header + bytes(FRAME_LENGTH - 4)) * count
+
+
+def tag_frame(kind=b"Info", frame_count=None, delay=0, padding=0, header=STEREO, lame=True):
+    """A Xing/Info frame as LAME writes it: side info, tag, optional frame count, then the LAME tag."""
+    side_info = 17 if header == MONO else 32
+    body = bytes(side_info) + kind
+    if frame_count is None:
+        body += struct.pack(">I", 8)  # quality field only
+    else:
+        body += struct.pack(">II", 1 | 8, frame_count)
+    body += bytes(4)  # quality
+    if lame:
+        gap = bytes([delay >> 4, ((delay & 0x0F) << 4) | (padding >> 8), padding & 0xFF])
+        body += b"LAME3.100" + bytes(12) + gap
+    frame = header + body
+    return frame + bytes(FRAME_LENGTH - len(frame))
+
+
+def test_cbr_duration_walks_the_frame_headers():
+    assert mp3_duration(frames(10)) == pytest.approx(10 * SAMPLES / RATE)
+
+
+def test_xing_frame_count_is_used_without_walking():
+    # the stream is short, but the Xing header says how many frames the whole file has
+    data = tag_frame(b"Xing", frame_count=100, lame=False) + frames(3)
+    assert mp3_duration(data) == pytest.approx(100 * SAMPLES / RATE)
+
+
+def test_lame_delay_and_padding_are_subtracted():
+    data = tag_frame(b"Info", frame_count=10, delay=576, padding=1000) + frames(10)
+    assert mp3_duration(data) == pytest.approx((10 * SAMPLES - 576 - 1000) / RATE)
+
+
+def test_an_info_frame_without_a_count_is_not_counted_as_audio():
+    data = tag_frame(b"Info", delay=576, padding=1000) + frames(10)
+    assert mp3_duration(data) == pytest.approx((10 * SAMPLES - 576 - 1000) / RATE)
+
+
+def test_mono_streams_find_the_tag_after_the_shorter_side_info():
+    data = tag_frame(b"Xing", frame_count=20, delay=576, padding=0, header=MONO) + frames(2, MONO)
+    assert mp3_duration(data) == pytest.approx((20 * SAMPLES - 576) / RATE)
+
+
+def test_vbri_frame_count():
+    frame = bytearray(frames(1))
+    frame[36:40] = b"VBRI"
+    frame[50:54] = struct.pack(">I", 40)
+    assert mp3_duration(bytes(frame) + frames(2)) == pytest.approx(40 * SAMPLES / RATE)
+
+
+def test_id3_tags_and_trailing_junk_are_skipped():
+    id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x20" + bytes(32)
+    id3v1 = b"TAG" + bytes(125)
+    assert mp3_duration(id3v2 + frames(5) + id3v1) == pytest.approx(5 * SAMPLES / RATE)
+
+
+@pytest.mark.parametrize("data", [b"", b"not an mp3 at all", bytes(1000)])
+def test_no_frames_returns_none(data):
+    assert mp3_duration(data) is None
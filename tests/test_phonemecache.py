@@ -0,0 +1,50 @@
+import pytest
+
+from phonemecache import PhonemeCache, normalize_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("What is a HashMap?", "What is a HashMap?"),
+    ("  What is\ta\n HashMap?  ", "What is a HashMap?"),
+    ("cafe\u0301", "caf\u00e9"),  # decomposed é -> NFC
+    ("", ""),
+    (None, ""),
+])
+def test_normalize_text(text, expected):
+    assert normalize_text(text) == expected
+
+
+def test_normalize_text_keeps_case():
+    # "API" is spelled out, "api" is not: they must not share a pronunciation
+    assert normalize_text("API") != normalize_text("api")
+
+
+def test_phoneme_cache_shares_entries_between_spacing_variants_only(tmp_path):
+    cache = PhonemeCache(path=str(tmp_path / "phonemes.sqlite3"))
+    cache.put("Explain  the API", "en-us", "ɛksplˈeɪn", ["ɛ", "k"])
+    assert cache.get("Explain the API\n", "en-us") == ("ɛksplˈeɪn", ["ɛ", "k"])
+    assert cache.get("explain the api", "en-us") is None
+    assert cache.get("Explain the API", "en-gb") is None
+
+    # the SQLite tier survives a new process
+    reopened = PhonemeCache(path=str(tmp_path / "phonemes.sqlite3"))
+    assert reopened.get("Explain the API", "en-us") == ("ɛksplˈeɪn", ["ɛ", "k"])
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_phoneme_cache_opens_its_database_lazily(tmp_path):
+    path = tmp_path / "nested" / "phonemes.sqlite3"
+    cache = PhonemeCache(path=str(path))
+    assert not path.exists()
+    cache.get("hello", "en-us")
+    assert path.exists()
+
+
+def test_a_broken_database_is_a_miss_not_an_error(tmp_path):
+    cache = PhonemeCache(path=str(tmp_path / "phonemes.sqlite3"))
+    cache.put("Hello", "en-us", "həlˈoʊ", ["h", "ə", "l", "oʊ"])
+    cache._db.execute("DROP TABLE phonemes")
+
+    assert cache.get("World", "en-us") is None
+    assert cache.get("Hello", "en-us") == ("həlˈoʊ", ["h", "ə", "l", "oʊ"])  # still in memory
+    assert cache.stats()["misses"] == 1
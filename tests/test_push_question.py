@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+import websockets.exceptions
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def modules(tmp_path_factory):
+    stubs.install(str(tmp_path_factory.mktemp("push_question") / "store.sqlite3"))
+    import handshake
+    import speechtotext
+    import texttospeech
+    return handshake, speechtotext, texttospeech
+
+
+class RecordingWebSocket:
+    """Collects what _push_question sends; optionally closes after `close_after` messages."""
+
+    def __init__(self, close_after=None):
+        self.sent = []
+        self.close_after = close_after
+
+    async def send(self, message):
+        if self.close_after is not None and len(self.sent) >= self.close_after:
+            raise websockets.exceptions.ConnectionClosedOK(None, None)
+        self.sent.append(message)
+
+
+def _fake_parts(parts, error=None):
+    state = {"closed": False}
+
+    def push_question(user_id, blend_format, stream):
+        try:
+            yield from parts
+            if error is not None:
+                raise error
+        finally:
+            state["closed"] = True
+
+    return push_question, state
+
+
+def _push(handshake, websocket, **options):
+    asyncio.run(asyncio.wait_for(handshake._push_question(websocket, "push-user", **options), 10))
+
+
+async def _closed_soon(state):
+    for _ in range(100):
+        if state["closed"]:
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+def test_each_part_is_a_question_message_then_its_audio(modules, monkeypatch):
+    handshake, _, _ = modules
+    parts = [({"question": "One.", "duration": 1.0}, b"mp3-one"), ({"question": "Two.", "duration": 2.0}, b"mp3-2")]
+    push_question, state = _fake_parts(parts)
+    monkeypatch.setattr(handshake, "push_question", push_question)
+    latencies = len(handshake.turn_latencies["push_request"])
+
+    websocket = RecordingWebSocket()
+    _push(handshake, websocket, stream=True)
+
+    assert [json.loads(m) if isinstance(m, str) else m for m in websocket.sent] == [
+        {"type": "Question", "question": "One.", "duration": 1.0, "audioBytes": 7}, b"mp3-one",
+        {"type": "Question", "question": "Two.", "duration": 2.0, "audioBytes": 5}, b"mp3-2",
+    ]
+    assert len(handshake.turn_latencies["push_request"]) == latencies + 1  # time to the first part only
+    assert state["closed"]
+
+
+def test_a_failure_is_reported_as_a_question_error(modules, monkeypatch, capsys):
+    handshake, _, _ = modules
+    push_question, state = _fake_parts([({"question": "One."}, b"mp3")], ValueError("synthesis failed"))
+    monkeypatch.setattr(handshake, "push_question", push_question)
+
+    websocket = RecordingWebSocket()
+    _push(handshake, websocket, stream=True)
+
+    assert json.loads(websocket.sent[-1]) == {"type": "QuestionError", "error": "synthesis failed"}
+    assert websocket.sent[:2] == [json.dumps({"type": "Question", "question": "One.", "audioBytes": 3}), b"mp3"]
+    assert "Could not push question (push-user)" in capsys.readouterr().out
+    assert state["closed"]
+
+
+def test_a_closed_websocket_stops_the_push_quietly(modules, monkeypatch, capsys):
+    handshake, _, _ = modules
+    push_question, state = _fake_parts([({"question": "One."}, b"a"), ({"question": "Two."}, b"b")])
+    monkeypatch.setattr(handshake, "push_question", push_question)
+
+    websocket = RecordingWebSocket(close_after=1)
+    _push(handshake, websocket, stream=True)
+
+    assert len(websocket.sent) == 1
+    assert "Could not push question" not in capsys.readouterr().out
+    assert asyncio.run(_closed_soon(state))  # the generator is closed on its own thread
+
+
+@pytest.mark.parametrize("stream, pairs", [(False, 1), (True, 2)])
+def test_generated_questions_carry_blend_data_and_their_audio_size(modules, monkeypatch, stream, pairs):
+    handshake, speechtotext, texttospeech = modules
+    question = "Tell me how a hash map works. What happens when it resizes?"
+    monkeypatch.setattr(speechtotext, "_generate_question", lambda userid: question)
+    monkeypatch.setattr(speechtotext, "_stop_messages", lambda userid: None)
+    monkeypatch.setattr(speechtotext, "prefetch_question", lambda userid, warm=None: None)
+    monkeypatch.setattr(texttospeech, "get_phonemes", lambda text: ["h", "ɛ", "l", "oʊ"])
+    monkeypatch.setattr(texttospeech, "ALIGNMENT_ENABLED", False)
+
+    websocket = RecordingWebSocket()
+    _push(handshake, websocket, stream=stream)
+
+    assert len(websocket.sent) == 2 * pairs
+    for metadata, audio in zip(websocket.sent[::2], websocket.sent[1::2]):
+        metadata = json.loads(metadata)
+        assert metadata["type"] == "Question" and metadata["blendData"]
+        assert metadata["audioBytes"] == len(audio) > 0
+        assert metadata["question"] == question
+    if stream:
+        assert [json.loads(m)["text"] for m in websocket.sent[::2]] == [
+            "Tell me how a hash map works.", "What happens when it resizes?"]
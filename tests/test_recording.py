@@ -0,0 +1,113 @@
+import struct
+import threading
+import time
+import wave
+
+import recording
+from recording import WavRecorder
+
+CHUNK = b"\x01\x02" * 800  # 50ms of 16 kHz int16 audio
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def _header_sizes(path):
+    with open(path, "rb") as f:
+        header = f.read(recording.HEADER_BYTES)
+    if len(header) < recording.HEADER_BYTES:
+        return None  # still buffered: nothing flushed yet
+    return struct.unpack("<I", header[4:8])[0], struct.unpack("<I", header[40:44])[0]
+
+
+class BlockingFile:
+    """Stands in for a slow disk: the first write blocks until released."""
+
+    def __init__(self, file):
+        self.file = file
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, data):
+        self.entered.set()
+        self.release.wait(5)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+class BrokenFile:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, data):
+        raise OSError("disk full")
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_close_writes_a_valid_wav(tmp_path):
+    recorder = WavRecorder(str(tmp_path / "answer.wav"))
+    for _ in range(10):
+        assert recorder.write(CHUNK)
+    path = recorder.close(timeout=5)
+
+    with wave.open(path) as f:
+        assert (f.getframerate(), f.getnchannels(), f.getsampwidth()) == (16000, 1, 2)
+        assert f.readframes(f.getnframes()) == CHUNK * 10
+    assert recorder.duration_seconds == 0.5
+    assert not recorder.write(CHUNK)  # closed
+
+
+def test_header_sizes_are_patched_while_recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(recording, "HEADER_PATCH_INTERVAL", 0.05)
+    recorder = WavRecorder(str(tmp_path / "live.wav"))
+    try:
+        for _ in range(4):
+            recorder.write(CHUNK)
+        # a crash now would leave a readable file: the header already counts the audio
+        expected = 4 * len(CHUNK)
+        assert _wait_for(lambda: _header_sizes(recorder.path) == (36 + expected, expected))
+    finally:
+        recorder.close(timeout=5)
+
+
+def test_chunks_beyond_the_queue_bound_are_dropped_and_counted(tmp_path):
+    slow = WavRecorder(str(tmp_path / "slow.wav"))
+    blocking = BlockingFile(slow._file)
+    slow._file = blocking
+    slow.write(CHUNK)
+    assert blocking.entered.wait(5)  # the writer thread is stuck on this disk
+
+    bounded = WavRecorder(str(tmp_path / "bounded.wav"), max_chunks=2)
+    results = [bounded.write(CHUNK) for _ in range(5)]
+    blocking.release.set()
+    slow.close(timeout=5)
+    bounded.close(timeout=5)
+
+    assert results == [True, True, False, False, False]
+    assert bounded.dropped_chunks == 3
+    assert bounded.data_bytes == 2 * len(CHUNK)
+
+
+def test_a_failing_recording_does_not_stop_the_others(tmp_path, capsys):
+    broken = WavRecorder(str(tmp_path / "broken.wav"))
+    broken._file = BrokenFile(broken._file)
+    healthy = WavRecorder(str(tmp_path / "healthy.wav"))
+
+    broken.write(CHUNK)
+    assert broken._done.wait(5)  # closed by the writer thread after the error
+    for _ in range(3):
+        healthy.write(CHUNK)
+    healthy.close(timeout=5)
+
+    assert not broken.write(CHUNK)
+    assert "Recording error, closing" in capsys.readouterr().out
+    with wave.open(healthy.path) as f:
+        assert f.getnframes() * 2 == 3 * len(CHUNK)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from audioingest import ENCODING_FLOAT32, ENCODING_PCM16, AudioIngest, PolyphaseResampler
+
+
+def _gain_db(in_rate, freq, seconds=1.0, out_rate=16000, frame=480):
+    """Steady-state gain of a streamed sine through the resampler."""
+    t = np.arange(int(seconds * in_rate)) / in_rate
+    tone = np.sin(2 * np.pi * freq * t).astype(np.float32)
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    out = np.concatenate([resampler.process(tone[i:i + frame]) for i in range(0, len(tone), frame)])
+    steady = out[len(out) // 4: -len(out) // 4]  # skip the filter's start-up and tail
+    rms = np.sqrt(np.mean(steady.astype(np.float64) ** 2))
+    return 20 * np.log10(rms / np.sqrt(0.5) + 1e-12)
+
+
+@pytest.mark.parametrize("in_rate", [48000, 44100, 22050])
+@pytest.mark.parametrize("freq", [100, 1000, 3400, 6500])
+def test_passband_is_flat(in_rate, freq):
+    assert abs(_gain_db(in_rate, freq)) < 0.1
+
+
+@pytest.mark.parametrize("in_rate", [48000, 44100])
+@pytest.mark.parametrize("freq", [9000, 12000, 15000, 20000])
+def test_stopband_is_attenuated(in_rate, freq):
+    # above the 8 kHz output Nyquist these would alias back into the speech band
+    assert _gain_db(in_rate, freq) < -60
+
+
+def test_output_length_follows_the_rate_ratio_across_frames():
+    resampler = PolyphaseResampler(44100, 16000)
+    total = sum(len(resampler.process(np.zeros(n, dtype=np.float32))) for n in (441, 1000, 7, 2048, 4410))
+    assert abs(total - (441 + 1000 + 7 + 2048 + 4410) * 16000 / 44100) <= 1
+
+
+def test_streaming_matches_one_shot():
+    rng = np.random.default_rng(0)
+    signal = rng.uniform(-0.5, 0.5, 48000).astype(np.float32)
+    whole = PolyphaseResampler(48000).process(signal)
+    streamed = PolyphaseResampler(48000)
+    parts = np.concatenate([streamed.process(signal[i:i + 333]) for i in range(0, len(signal), 333)])
+    np.testing.assert_allclose(parts, whole, atol=1e-5)
+
+
+def test_pcm16_at_16khz_passes_through_untouched():
+    message = bytes(range(256)) * 4
+    assert AudioIngest(ENCODING_PCM16, 16000, 1).process(message) is message
+
+
+def test_float32_stereo_is_downmixed_and_converted():
+    left = np.full(4800, 0.5, dtype="<f4")
+    stereo = np.stack([left, np.zeros_like(left)], axis=1).reshape(-1).tobytes()  # right channel silent
+    ingest = AudioIngest(ENCODING_FLOAT32, 48000, 2)
+    pcm = np.frombuffer(b"".join(ingest.process(stereo) for _ in range(5)), dtype="<i2")
+    assert len(pcm) == pytest.approx(5 * 1600, abs=1)
+    assert np.median(pcm[len(pcm) // 2:]) == pytest.approx(0.25 * 32767, abs=40)
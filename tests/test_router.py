@@ -0,0 +1,62 @@
+from collections import Counter
+
+import pytest
+
+from router import HashRing
+
+USERS = [f"user-{i}" for i in range(5000)]
+
+
+def _assignments(ring):
+    return {user: ring.node_for(user) for user in USERS}
+
+
+def test_routing_is_deterministic():
+    first = _assignments(HashRing(["w0", "w1", "w2"]))
+    # a new ring (e.g. a restarted router) built in any order routes everyone the same way
+    assert _assignments(HashRing(["w2", "w0", "w1"])) == first
+
+
+def test_removing_a_worker_only_moves_its_users():
+    ring = HashRing(["w0", "w1", "w2", "w3"])
+    before = _assignments(ring)
+    ring.remove("w2")
+    after = _assignments(ring)
+
+    moved = {user for user in USERS if before[user] != after[user]}
+    assert moved == {user for user in USERS if before[user] == "w2"}
+    assert "w2" not in after.values()
+
+
+def test_a_worker_coming_back_gets_its_users_back():
+    ring = HashRing(["w0", "w1", "w2"])
+    before = _assignments(ring)
+    ring.remove("w1")
+    ring.add("w1")
+    assert _assignments(ring) == before
+
+
+def test_adding_a_worker_only_takes_users_for_itself():
+    ring = HashRing(["w0", "w1", "w2"])
+    before = _assignments(ring)
+    ring.add("w3")
+    after = _assignments(ring)
+
+    moved = [user for user in USERS if before[user] != after[user]]
+    assert all(after[user] == "w3" for user in moved)
+    assert len(moved) == pytest.approx(len(USERS) / 4, rel=0.3)
+
+
+def test_users_are_spread_evenly():
+    counts = Counter(_assignments(HashRing([f"w{i}" for i in range(4)])).values())
+    assert len(counts) == 4
+    assert max(counts.values()) < 1.35 * len(USERS) / 4
+
+
+def test_adding_twice_and_empty_ring():
+    ring = HashRing()
+    assert ring.node_for("anyone") is None
+    ring.add("w0")
+    ring.add("w0")
+    assert len(ring._hashes) == ring.replicas
+    assert ring.node_for("anyone") == "w0"
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+import router
+from sqlitestore import SQLiteRedis
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "failover_worker.py")
+USER_ID = "failover-user"
+PAYLOAD = {
+    "question": {
+        "Java": {
+            "Collections": ["Definition-based", "Scenario-based"],
+            "Concurrency": ["Definition-based", "Scenario-based"],
+        }
+    },
+    "role": "Java Developer",
+    "experience": "3 years",
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+async def _wait(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+
+def test_session_moves_between_workers_mid_interview(tmp_path, monkeypatch):
+    store_path = str(tmp_path / "store.sqlite3")
+    store = SQLiteRedis(store_path)
+    store.set(USER_ID, json.dumps(PAYLOAD))
+    monkeypatch.setenv("FAILOVER_STORE", store_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("EMBEDDING_CACHE_REDIS_URL", "")
+    monkeypatch.setenv("SPECULATIVE_QUESTIONS", "0")
+    monkeypatch.setattr(router, "WORKER_RESTART", False)
+    monkeypatch.setattr(router, "WORKER_HEALTH_SECONDS", 0.2)
+
+    def evaluated(question):
+        saved = store.hget(f"session:{USER_ID}", "evaluator")
+        return saved is not None and any(qa["question"] == question for qa in
+                                         json.loads(saved)["questions_under_topic"])
+
+    async def scenario():
+        workers = [router.Worker(f"w{i}", _free_port(), [sys.executable, WORKER_SCRIPT]) for i in range(2)]
+        front = router.Router(workers)
+        await front.start()
+        runner = web.AppRunner(front.build_app())
+        await runner.setup()
+        port = _free_port()
+        await web.TCPSite(runner, "localhost", port).start()
+        url = f"http://localhost:{port}"
+        try:
+            assert await _wait(lambda: len(set(front.ring._nodes)) == 2), "workers did not start"
+
+            async with aiohttp.ClientSession() as client:
+                async def ask(answer):
+                    async with client.post(f"{url}/send-msg", json={"userId": USER_ID, "answer": answer}) as r:
+                        assert r.status == 200
+                        return await r.json()
+
+                first = await ask("")
+                second = await ask("HashMap buckets keys by hash")
+                assert first["worker"] == second["worker"], "userId routing is not sticky"
+                old = front.workers[first["worker"]]
+                # the first question is evaluated in the background; let it reach the store
+                assert await _wait(lambda: evaluated(first["question"]))
+
+                # the old worker stops answering (but keeps its memory): the router moves the user
+                old.process.send_signal(signal.SIGSTOP)
+                try:
+                    assert await _wait(lambda: old.worker_id not in front.ring), "worker was not marked down"
+                    third = await ask("ConcurrentHashMap locks per bin")
+                    assert third["worker"] != old.worker_id, "session did not move"
+                    assert await _wait(lambda: evaluated(second["question"]))
+                    async with client.get(f"{url}/session", params={"userId": USER_ID}) as r:
+                        moved = await r.json()
+                finally:
+                    old.process.send_signal(signal.SIGCONT)
+
+                # ... and back: the old worker's copy of every field is out of date
+                assert await _wait(lambda: old.worker_id in front.ring), "worker did not come back"
+                fourth = await ask("Streams are lazy until a terminal operation")
+                assert fourth["worker"] == old.worker_id, "session did not move back"
+                async with client.get(f"{url}/session", params={"userId": USER_ID}) as r:
+                    back = await r.json()
+        finally:
+            await runner.cleanup()
+            await front.close()
+
+        assert moved["worker"] == third["worker"]
+        # agent: two questions per topic, so the third question is the first of the second topic
+        assert moved["agent"]["current_topic_index"] == 1
+        assert moved["agent"]["question_count"] == 1
+        # current question
+        assert moved["question_asked"] == third["question"]
+        # evaluator: the first topic's Q&A was recorded on the old worker and scored here when the topic changed
+        assert "Collections" in moved["evaluator"]["topics"]
+        assert [qa["question"] for qa in moved["evaluator"]["questions_under_topic"]] == [second["question"]]
+        # conversation memory: every answer, including those given to the old worker
+        said = [m["data"]["content"] for m in moved["memory"] if m["type"] == "human"]
+        assert said[-3:] == ["", "HashMap buckets keys by hash", "ConcurrentHashMap locks per bin"]
+
+        # back on the old worker, nothing it held from before the move survives
+        assert back["worker"] == old.worker_id
+        # agent: the fourth question finished the second topic
+        assert back["agent"]["current_topic_index"] == 2
+        assert back["agent"]["question_count"] == 0
+        assert back["question_asked"] == fourth["question"]
+        said = [m["data"]["content"] for m in back["memory"] if m["type"] == "human"]
+        assert said[-4:] == ["", "HashMap buckets keys by hash", "ConcurrentHashMap locks per bin",
+                             "Streams are lazy until a terminal operation"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from localstt import LocalSTTServer
+from sttsession import AsyncSTTSessionManager, STTSessionManager
+
+FRAME_BYTES = 1600  # 50ms of 16 kHz int16 audio
+SESSIONS = 12
+THREAD_SESSIONS = 6  # websocket-client sessions close one by one, about a second each
+TIMEOUT = 10
+
+
+def _frames(index):
+    """Each session sends a different amount of audio, so a transcript shows whose audio it got."""
+    return 10 + index
+
+
+def _expected(index):
+    return f"received {_frames(index) * FRAME_BYTES} bytes"
+
+
+def _wait_for(predicate, timeout=TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.fixture
+def server():
+    server = LocalSTTServer().start()
+    yield server
+    server.stop()
+
+
+def test_parallel_thread_sessions_receive_only_their_own_audio(server):
+    manager = STTSessionManager(endpoint=server.url, key="local", record=False)
+    transcripts = {}
+
+    def run_session(index):
+        session = manager.get_or_create(f"user-{index}")
+        if not session.wait_connected(TIMEOUT):
+            return
+        for _ in range(_frames(index)):
+            session.send(b"\x00" * FRAME_BYTES, is_binary=True)
+            time.sleep(0.005)
+        session.send({"type": "ForceEndpoint"})
+        _wait_for(lambda: session.transcript == _expected(index))
+        transcripts[index] = session.transcript
+
+    threads = [threading.Thread(target=run_session, args=(i,)) for i in range(THREAD_SESSIONS)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(TIMEOUT * 2)
+    finally:
+        manager.close_all()
+
+    assert transcripts == {i: _expected(i) for i in range(THREAD_SESSIONS)}
+    assert server.connections == THREAD_SESSIONS
+    assert server.bytes_received == sum(_frames(i) * FRAME_BYTES for i in range(THREAD_SESSIONS))
+
+
+def test_async_sessions_on_one_loop_receive_only_their_own_audio():
+    """All sessions and the stand-in server share one event loop, as in handshake.py."""
+    async def run_session(manager, index):
+        session = await manager.get_or_create(f"user-{index}")
+        for _ in range(_frames(index)):
+            await session.send(b"\x00" * FRAME_BYTES, is_binary=True)
+            await asyncio.sleep(0.005)
+        await session.send({"type": "ForceEndpoint"})
+        deadline = time.monotonic() + TIMEOUT
+        while session.transcript != _expected(index) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        return session.transcript
+
+    async def scenario():
+        server = await LocalSTTServer().serve()
+        manager = AsyncSTTSessionManager(endpoint=server.url, key="local", record=False)
+        threads_before = threading.active_count()
+        try:
+            transcripts = await asyncio.gather(*(run_session(manager, i) for i in range(SESSIONS)))
+            extra_threads = threading.active_count() - threads_before
+        finally:
+            await manager.close_all()
+            await server.close()
+        return transcripts, extra_threads, server
+
+    transcripts, extra_threads, server = asyncio.run(scenario())
+    assert transcripts == [_expected(i) for i in range(SESSIONS)]
+    assert server.connections == SESSIONS
+    assert extra_threads < SESSIONS  # no thread per session (the loop's resolver pool is a few)
+
+
+def test_closed_sessions_stay_readable_then_are_evicted(server):
+    manager = STTSessionManager(endpoint=server.url, key="local", record=False, closed_seconds=60)
+    session = manager.get_or_create("user-a")
+    assert session.wait_connected(TIMEOUT)
+    manager.close("user-a")
+    assert manager.get("user-a") is session  # /send-msg can still read the transcript
+
+    manager.closed_seconds = 0
+    manager.get_or_create("user-b").wait_connected(TIMEOUT)
+    try:
+        assert manager.get("user-a") is None
+        assert manager.get("user-b") is not None  # open sessions are never evicted
+    finally:
+        manager.close_all()
+
+
+def test_async_manager_evicts_closed_sessions_but_not_reopened_ones():
+    async def scenario():
+        server = await LocalSTTServer().serve()
+        manager = AsyncSTTSessionManager(endpoint=server.url, key="local", record=False, closed_seconds=0)
+        try:
+            first = await manager.get_or_create("user-a")
+            await manager.close("user-a")
+            assert manager.get("user-a") is None  # closed_seconds=0: evicted on close
+
+            again = await manager.get_or_create("user-a")
+            assert again is not first and again.is_alive()
+            await manager.close("user-b")  # a sweep: the reopened session stays
+            assert manager.get("user-a") is again
+        finally:
+            await manager.close_all()
+            await server.close()
+        return manager
+
+    manager = asyncio.run(scenario())
+    assert manager.sessions == {} and manager._closed == {}
@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+import pytest
+import websockets
+
+from localstt import LocalSTTServer
+from sttpool import STTConnectionPool
+from sttsession import AsyncSTTSessionManager
+
+FRAME = b"\x00" * 1600
+
+
+async def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+def _run(scenario, **server_options):
+    async def main():
+        server = await LocalSTTServer(**server_options).serve()
+        try:
+            return await asyncio.wait_for(scenario(server), 20)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_sessions_take_warm_connections_and_the_pool_refills():
+    async def scenario(server):
+        manager = AsyncSTTSessionManager(endpoint=server.url, key="local", record=False, pool_size=2)
+        await manager.start_pool()
+        try:
+            assert await _wait_until(lambda: len(manager.pool._idle) == 2), "pool did not fill"
+            dialed = server.connections
+            for i in range(3):
+                session = await manager.get_or_create(f"user-{i}")
+                assert await session.send(FRAME, is_binary=True)
+                assert await _wait_until(lambda: len(manager.pool._idle) == 2), "pool did not refill"
+            await session.send({"type": "ForceEndpoint"})
+            assert await _wait_until(lambda: session.transcript == f"received {len(FRAME)} bytes")
+            # every session started on a pooled connection; each take opened one replacement
+            assert server.connections == dialed + 3
+            return manager.stats()["pool"]
+        finally:
+            await manager.close_all()
+
+    stats = _run(scenario, handshake_delay=0.05)
+    assert stats["hits"] == 3
+    assert stats["misses"] == 0
+
+
+def test_an_empty_pool_is_a_miss_and_the_session_dials():
+    async def scenario(server):
+        pool = STTConnectionPool(server.url, "local", size=1)
+        assert pool.take() is None  # not started: nothing open yet
+        return pool.stats()
+
+    stats = _run(scenario)
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.0
+
+
+def test_dropped_connections_are_replaced():
+    async def scenario(server):
+        pool = await STTConnectionPool(server.url, "local", size=2, idle_seconds=60, health_seconds=0.1).start()
+        try:
+            assert await _wait_until(lambda: len(pool._idle) == 2)
+            first = set(pool._idle)
+            await server.disconnect_all()  # upstream drops the idle connections
+            assert await _wait_until(lambda: pool.stats_counters["unhealthy"] >= 2 and len(pool._idle) == 2)
+            assert not first & set(pool._idle)
+            assert all(connection.is_open() for connection in pool._idle)
+        finally:
+            await pool.close()
+
+    _run(scenario)
+
+
+def test_a_closed_connection_is_never_handed_out():
+    async def scenario(server):
+        pool = await STTConnectionPool(server.url, "local", size=1, health_seconds=60).start()
+        try:
+            assert await _wait_until(lambda: len(pool._idle) == 1)
+            await pool._idle[0].ws.close()
+            assert pool.take() is None
+            assert await _wait_until(lambda: len(pool._idle) == 1)  # refilled after the miss
+            connection = pool.take()
+            assert connection is not None and connection.is_open()
+            await pool._retire(connection)
+        finally:
+            await pool.close()
+
+    _run(scenario)
+
+
+def test_idle_connections_expire_and_are_refilled():
+    async def scenario(server):
+        pool = await STTConnectionPool(server.url, "local", size=2, idle_seconds=0.3, health_seconds=0.1).start()
+        try:
+            assert await _wait_until(lambda: len(pool._idle) == 2)
+            first = set(pool._idle)
+            opened = pool.stats_counters["opened"]
+            assert await _wait_until(lambda: pool.stats_counters["expired"] >= 2
+                                     and pool.stats_counters["opened"] >= opened + 2 and len(pool._idle) == 2)
+            assert not first & set(pool._idle)
+            # the upstream sessions of recycled connections were ended
+            assert await _wait_until(lambda: server.active == len(pool._idle))
+        finally:
+            await pool.close()
+        assert await _wait_until(lambda: server.active == 0)
+
+    _run(scenario)
+
+
+def test_close_stops_refilling():
+    async def scenario(server):
+        pool = await STTConnectionPool(server.url, "local", size=2).start()
+        assert await _wait_until(lambda: len(pool._idle) == 2)
+        await pool.close()
+        assert pool._task.done()
+        assert pool._idle == []
+        return pool
+
+    pool = _run(scenario)
+    with pytest.raises(asyncio.CancelledError):
+        pool._task.result()
+
+
+@pytest.mark.parametrize("first_frame", ["not json", "[]", '{"type": "Error"}'])
+def test_a_bad_begin_frame_counts_as_an_open_failure(first_frame):
+    async def handler(websocket):
+        await websocket.send(first_frame)
+        await websocket.wait_closed()
+
+    async def scenario():
+        async with websockets.serve(handler, "localhost", 0) as server:
+            url = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            pool = STTConnectionPool(url, "local", size=1)
+            await pool._open()
+            return pool
+
+    pool = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert pool.stats_counters["open_failures"] == 1
+    assert pool._idle == [] and pool._opening == 0
+
+
+def test_a_failing_maintenance_pass_does_not_stop_the_pool(monkeypatch):
+    async def scenario(server):
+        pool = STTConnectionPool(server.url, "local", size=1, health_seconds=0.05)
+        health_check = pool._health_check
+        failures = []
+
+        async def flaky_health_check():
+            if not failures:
+                failures.append(True)
+                raise RuntimeError("boom")
+            await health_check()
+
+        monkeypatch.setattr(pool, "_health_check", flaky_health_check)
+        await pool.start()
+        try:
+            # the first pass fails; after its backoff the task is still there and fills the pool
+            assert await _wait_until(lambda: len(pool._idle) == 1, timeout=5)
+            assert not pool._task.done()
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    stats = _run(scenario)
+    assert stats["maintenance_errors"] == 1
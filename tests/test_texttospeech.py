@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubs  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def modules(tmp_path_factory):
+    stubs.install(str(tmp_path_factory.mktemp("texttospeech") / "store.sqlite3"))
+    import handshake
+    import speechtotext
+    import texttospeech
+    return texttospeech, speechtotext, handshake
+
+
+def test_every_tts_entry_point_rejects_empty_text(modules):
+    texttospeech, _, _ = modules
+    with texttospeech.app.app_context():
+        response, status = texttospeech.ttsblend("")
+    assert status == 400
+    assert response.get_json() == {"error": "Text is required"}
+    for parts in (texttospeech.ttsblend_parts, texttospeech.ttsblend_stream_parts, texttospeech.ttsblend_stream):
+        with pytest.raises(ValueError, match="Text is required"):
+            parts("")  # before any chunk is requested
+
+
+@pytest.fixture
+def no_question(modules, monkeypatch):
+    _, speechtotext, handshake = modules
+    monkeypatch.setattr(speechtotext, "_generate_question", lambda userid: "")
+    monkeypatch.setattr(speechtotext, "_stop_messages", lambda userid: None)
+    return speechtotext, handshake
+
+
+@pytest.mark.parametrize("query, headers", [
+    ("", {}),
+    ("?stream=1", {}),
+    ("", {"Accept": "application/x-ndjson"}),
+    ("", {"Accept": "multipart/mixed"}),
+])
+def test_send_msg_answers_an_empty_question_with_a_400_on_every_transport(no_question, query, headers):
+    _, handshake = no_question
+    response = handshake.app.test_client().post(f"/send-msg{query}", json={"userId": "u"}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Text is required"}
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_push_question_raises_the_same_error(no_question, stream):
+    speechtotext, _ = no_question
+    with pytest.raises(ValueError, match="Text is required"):
+        next(speechtotext.push_question("u", stream=stream))
+
+
+@pytest.fixture
+def timed_pipeline(modules, monkeypatch):
+    """Record when synthesis and phonemization start and end; each takes 0.1s."""
+    texttospeech, _, _ = modules
+    events = []
+    synthesize_speech = texttospeech.client.synthesize_speech
+
+    def slow_synthesis(**kwargs):
+        events.append("synthesis start")
+        time.sleep(0.1)
+        events.append("synthesis end")
+        return synthesize_speech(**kwargs)
+
+    def slow_phonemes(text):
+        events.append("phonemes start")
+        time.sleep(0.1)
+        events.append("phonemes end")
+        return ["h", "ə", "l", "oʊ"]
+
+    monkeypatch.setattr(texttospeech.client, "synthesize_speech", slow_synthesis)
+    monkeypatch.setattr(texttospeech, "get_phonemes", slow_phonemes)
+    monkeypatch.setattr(texttospeech, "ALIGNMENT_ENABLED", False)
+    return texttospeech, events
+
+
+def test_phonemes_are_computed_while_the_audio_is_synthesized(timed_pipeline, monkeypatch):
+    texttospeech, events = timed_pipeline
+    monkeypatch.setattr(texttospeech, "PARALLEL_PHONEMIZE", True)
+    audio, duration, phonemes, times = texttospeech.synthesize("Hello there.", use_cache=False)
+
+    assert phonemes == ["h", "ə", "l", "oʊ"] and duration > 0 and times is None
+    assert events.index("phonemes start") < events.index("synthesis end")
+    assert events.index("synthesis start") < events.index("phonemes end")
+
+
+def test_sequential_mode_phonemizes_after_synthesis(timed_pipeline, monkeypatch):
+    texttospeech, events = timed_pipeline
+    monkeypatch.setattr(texttospeech, "PARALLEL_PHONEMIZE", False)
+    _, _, phonemes, _ = texttospeech.synthesize("Hello there.", use_cache=False)
+
+    assert phonemes == ["h", "ə", "l", "oʊ"]
+    assert events == ["synthesis start", "synthesis end", "phonemes start", "phonemes end"]
+
+
+def test_use_cache_false_neither_reads_nor_writes_the_cache(timed_pipeline, monkeypatch):
+    texttospeech, events = timed_pipeline
+    key = texttospeech.tts_cache_key("Uncached text.", texttospeech.TTS_VOICE_NAME, texttospeech.TTS_LANGUAGE_CODE,
+                                     texttospeech.TTS_AUDIO_ENCODING, False)
+    texttospeech.synthesize("Uncached text.", use_cache=False)
+    texttospeech.synthesize("Uncached text.", use_cache=False)
+
+    assert events.count("synthesis start") == 2
+    assert texttospeech.tts_cache.get(key) is None
@@ -0,0 +1,69 @@
+from transcriptstore import TranscriptStore
+
+
+def test_partials_overwrite_their_turn_until_it_is_final():
+    store = TranscriptStore()
+    store.update(0, "i would")
+    store.update(0, "i would use")
+    assert store.answer_text() == "i would use"
+    assert store.answer_text(include_partial=False) == ""
+
+    store.update(0, "i would use a map", end_of_turn=True)
+    store.update(0, "I would use a map.", end_of_turn=True)  # the formatted re-send
+    store.update(0, "i would use a", end_of_turn=False)       # a late partial is ignored
+    assert store.answer_text() == "I would use a map."
+    assert store.final_turns == 1
+
+
+def test_turns_join_in_turn_order():
+    store = TranscriptStore()
+    store.update(1, "second", end_of_turn=True)
+    store.update(0, "first", end_of_turn=True)
+    store.update(2, "third so far")
+    assert store.answer_text() == "first second third so far"
+    assert store.answer_text(include_partial=False) == "first second"
+
+
+def test_take_answer_starts_the_next_answer_after_the_last_turn():
+    store = TranscriptStore()
+    store.update(0, "first answer", end_of_turn=True)
+    store.update(1, "still talking")
+    assert store.take_answer() == "first answer still talking"
+    assert store.answer_text() == ""
+
+    # turns of the taken answer do not leak into the next one
+    store.update(1, "still talking about it", end_of_turn=True)
+    store.update(2, "second answer", end_of_turn=True)
+    assert store.answer_text() == "second answer"
+    assert store.take_answer(include_partial=False) == "second answer"
+    assert store.take_answer() == ""
+
+
+def test_changes_since_returns_each_changed_turn_once_in_change_order():
+    store = TranscriptStore()
+    version, changes = store.changes_since()
+    assert (version, changes) == (0, [])
+
+    store.update(0, "hel")
+    store.update(1, "world", end_of_turn=True)
+    store.update(0, "hello", end_of_turn=True)
+    version, changes = store.changes_since()
+    assert version == 3
+    assert changes == [
+        {"turn_order": 1, "text": "world", "final": True},
+        {"turn_order": 0, "text": "hello", "final": True},
+    ]
+
+    assert store.changes_since(version) == (3, [])
+    store.update(2, "again")
+    assert store.changes_since(version) == (4, [{"turn_order": 2, "text": "again", "final": False}])
+
+
+def test_spoken_version_ignores_the_formatted_re_send():
+    store = TranscriptStore()
+    store.update(0, "i use a map")
+    store.update(0, "i use a map", end_of_turn=True)
+    spoken = store.spoken_version
+    store.update(0, "I use a map.", end_of_turn=True)
+    assert store.spoken_version == spoken
+    assert store.version == spoken + 1
@@ -0,0 +1,34 @@
+import os
+
+from ttscache import TTSCache, tts_cache_key
+
+
+def test_tts_cache_key_covers_every_synthesis_parameter():
+    base = tts_cache_key("Hello", "en-US-Neural2-F", "en-US", "MP3")
+    assert base == tts_cache_key("Hello", "en-US-Neural2-F", "en-US", "MP3")
+    assert len({
+        base,
+        tts_cache_key("hello", "en-US-Neural2-F", "en-US", "MP3"),
+        tts_cache_key("Hello", "en-US-Neural2-D", "en-US", "MP3"),
+        tts_cache_key("Hello", "en-US-Neural2-F", "en-GB", "MP3"),
+        tts_cache_key("Hello", "en-US-Neural2-F", "en-US", "LINEAR16"),
+        tts_cache_key("Hello", "en-US-Neural2-F", "en-US", "MP3", aligned=True),
+    }) == 6
+    # fields cannot run into each other
+    assert tts_cache_key("a", "b c", "d", "e") != tts_cache_key("a b", "c", "d", "e")
+
+
+def test_cache_directory_is_created_by_the_first_put(tmp_path):
+    directory = tmp_path / "tts_cache"
+    cache = TTSCache(directory=str(directory), redis_url=None)
+    assert not directory.exists()
+    assert cache.get("0" * 64) is None
+    assert not directory.exists()
+
+    key = tts_cache_key("Hello", "en-US-Neural2-F", "en-US", "MP3")
+    cache.put(key, b"mp3", {"duration": 0.5, "phonemes": ["h"], "times": None})
+    assert os.path.isdir(directory)
+    assert cache.get(key) == (b"mp3", {"duration": 0.5, "phonemes": ["h"], "times": None})
+
+    # a new process finds the entry on disk
+    assert TTSCache(directory=str(directory), redis_url=None).stats()["entries"] == 1
@@ -0,0 +1,77 @@
+import numpy as np
+
+from vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+FRAME = 800  # 50ms
+
+
+def _tone(seconds, freq=220.0, level=0.3):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (level * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16)
+
+
+def _silence(seconds):
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16)
+
+
+def _frames(pcm):
+    return [pcm[i:i + FRAME].tobytes() for i in range(0, len(pcm), FRAME)]
+
+
+def _run(vad, pcm):
+    forwarded, events = [], 0
+    for frame in _frames(pcm):
+        chunks, end_of_answer = vad.process(frame)
+        forwarded.append(b"".join(chunks))
+        events += end_of_answer
+    return forwarded, events
+
+
+def test_speech_is_forwarded_and_long_silence_suppressed():
+    vad = VoiceActivityDetector(SAMPLE_RATE, hangover_ms=500, keepalive_ms=0)
+    forwarded, _ = _run(vad, np.concatenate([_tone(1.0), _silence(3.0)]))
+
+    speech, silence = forwarded[:20], forwarded[20:]
+    assert all(len(chunk) == FRAME * 2 for chunk in speech)
+    assert all(len(chunk) == FRAME * 2 for chunk in silence[:10])  # hangover
+    assert not any(silence[11:])
+    stats = vad.stats()
+    assert stats["bytes_forwarded"] + stats["bytes_suppressed"] == stats["bytes_in"]
+    assert stats["bytes_suppressed"] > 0
+
+
+def test_suppressed_audio_is_replaced_by_keepalive_silence():
+    vad = VoiceActivityDetector(SAMPLE_RATE, hangover_ms=500, keepalive_ms=50, keepalive_interval_ms=1000)
+    forwarded, _ = _run(vad, np.concatenate([_tone(1.0), _silence(5.5)]))
+
+    keepalives = [chunk for chunk in forwarded[20 + 10:] if chunk]
+    assert len(keepalives) == 5  # one per second of suppressed audio
+    assert all(chunk == bytes(int(SAMPLE_RATE * 0.05) * 2) for chunk in keepalives)
+    stats = vad.stats()
+    assert stats["bytes_keepalive"] == sum(len(chunk) for chunk in keepalives)
+    assert stats["bytes_forwarded"] + stats["bytes_suppressed"] == stats["bytes_in"]
+
+
+def test_preroll_is_replayed_at_speech_onset():
+    vad = VoiceActivityDetector(SAMPLE_RATE, hangover_ms=0, preroll_ms=200, keepalive_ms=0)
+    forwarded, _ = _run(vad, np.concatenate([_silence(1.0), _tone(0.5)]))
+
+    onset = forwarded[20]
+    assert len(onset) == FRAME * 2 * 5  # four frames of pre-roll and the speech frame itself
+    assert vad.stats()["bytes_forwarded"] + vad.stats()["bytes_suppressed"] == vad.stats()["bytes_in"]
+
+
+def test_end_of_answer_fires_once_after_trailing_silence():
+    vad = VoiceActivityDetector(SAMPLE_RATE, end_of_answer_ms=1500)
+    _, events = _run(vad, np.concatenate([_tone(2.0), _silence(1.0), _tone(1.0), _silence(3.0)]))
+    assert events == 1  # the 1s thinking pause is not the end of the answer
+
+
+def test_steady_background_noise_is_not_speech():
+    rng = np.random.default_rng(0)
+    noise = (rng.normal(0, 10 ** (-50 / 20), 5 * SAMPLE_RATE) * 32767).astype(np.int16)
+    vad = VoiceActivityDetector(SAMPLE_RATE, keepalive_ms=0)
+    _, events = _run(vad, noise)
+    assert events == 0
+    assert vad.stats()["speech_seconds"] == 0
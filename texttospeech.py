@@ -1,49 +1,245 @@
 import io
+import os
+import re
 import base64
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
 from pydub import AudioSegment
 from google.cloud import texttospeech
-from getphenome import generate_phonemes
+from getphenome import build_blend_data, build_blend_timeline, get_phonemes, BLENDSHAPE_NAMES
+from audioalign import ALIGNMENT_ENABLED, align_to_audio
+from blendcodec import (
+    BLEND_FORMAT_COMPACT,
+    BLEND_FORMAT_JSON,
+    COMPACT_MEDIA_TYPE,
+    encode_blend_timeline,
+    encode_phoneme_blend,
+)
+from ttscache import tts_cache, tts_cache_key
+from mp3duration import mp3_duration
+from audiotransport import TRANSPORT_JSON, TRANSPORT_MULTIPART, multipart_response
 
 
 app = Flask(__name__)
 client = texttospeech.TextToSpeechClient.from_service_account_file("gcpkey.json")
 
-def ttsblend(text):
-    if not text:
-        return jsonify({"error": "Text is required"}), 400
+TTS_LANGUAGE_CODE = "en-US"
+TTS_VOICE_NAME = "en-US-Neural2-D"
+TTS_AUDIO_ENCODING = "MP3"
+TEXT_REQUIRED = "Text is required"  # error for an empty question, on every delivery path
+
+# Streaming mode: sentences are synthesized concurrently on this pool
+TTS_STREAM_WORKERS = int(os.getenv("TTS_STREAM_WORKERS", "4"))
+MIN_CHUNK_CHARS = 20  # shorter sentences are merged into the next one
+SENTENCE_PATTERN = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+stream_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix="tts-stream")
+
+# Phonemization only needs the text, so it runs while Google synthesizes the audio
+PARALLEL_PHONEMIZE = os.getenv("PARALLEL_PHONEMIZE", "1") != "0"
+phoneme_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_WORKERS, thread_name_prefix="phonemize")
+
+
+def synthesize(text, use_cache=True):
+    """
+    Synthesize text and time its phonemes against the audio.
+    Returns (mp3_bytes, duration_seconds, phonemes, times); served from the
+    TTS cache when the same text and voice were synthesized before.
+    Phonemes are computed concurrently with the Google request and their
+    timings are fitted to the audio once its duration is known.
+    """
+    key = tts_cache_key(text, TTS_VOICE_NAME, TTS_LANGUAGE_CODE, TTS_AUDIO_ENCODING, ALIGNMENT_ENABLED)
+    if use_cache:
+        cached = tts_cache.get(key)
+        if cached is not None:
+            audio_content, meta = cached
+            return audio_content, meta["duration"], meta["phonemes"], meta["times"]
+
+    phonemes_future = phoneme_executor.submit(get_phonemes, text) if PARALLEL_PHONEMIZE else None
 
     # 1️⃣ Generate audio from Google TTS
     synthesis_input = texttospeech.SynthesisInput(text=text)
     voice = texttospeech.VoiceSelectionParams(
-        language_code="en-US",
-        name="en-US-Neural2-D"
+        language_code=TTS_LANGUAGE_CODE,
+        name=TTS_VOICE_NAME
     )
     audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3
+        audio_encoding=texttospeech.AudioEncoding[TTS_AUDIO_ENCODING]
     )
 
     response = client.synthesize_speech(
         input=synthesis_input, voice=voice, audio_config=audio_config
     )
-    # 2️⃣ Convert audio bytes to AudioSegment to get duration
-    audio_bytes = io.BytesIO(response.audio_content)
-    audio = AudioSegment.from_file(audio_bytes, format="mp3")
-    duration_seconds = audio.duration_seconds
-
-    # 3️⃣ Generate blendData using your LLM function
-    blendData = generate_phonemes(text , duration_seconds)
-
-    # 4️⃣ Encode audio to base64 for JSON transport
-    audio_base64 = base64.b64encode(response.audio_content).decode("utf-8")
-    print(duration_seconds)
-    # 5️⃣ Return combined JSON
-    return jsonify({
+    # 2️⃣ Read the duration from the MP3 frame headers; decode only when
+    #    alignment needs the samples or the headers cannot be parsed
+    duration_seconds = mp3_duration(response.audio_content)
+    audio = None
+    if ALIGNMENT_ENABLED or duration_seconds is None:
+        audio_bytes = io.BytesIO(response.audio_content)
+        audio = AudioSegment.from_file(audio_bytes, format="mp3")
+        if duration_seconds is None:
+            duration_seconds = audio.duration_seconds
+
+    # 3️⃣ Collect the phonemes and align their timings to the voiced parts of the audio
+    phonemes = phonemes_future.result() if phonemes_future is not None else get_phonemes(text)
+    times = align_to_audio(audio, len(phonemes)) if ALIGNMENT_ENABLED else None
+    times = None if times is None else [round(float(t), 3) for t in times]
+
+    if use_cache:
+        tts_cache.put(key, response.audio_content, {
+            "duration": duration_seconds,
+            "phonemes": phonemes,
+            "times": times,
+        })
+    return response.audio_content, duration_seconds, phonemes, times
+
+
+def split_sentences(text):
+    """
+    Split text into sentence chunks for streaming synthesis.
+    Fragments shorter than MIN_CHUNK_CHARS are merged into the next sentence.
+    """
+    bounds = []
+    start = 0
+    for match in SENTENCE_PATTERN.finditer(text):
+        if len(text[start:match.end()].strip()) >= MIN_CHUNK_CHARS:
+            bounds.append((start, match.end()))
+            start = match.end()
+    if text[start:].strip():
+        if bounds:
+            bounds[-1] = (bounds[-1][0], len(text))
+        else:
+            bounds.append((start, len(text)))
+    return [text[a:b].strip() for a, b in bounds]
+
+
+def synthesize_chunks(text):
+    """Synthesize (and cache) every streaming chunk of text, e.g. to pre-render it."""
+    return list(stream_executor.map(synthesize, split_sentences(text)))
+
+
+def build_blend_payload(phonemes, duration_seconds, times, fps=None,
+                        blend_format=BLEND_FORMAT_JSON, offset=0.0):
+    """
+    Render blendData in the requested format. `offset` shifts phoneme times
+    so chunks of a streamed answer share one timeline.
+    """
+    if fps:
+        frames = build_blend_timeline(phonemes, duration_seconds, fps=fps, times=times)
+        if blend_format == BLEND_FORMAT_COMPACT:
+            blendData = encode_blend_timeline(frames, fps)
+        else:
+            blendData = {
+                "fps": fps,
+                "blendshapes": BLENDSHAPE_NAMES,
+                "frames": frames.round(3).tolist()
+            }
+        blendData["offset"] = offset
+        return blendData
+
+    if offset and len(phonemes):
+        if times is None:
+            step = duration_seconds / len(phonemes)
+            times = [i * step for i in range(len(phonemes))]
+        times = [t + offset for t in times]
+    if blend_format == BLEND_FORMAT_COMPACT:
+        return encode_phoneme_blend(phonemes, duration_seconds, times=times)
+    return build_blend_data(phonemes, duration_seconds, times=times)
+
+
+def ttsblend_parts(text, fps=None, blend_format=BLEND_FORMAT_JSON):
+    """
+    Synthesize text; returns (metadata, mp3 bytes) for transports that carry
+    audio separately. Raises ValueError(TEXT_REQUIRED) for empty text.
+    """
+    if not text:
+        raise ValueError(TEXT_REQUIRED)
+    audio_content, duration_seconds, phonemes, times = synthesize(text)
+
+    # 4️⃣ Generate blendData (or a fixed-frame-rate timeline when fps is given)
+    blendData = build_blend_payload(phonemes, duration_seconds, times, fps, blend_format)
+    return {"blendData": blendData, "duration": duration_seconds, "question": text}, audio_content
+
+
+def ttsblend(text, fps=None, blend_format=BLEND_FORMAT_JSON, transport=TRANSPORT_JSON):
+    if not text:
+        return jsonify({"error": TEXT_REQUIRED}), 400
+
+    metadata, audio_content = ttsblend_parts(text, fps, blend_format)
+    compact = blend_format == BLEND_FORMAT_COMPACT
+
+    # 5️⃣ Binary transport: metadata and raw MP3 as separate multipart parts
+    if transport == TRANSPORT_MULTIPART:
+        response = multipart_response(
+            metadata,
+            audio_content,
+            metadata_type=COMPACT_MEDIA_TYPE if compact else "application/json"
+        )
+        response.vary.add("Accept")
+        return response
+
+    # 5️⃣ Encode audio to base64 for JSON transport
+    audio_base64 = base64.b64encode(audio_content).decode("utf-8")
+    print(metadata["duration"])
+    # 6️⃣ Return combined JSON
+    response = jsonify({
         "audioSource": audio_base64,  # frontend can decode base64 to play
-        "blendData": blendData,
-        "duration" : duration_seconds,
-        "question" : text
+        **metadata,
     })
+    # Compact blendData is negotiated through the Accept header
+    if compact:
+        response.mimetype = COMPACT_MEDIA_TYPE
+    response.vary.add("Accept")
+    return response
+
+
+def ttsblend_stream_parts(text, fps=None, blend_format=BLEND_FORMAT_JSON):
+    """
+    Streaming variant of ttsblend_parts. Sentences are synthesized concurrently
+    and yielded in order as (metadata, mp3 bytes) as soon as each one (and all
+    before it) is ready, so the client can start playing the first sentence
+    while the rest synthesize. Each chunk's blendData times are offset by the
+    duration of the chunks before it. Empty text raises ValueError(TEXT_REQUIRED)
+    here, before the stream starts.
+    """
+    if not text:
+        raise ValueError(TEXT_REQUIRED)
+    return _stream_parts(text, fps, blend_format)
+
+
+def _stream_parts(text, fps, blend_format):
+    chunks = split_sentences(text)
+    futures = [stream_executor.submit(synthesize, chunk) for chunk in chunks]
+
+    offset = 0.0
+    try:
+        for index, (chunk, future) in enumerate(zip(chunks, futures)):
+            audio_content, duration_seconds, phonemes, times = future.result()
+            yield {
+                "index": index,
+                "count": len(chunks),
+                "text": chunk,
+                "offset": offset,
+                "duration": duration_seconds,
+                "blendData": build_blend_payload(phonemes, duration_seconds, times, fps, blend_format, offset),
+                "question": text,
+            }, audio_content
+            offset += duration_seconds
+    finally:
+        # client went away: drop chunks that have not started yet
+        for future in futures:
+            future.cancel()
+
+
+def ttsblend_stream(text, fps=None, blend_format=BLEND_FORMAT_JSON):
+    """ttsblend_stream_parts with the audio base64-encoded into each chunk, for NDJSON."""
+    parts = ttsblend_stream_parts(text, fps, blend_format)
+    return ({**metadata, "audioSource": base64.b64encode(audio_content).decode("utf-8")}
+            for metadata, audio_content in parts)
+
+
+@app.route("/tts/cache-stats", methods=["GET"])
+def tts_cache_stats():
+    return jsonify(tts_cache.stats())
 
 if __name__ == "__main__":
     app.run(port=3001, debug=True)
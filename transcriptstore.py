@@ -0,0 +1,94 @@
+import bisect
+import threading
+from collections import OrderedDict
+
+
+class TranscriptStore:
+    """
+    One session's transcript, indexed by AssemblyAI turn_order.
+    Partial Turn messages overwrite their turn until the final (formatted)
+    version arrives, so nothing is duplicated. The current answer is every
+    turn since the last take_answer(); its finalized part is kept joined, so
+    reading it does not re-scan the turns.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = {}     # turn_order -> text
+        self.final = set()  # turn_orders whose text is final
+        self.latest = ""    # text of the most recently updated turn
+        self.final_turns = 0
+        self.version = 0
+        self.spoken_version = 0  # like version, but a finished turn re-sent formatted is not a change
+
+        self._answer_start = 0     # first turn_order of the current answer
+        self._answer_turns = []    # sorted final turn_orders of the current answer
+        self._answer_final = ""    # their joined text
+        self._answer_partial = {}  # turn_order -> text, for unfinished turns of the current answer
+        # turn_order -> version of its latest change, least recently changed first: one entry per turn,
+        # for incremental snapshots
+        self._changed = OrderedDict()
+
+    def update(self, turn_order, text, end_of_turn=False):
+        with self._lock:
+            if turn_order in self.final and not end_of_turn:
+                return  # a late partial never replaces the final text
+            self.turns[turn_order] = text
+            self.latest = text
+            self.version += 1
+            self._changed[turn_order] = self.version
+            self._changed.move_to_end(turn_order)
+            if not (end_of_turn and turn_order in self.final):
+                self.spoken_version += 1
+
+            if end_of_turn:
+                if turn_order not in self.final:
+                    self.final.add(turn_order)
+                    self.final_turns += 1
+                self._answer_partial.pop(turn_order, None)
+                if turn_order >= self._answer_start:
+                    if turn_order not in self._answer_turns:
+                        bisect.insort(self._answer_turns, turn_order)
+                    self._rebuild_answer()
+            elif turn_order >= self._answer_start:
+                self._answer_partial[turn_order] = text
+
+    def _rebuild_answer(self):
+        # only on finalization: once per turn (twice with formatting), not per partial
+        self._answer_final = " ".join(self.turns[t] for t in self._answer_turns if self.turns[t])
+
+    def _answer_text(self, include_partial):
+        if not include_partial or not self._answer_partial:
+            return self._answer_final
+        partial = " ".join(text for _, text in sorted(self._answer_partial.items()) if text)
+        return f"{self._answer_final} {partial}".strip()
+
+    def answer_text(self, include_partial=True):
+        """The candidate's current answer."""
+        with self._lock:
+            return self._answer_text(include_partial)
+
+    def take_answer(self, include_partial=True):
+        """Return the current answer and start a new one after it."""
+        with self._lock:
+            text = self._answer_text(include_partial)
+            self._answer_start = max(self.turns, default=-1) + 1
+            self._answer_turns = []
+            self._answer_final = ""
+            self._answer_partial = {}
+        return text
+
+    def changes_since(self, version=0):
+        """
+        Incremental snapshot: (current version, [{turn_order, text, final}])
+        for turns updated after `version`. Pass the returned version next time.
+        """
+        with self._lock:
+            changed = []
+            for turn_order, turn_version in reversed(self._changed.items()):
+                if turn_version <= version:
+                    break
+                changed.append(turn_order)
+            return self.version, [
+                {"turn_order": t, "text": self.turns[t], "final": t in self.final} for t in reversed(changed)
+            ]
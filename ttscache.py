@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CACHE_REDIS_URL = os.getenv("TTS_CACHE_REDIS_URL")  # optional shared tier, e.g. redis://localhost:6379/1
+CACHE_REDIS_TTL = int(os.getenv("TTS_CACHE_REDIS_TTL", str(7 * 24 * 60 * 60)))
+
+
+def tts_cache_key(text: str, voice_name: str, language_code: str, encoding: str, aligned: bool = False) -> str:
+    """
+    Content address of one synthesized utterance. `aligned` is whether its
+    phoneme times were fitted to the audio (VISEME_ALIGNMENT): the cached
+    times differ, so the two modes never share an entry.
+    """
+    payload = json.dumps([text, voice_name, language_code, encoding, bool(aligned)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech.
+    Each entry holds the MP3 bytes plus metadata (duration, phonemes and their
+    aligned start times, from which any blendData format is rebuilt).
+    A local directory is the primary tier, evicted least-recently-used once it
+    exceeds `max_bytes`; an optional Redis tier is shared between processes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES,
+                 redis_url=CACHE_REDIS_URL, redis_ttl=CACHE_REDIS_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.redis_ttl = redis_ttl
+        self.redis = redis.Redis.from_url(redis_url) if redis_url else None
+
+        self._lock = Lock()
+        self._index = OrderedDict()  # key -> bytes on disk, oldest first
+        self.total_bytes = 0
+
+        self.disk_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_seconds = 0.0
+
+        self._load_index()  # the directory itself is created by the first put
+
+    # ---------------- Disk tier ---------------- #
+    def _paths(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}.mp3"), os.path.join(folder, f"{key}.json")
+
+    def _load_index(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".mp3"):
+                    key = name[:-4]
+                    audio_path, meta_path = self._paths(key)
+                    if os.path.exists(meta_path):
+                        size = os.path.getsize(audio_path) + os.path.getsize(meta_path)
+                        entries.append((os.path.getmtime(audio_path), key, size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+
+    def _read_disk(self, key):
+        audio_path, meta_path = self._paths(key)
+        try:
+            with open(audio_path, "rb") as f:
+                audio = f.read()
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(audio_path)  # keeps LRU order across restarts
+        return audio, meta
+
+    def _write_disk(self, key, audio, meta):
+        audio_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        # write metadata first so a listed .mp3 always has its .json
+        for path, data in ((meta_path, meta_bytes), (audio_path, audio)):
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return len(audio) + len(meta_bytes)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # ---------------- Public API ---------------- #
+    def get(self, key):
+        """Return (audio_bytes, meta) or None."""
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                if key in self._index:
+                    entry = self._read_disk(key)
+                    if entry is not None:
+                        self._index.move_to_end(key)
+                        self.disk_hits += 1
+                        return entry
+                    self.total_bytes -= self._index.pop(key)
+
+            if self.redis is not None:
+                try:
+                    audio, meta = self.redis.hmget(f"tts:{key}", "audio", "meta")
+                except redis.RedisError as e:
+                    print(f"⚠️ TTS cache Redis error: {e}")
+                    audio = meta = None
+                if audio is not None and meta is not None:
+                    meta = json.loads(meta)
+                    self._put_disk(key, audio, meta)
+                    with self._lock:
+                        self.redis_hits += 1
+                    return audio, meta
+
+            with self._lock:
+                self.misses += 1
+            return None
+        finally:
+            with self._lock:
+                self.lookup_seconds += time.perf_counter() - start
+
+    def _put_disk(self, key, audio, meta):
+        with self._lock:
+            try:
+                size = self._write_disk(key, audio, meta)
+            except OSError as e:
+                print(f"⚠️ TTS cache write error: {e}")
+                return
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def put(self, key, audio: bytes, meta: dict):
+        self._put_disk(key, audio, meta)
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.hset(f"tts:{key}", mapping={"audio": audio, "meta": json.dumps(meta, ensure_ascii=False)})
+                pipe.expire(f"tts:{key}", self.redis_ttl)
+                pipe.execute()
+            except redis.RedisError as e:
+                print(f"⚠️ TTS cache Redis error: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.disk_hits + self.redis_hits + self.misses
+            hits = self.disk_hits + self.redis_hits
+            return {
+                "lookups": lookups,
+                "disk_hits": self.disk_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self.total_bytes,
+                "avg_lookup_ms": round(self.lookup_seconds / lookups * 1000, 4) if lookups else 0.0,
+            }
+
+
+tts_cache = TTSCache()
@@ -0,0 +1,163 @@
+import os
+from collections import deque
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Silence suppression on inbound browser audio (VAD_ENABLED=0 forwards everything)
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") != "0"
+# Fire an end-of-answer event after this much silence following speech (VAD_AUTO_ENDPOINT=1)
+VAD_AUTO_ENDPOINT = os.getenv("VAD_AUTO_ENDPOINT", "0") == "1"
+VAD_END_OF_ANSWER_MS = int(os.getenv("VAD_END_OF_ANSWER_MS", "1500"))
+
+ENERGY_DB = float(os.getenv("VAD_ENERGY_DB", "-45"))   # never call anything quieter than this speech
+MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "12"))    # speech must be this far above the noise floor
+# Keep forwarding this long after speech stops: at least AssemblyAI's max_turn_silence (1280ms by
+# default), so the server endpointer always hears enough silence to finalize the turn
+HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "1500"))
+# While suppressing, send KEEPALIVE_MS of digital silence every KEEPALIVE_INTERVAL_MS so the upstream
+# session keeps advancing and is not closed as idle (0 disables)
+KEEPALIVE_MS = int(os.getenv("VAD_KEEPALIVE_MS", "50"))
+KEEPALIVE_INTERVAL_MS = int(os.getenv("VAD_KEEPALIVE_INTERVAL_MS", "1000"))
+PREROLL_MS = 200            # suppressed audio replayed at speech onset so word starts are not clipped
+WINDOW_MS = 10              # analysis window
+ZCR_MAX = 0.35              # noise-like windows (hiss, fans) cross zero more often than voiced speech
+LOUD_MARGIN_DB = 10         # windows this far above threshold count as speech whatever their ZCR (fricatives)
+NOISE_FLOOR_RISE = 0.05     # how fast the noise floor follows louder background noise
+
+
+def frame_features(samples: np.ndarray, sample_rate: int, window_ms=WINDOW_MS):
+    """
+    RMS energy (dBFS) and zero-crossing rate per analysis window of int16 PCM.
+    A message shorter than one window is analysed as a single window.
+    """
+    window = max(int(sample_rate * window_ms / 1000), 2)
+    n_windows = len(samples) // window
+    if n_windows == 0:
+        if len(samples) < 2:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        window, n_windows = len(samples), 1
+    frames = samples[:n_windows * window].reshape(n_windows, window).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(rms + 1e-9)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (window - 1)
+    return energy_db.astype(np.float32), zcr.astype(np.float32)
+
+
+class VoiceActivityDetector:
+    """
+    Energy + zero-crossing VAD for one session's inbound 16-bit PCM.
+    process() returns the audio to forward upstream (possibly nothing, or a
+    short keepalive of silence) and whether the candidate has just finished
+    answering. Recording happens before this gate, so it keeps everything.
+    """
+
+    def __init__(self, sample_rate=16000, hangover_ms=HANGOVER_MS, end_of_answer_ms=VAD_END_OF_ANSWER_MS,
+                 energy_db=ENERGY_DB, margin_db=MARGIN_DB, preroll_ms=PREROLL_MS,
+                 keepalive_ms=KEEPALIVE_MS, keepalive_interval_ms=KEEPALIVE_INTERVAL_MS):
+        self.sample_rate = sample_rate
+        self.hangover_ms = hangover_ms
+        self.end_of_answer_ms = end_of_answer_ms
+        self.energy_db = energy_db
+        self.margin_db = margin_db
+        self.preroll_ms = preroll_ms
+        self.keepalive_ms = keepalive_ms
+        self.keepalive_interval_ms = keepalive_interval_ms
+
+        self.noise_floor_db = energy_db - margin_db
+        self.silence_ms = float("inf")  # nothing heard yet
+        self.in_answer = False
+        self._preroll = deque()
+        self._preroll_ms = 0.0
+        self._since_keepalive_ms = 0.0
+
+        self.bytes_in = 0
+        self.bytes_forwarded = 0
+        self.bytes_suppressed = 0
+        self.bytes_keepalive = 0
+        self.speech_ms = 0.0
+        self.end_of_answer_events = 0
+
+    def is_speech(self, samples: np.ndarray):
+        energy_db, zcr = frame_features(samples, self.sample_rate)
+        if len(energy_db) == 0:
+            return False
+        threshold = max(self.energy_db, self.noise_floor_db + self.margin_db)
+        above = energy_db > threshold
+        voiced = (above & (zcr < ZCR_MAX)) | (energy_db > threshold + LOUD_MARGIN_DB)
+
+        background = energy_db[~above]
+        if len(background):
+            level = float(background.mean())
+            # drop straight to quieter backgrounds, drift up slowly towards louder ones
+            if level < self.noise_floor_db:
+                self.noise_floor_db = level
+            else:
+                self.noise_floor_db += NOISE_FLOOR_RISE * (level - self.noise_floor_db)
+        return bool(voiced.any())
+
+    def process(self, pcm: bytes):
+        """Returns (chunks to forward, end_of_answer)."""
+        keepalive = b""
+        pcm = bytes(pcm)
+        samples = np.frombuffer(pcm, dtype=np.int16, count=len(pcm) // 2)
+        duration_ms = 1000.0 * len(samples) / self.sample_rate
+        self.bytes_in += len(pcm)
+
+        if self.is_speech(samples):
+            self.speech_ms += duration_ms
+            self.silence_ms = 0.0
+            self.in_answer = True
+            forward = [chunk for chunk, _ in self._preroll] + [pcm]
+            self.bytes_suppressed -= sum(len(chunk) for chunk, _ in self._preroll)
+            self._preroll.clear()
+            self._preroll_ms = 0.0
+            self._since_keepalive_ms = 0.0
+        else:
+            self.silence_ms += duration_ms
+            if self.silence_ms <= self.hangover_ms:
+                forward = [pcm]
+            else:
+                forward = []
+                self.bytes_suppressed += len(pcm)
+                self._preroll.append((pcm, duration_ms))
+                self._preroll_ms += duration_ms
+                while len(self._preroll) > 1 and self._preroll_ms - self._preroll[0][1] >= self.preroll_ms:
+                    self._preroll_ms -= self._preroll.popleft()[1]
+                keepalive = self._keepalive(duration_ms)
+
+        end_of_answer = self.in_answer and self.silence_ms >= self.end_of_answer_ms
+        if end_of_answer:
+            self.in_answer = False
+            self.end_of_answer_events += 1
+
+        self.bytes_forwarded += sum(len(chunk) for chunk in forward)
+        if keepalive:  # not part of the candidate's audio: counted on its own
+            self.bytes_keepalive += len(keepalive)
+            forward.append(keepalive)
+        return forward, end_of_answer
+
+    def _keepalive(self, duration_ms):
+        """Digital silence to send in place of suppressed audio, when one is due."""
+        if not self.keepalive_ms:
+            return b""
+        self._since_keepalive_ms += duration_ms
+        if self._since_keepalive_ms < self.keepalive_interval_ms:
+            return b""
+        self._since_keepalive_ms = 0.0
+        return bytes(int(self.sample_rate * self.keepalive_ms / 1000) * 2)
+
+    def stats(self):
+        return {
+            "bytes_in": self.bytes_in,
+            "bytes_forwarded": self.bytes_forwarded,
+            "bytes_suppressed": self.bytes_suppressed,
+            "bytes_keepalive": self.bytes_keepalive,
+            "suppressed_ratio": round(self.bytes_suppressed / self.bytes_in, 3) if self.bytes_in else 0.0,
+            "speech_seconds": round(self.speech_ms / 1000, 2),
+            "noise_floor_db": round(self.noise_floor_db, 1),
+            "end_of_answer_events": self.end_of_answer_events,
+        }